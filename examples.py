@@ -10,7 +10,7 @@ from txdlo import DeferredListObserver
 
 def deferredList(deferreds):
     """
-    Return a deferred that fires with a list of (success, result) tuples,
+    Return a deferred that fires with a sequence of (success, result) tuples,
     'success' being a boolean.
 
     @param deferreds: a C{list} of deferreds.
@@ -19,17 +19,15 @@ def deferredList(deferreds):
     if len(deferreds) == 0:
         return succeed([])
 
-    dlo = DeferredListObserver(maintainHistory=True)
-    map(dlo.append, deferreds)
+    dlo = DeferredListObserver(maintainResults=True, sizeHint=len(deferreds))
+    for d in deferreds:
+        dlo.append(d)
     deferred = Deferred()
 
     def observer(*ignore):
         if dlo.pendingCount == 0:
             # Everything in the list has fired.
-            resultList = [None] * len(deferreds)
-            for index, success, value in dlo.history:
-                resultList[index] = (success, value)
-            deferred.callback(resultList)
+            deferred.callback(dlo.results.view())
 
     dlo.observe(observer)
 
@@ -38,7 +36,7 @@ def deferredList(deferreds):
 
 class DeferredList(object):
     """
-    A class holding a deferred that fires with a list of (success, result)
+    A class holding a deferred that fires with a sequence of (success, result)
     tuples, 'success' being a boolean.
 
     The use of a class allows us to provide an C{append} function that allows
@@ -52,15 +50,12 @@ class DeferredList(object):
 
     def __init__(self):
         self.deferred = Deferred()
-        dlo = DeferredListObserver(maintainHistory=True)
+        dlo = DeferredListObserver(maintainResults=True)
 
         def observer(*ignore):
             if dlo.pendingCount == 0:
                 # Everything in the list has fired.
-                resultList = [None] * (dlo.successCount + dlo.failureCount)
-                for index, success, value in dlo.history:
-                    resultList[index] = (success, value)
-                self.deferred.callback(resultList)
+                self.deferred.callback(dlo.results.view())
 
         dlo.observe(observer)
         self.append = dlo.append
@@ -79,18 +74,19 @@ def onFirstCallback(deferreds):
     if len(deferreds) == 0:
         raise ValueError('Empty list passed to onFirstCallback')
 
-    dlo = DeferredListObserver()
-    map(dlo.append, deferreds)
+    dlo = DeferredListObserver(autoSeal=True)
+    for d in deferreds:
+        dlo.append(d)
     deferred = Deferred()
-    state = {'fired': False}
 
     def observer(index, success, value):
-        if not state['fired']:
-            state['fired'] = True
-            if success:
-                deferred.callback((index, value))
-            else:
-                deferred.errback((index, value))
+        # We only need one event. Removing our observer seals dlo, so the
+        # remaining deferreds cost (almost) nothing when they fire.
+        dlo.unobserve(observer)
+        if success:
+            deferred.callback((index, value))
+        else:
+            deferred.errback((index, value))
 
     dlo.observe(observer)
 
@@ -121,7 +117,8 @@ def onNCallbacks(deferreds, n):
         return succeed([])
 
     dlo = DeferredListObserver(maintainHistory=True)
-    map(dlo.append, deferreds)
+    for d in deferreds:
+        dlo.append(d)
     deferred = Deferred()
 
     def observer(index, success, value):
@@ -130,7 +127,7 @@ def onNCallbacks(deferreds, n):
                 resultList = []
                 for _index, _success, _value in dlo.history:
                     if _success:
-                        resultList.append = (_index, _value)
+                        resultList.append((_index, _value))
                         if len(resultList) == n:
                             deferred.callback(resultList)
                             return
@@ -157,24 +154,23 @@ def onFirstCallbackOnlyErrbackAsALastResort(deferreds):
         raise ValueError('Empty list passed to '
                          'onFirstCallbackOnlyErrbackAsALastResort')
 
-    dlo = DeferredListObserver(maintainHistory=True)
-    map(dlo.append, deferreds)
+    dlo = DeferredListObserver(maintainHistory=True, autoSeal=True)
+    for d in deferreds:
+        dlo.append(d)
     deferred = Deferred()
-    state = {'fired': False}
 
     def observer(index, success, value):
-        if not state['fired']:
-            if success:
-                state['fired'] = True
-                deferred.callback((index, value))
-            else:
-                if dlo.pendingCount == 0:
-                    state['fired'] = True
-                    # No chance of a successful callback. Send the index
-                    # and value of the first error.
-                    event = dlo.history[0]
-                    # We could assert event[1] is False
-                    deferred.errback((event[0], event[2]))
+        if success:
+            dlo.unobserve(observer)
+            deferred.callback((index, value))
+        else:
+            if dlo.pendingCount == 0:
+                dlo.unobserve(observer)
+                # No chance of a successful callback. Send the index
+                # and value of the first error.
+                event = dlo.history[0]
+                # We could assert event[1] is False
+                deferred.errback((event[0], event[2]))
 
     dlo.observe(observer)
 
@@ -9,7 +9,7 @@ d = dict(name='txdlo',
          maintainer_email='terry@jon.es',
          url='https://github.com/terrycojones/txdlo',
          download_url='https://github.com/terrycojones/txdlo',
-         packages=['txdlo', 'txdlo.test'],
+         packages=['txdlo', 'txdlo.test', 'txdlo.benchmarks'],
          keywords=['twisted deferred observer'],
          classifiers=[
              'Programming Language :: Python',
@@ -1,3 +1,44 @@
-from dlo import DeferredListObserver
+"""
+Observe the firing of a set of Twisted deferreds.
 
-__all__ = [ 'DeferredListObserver' ]
+Nothing is imported until it is used: C{txdlo.DeferredListObserver} and
+the submodules (e.g., C{txdlo.combinators}) are loaded on first access, so
+importing C{txdlo} is cheap and does not import Twisted.
+"""
+
+import sys
+from importlib import import_module
+
+__all__ = ['DeferredListObserver']
+
+# Public names, and the modules they are loaded from.
+_names = {
+    'DeferredListObserver': 'txdlo.dlo',
+}
+
+_submodules = frozenset([
+    'aio', 'benchmarks', 'combinators', 'dlo', 'eventlog', 'hedge',
+    'instrument', 'pool', 'processes', 'reducers', 'results', 'sharded',
+    'singleflight', 'stream', 'threads',
+])
+
+
+def __getattr__(name):
+    if name in _names:
+        value = getattr(import_module(_names[name]), name)
+    elif name in _submodules:
+        value = import_module('txdlo.' + name)
+    else:
+        raise AttributeError('module %r has no attribute %r' %
+                             (__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_names) | _submodules)
+
+
+if sys.version_info < (3, 7):
+    # Module __getattr__ is not supported.
+    from txdlo.dlo import DeferredListObserver
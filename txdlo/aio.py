@@ -0,0 +1,114 @@
+"""
+Support for observing C{asyncio} futures, tasks and coroutines with a
+L{txdlo.DeferredListObserver}, and for iterating over its events with
+C{async for}.
+
+Futures are observed natively (via C{add_done_callback}), without wrapping
+each one in a deferred, so the observer's counters, history, results and
+observers all work as they do for deferreds. This module requires Python 3.
+"""
+
+import asyncio
+from collections import deque
+from functools import partial
+
+from twisted.python.failure import Failure
+
+
+def _done(dlo, index, future):
+    """
+    Pass the result of a completed future to an observer.
+
+    @param dlo: the L{txdlo.DeferredListObserver} observing C{future}.
+    @param index: the C{int} index of C{future}.
+    @param future: the completed C{asyncio.Future}.
+    """
+    if future.cancelled():
+        from twisted.internet.defer import CancelledError
+        # Use Twisted's CancelledError, so futures cancelled by
+        # DeferredListObserver.cancelPending are treated like deferreds.
+        dlo._eb(Failure(CancelledError()), dlo, index)
+    else:
+        exception = future.exception()
+        if exception is None:
+            dlo._cb(future.result(), dlo, index)
+        else:
+            dlo._eb(Failure(exception), dlo, index)
+
+
+def appendAwaitable(dlo, awaitable):
+    """
+    Monitor an C{asyncio} future, task, or coroutine. A coroutine is
+    scheduled as a task on the current event loop.
+
+    A future that is cancelled is reported as failing with a Twisted
+    C{CancelledError} (which, if the future was cancelled by
+    C{dlo.cancelPending}, is counted as a cancellation).
+
+    @param dlo: the L{txdlo.DeferredListObserver} to use.
+    @param awaitable: an C{asyncio.Future}, task, or coroutine.
+    @return: the C{asyncio.Future} (or task) being monitored.
+    """
+    future = asyncio.ensure_future(awaitable)
+    if not dlo.sealed:
+        future.add_done_callback(partial(_done, dlo, dlo._reserve(future)))
+    return future
+
+
+class EventStream(object):
+    """
+    An asynchronous iterator over the (index, success, value) events of a
+    L{txdlo.DeferredListObserver}, for use with C{async for}. Iteration
+    starts with the first event after the stream is created and stops when
+    no events are waiting and nothing in the observer is pending (or the
+    observer is sealed).
+
+    The stream observes C{dlo} weakly, so if iteration is abandoned (e.g.,
+    with C{break}) the stream stops observing once it is garbage collected.
+    C{aclose} stops it at once.
+
+    @param dlo: the L{txdlo.DeferredListObserver} whose events to iterate
+        over.
+    """
+
+    def __init__(self, dlo):
+        self._dlo = dlo
+        self._events = deque()
+        self._waiter = None
+        dlo.observe(self._observer, weak=True)
+
+    def _observer(self, index, success, value):
+        self._events.append((index, success, value))
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._events:
+            dlo = self._dlo
+            if dlo.pendingCount == 0 or dlo.sealed:
+                self._close()
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_event_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._events.popleft()
+
+    def _close(self):
+        """
+        Stop observing, and discard any events that have not been taken.
+        """
+        if self._observer in self._dlo._observers:
+            self._dlo.unobserve(self._observer)
+        self._events.clear()
+
+    async def aclose(self):
+        """
+        Stop iterating. Events that have not been taken are discarded, and
+        later events are not collected.
+        """
+        self._close()
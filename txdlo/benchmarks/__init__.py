@@ -0,0 +1,7 @@
+"""
+Benchmarks for txdlo. These do not use the network or the reactor.
+
+Run the whole suite with C{python -m txdlo.benchmarks} (see
+L{txdlo.benchmarks.suite}), or an individual comparison directly, e.g.
+C{python -m txdlo.benchmarks.append}.
+"""
@@ -0,0 +1,58 @@
+"""
+Run the txdlo benchmark suite, e.g.:
+
+    python -m txdlo.benchmarks --n 1000000 --json results.json
+
+Run from the top-level source directory to include the C{examples.py}
+benchmarks.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import platform
+import sys
+
+from txdlo.benchmarks.suite import BENCHMARKS, runAll
+
+
+def printResult(result):
+    peakMemory = result['peakMemory']
+    print('%-50s %12.0f ops/s %12s' % (
+        result['name'], result['opsPerSecond'] or 0,
+        '-' if peakMemory is None else '%.1f MiB' % (peakMemory / 2.0 ** 20)))
+    sys.stdout.flush()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Run the txdlo benchmark suite.')
+    parser.add_argument('--n', type=int, default=100000,
+                        help='The number of deferreds to use.')
+    parser.add_argument('--json', metavar='FILE',
+                        help='Write results to FILE as JSON.')
+    parser.add_argument('--list', action='store_true',
+                        help='List the benchmark names and exit.')
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help='Benchmarks to run (default: all).')
+    args = parser.parse_args(args)
+
+    if args.list:
+        for benchmark in BENCHMARKS:
+            print(benchmark.__name__)
+        return
+
+    results = runAll(args.n, args.names or None, printResult)
+
+    if args.json:
+        with open(args.json, 'w') as fp:
+            json.dump({
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'results': results,
+            }, fp, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Compare the cost of appending and firing deferreds with the current
+L{DeferredListObserver} against the original design, which created a pair
+of closures (and a fresh event tuple per firing) for every appended
+deferred.
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+import tracemalloc
+
+from twisted.internet.defer import Deferred
+
+from txdlo import DeferredListObserver
+
+
+class ClosureDeferredListObserver(object):
+    """
+    The original closure-based observer, kept here only as a baseline.
+    """
+
+    def __init__(self):
+        self.successCount = self.failureCount = self.pendingCount = 0
+        self._observers = []
+
+    def _makeCallbacks(self, index):
+
+        def callback(value):
+            self.pendingCount -= 1
+            self.successCount += 1
+            event = (index, True, value)
+            for observer in self._observers:
+                observer(*event)
+            return value
+
+        def errback(value):
+            self.pendingCount -= 1
+            self.failureCount += 1
+            event = (index, False, value)
+            for observer in self._observers:
+                observer(*event)
+            return value
+
+        return (callback, errback)
+
+    def append(self, deferred):
+        index = self.successCount + self.failureCount + self.pendingCount
+        callback, errback = self._makeCallbacks(index)
+        self.pendingCount += 1
+        return deferred.addCallbacks(callback, errback)
+
+    def observe(self, observer):
+        self._observers.append(observer)
+
+
+def _observer(index, success, value):
+    pass
+
+
+def _time(cls, n):
+    """
+    Time appending C{n} unfired deferreds to an instance of C{cls} and then
+    firing them all.
+
+    @param cls: the observer class to measure.
+    @param n: the C{int} number of deferreds to use.
+    @return: a (append time, fire time) C{tuple}, in seconds.
+    """
+    deferreds = [Deferred() for _ in range(n)]
+    dlo = cls()
+    dlo.observe(_observer)
+
+    start = time.time()
+    for deferred in deferreds:
+        dlo.append(deferred)
+    appendTime = time.time() - start
+
+    start = time.time()
+    for deferred in deferreds:
+        deferred.callback(None)
+    fireTime = time.time() - start
+    return appendTime, fireTime
+
+
+def measure(cls, n, repeat=5):
+    """
+    Append C{n} unfired deferreds to an instance of C{cls} and then fire
+    them all.
+
+    @param cls: the observer class to measure.
+    @param n: the C{int} number of deferreds to use.
+    @param repeat: the C{int} number of times to time the work. The fastest
+        time is used, as the others are slowed by other activity.
+    @return: a C{dict} with the time taken per append and per firing (in
+        seconds) and the number of bytes retained per appended deferred.
+    """
+    times = [_time(cls, n) for _ in range(repeat)]
+    appendTime = min(appendTime for appendTime, _ in times)
+    fireTime = min(fireTime for _, fireTime in times)
+
+    # Repeat the appends with tracemalloc running to see how much memory
+    # each append leaves attached to its deferred.
+    deferreds = [Deferred() for _ in range(n)]
+    dlo = cls()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for deferred in deferreds:
+        dlo.append(deferred)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        'append': appendTime / n,
+        'fire': fireTime / n,
+        'bytes': retained / float(n),
+    }
+
+
+def main(n=100000):
+    for cls in (ClosureDeferredListObserver, DeferredListObserver):
+        result = measure(cls, n)
+        print('%-28s append %.3fus  fire %.3fus  retained %.1f bytes' % (
+            cls.__name__, result['append'] * 1e6, result['fire'] * 1e6,
+            result['bytes']))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
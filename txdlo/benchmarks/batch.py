@@ -0,0 +1,73 @@
+"""
+Compare the per-event cost of ordinary observers with that of batch
+observers (see L{DeferredListObserver.observeBatch}) when many deferreds
+fire together.
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from twisted.internet.defer import Deferred
+
+from txdlo import DeferredListObserver
+
+
+class _Counter(object):
+    """
+    An observer that just counts events, either singly or in batches.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def event(self, index, success, value):
+        self.count += 1
+
+    def batch(self, events):
+        self.count += len(events)
+
+
+def measure(n, observerCount, batch):
+    """
+    Fire C{n} deferreds together and deliver their events to observers.
+
+    @param n: the C{int} number of deferreds to fire.
+    @param observerCount: the C{int} number of observers.
+    @param batch: if C{True} use batch observers.
+    @return: the C{float} number of seconds taken per event.
+    """
+    scheduled = []
+    dlo = DeferredListObserver(batchScheduler=scheduled.append)
+    counters = [_Counter() for _ in range(observerCount)]
+    for counter in counters:
+        if batch:
+            dlo.observeBatch(counter.batch)
+        else:
+            dlo.observe(counter.event)
+    deferreds = [Deferred() for _ in range(n)]
+    for deferred in deferreds:
+        dlo.append(deferred)
+
+    start = time.time()
+    for deferred in deferreds:
+        deferred.callback(None)
+    for function in scheduled:
+        function()
+    elapsed = time.time() - start
+
+    assert all(counter.count == n for counter in counters)
+    return elapsed / n
+
+
+def main(n=10000):
+    for observerCount in (1, 10, 100):
+        single = measure(n, observerCount, False)
+        batched = measure(n, observerCount, True)
+        print('%3d observers: per-event %.3fus  batched %.3fus' % (
+            observerCount, single * 1e6, batched * 1e6))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,84 @@
+"""
+Compare the combinators in L{txdlo.combinators} with the corresponding
+functions in C{examples.py}. Run from the top-level source directory (so
+C{examples} can be imported) with C{python -m txdlo.benchmarks.combinators}.
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from twisted.internet.defer import Deferred
+
+from txdlo import combinators
+
+try:
+    import examples
+except ImportError:
+    examples = None
+
+
+def _ignore(value):
+    pass
+
+
+def _run(function, n, failures, *args):
+    """
+    Time a combinator function on C{n} unfired deferreds, which are then
+    fired in order.
+
+    @param function: the combinator function to call.
+    @param n: the C{int} number of deferreds.
+    @param failures: the C{int} number of deferreds (starting from the
+        first) to errback. The rest are called back.
+    @param args: additional arguments for C{function}.
+    @return: the C{float} number of seconds taken.
+    """
+    deferreds = [Deferred() for _ in range(n)]
+    error = Exception('failure')
+    start = time.time()
+    result = function(deferreds, *args)
+    for index, deferred in enumerate(deferreds):
+        if index < failures:
+            deferred.errback(error)
+        else:
+            deferred.callback(index)
+    elapsed = time.time() - start
+    result.addErrback(_ignore)
+    for deferred in deferreds[:failures]:
+        deferred.addErrback(_ignore)
+    return elapsed
+
+
+# (description, combinator, example function name, failures, extra args).
+# The failure count and extra args are functions of n.
+CASES = (
+    ('gather all', combinators.gatherAll, 'deferredList',
+     lambda n: 0, lambda n: ()),
+    ('first of', combinators.firstOf, 'onFirstCallback',
+     lambda n: 0, lambda n: ()),
+    ('n of (n/2)', combinators.nOf, 'onNCallbacks',
+     lambda n: 0, lambda n: (n // 2,)),
+    ('first success else first error', combinators.firstSuccessElseFirstError,
+     'onFirstCallbackOnlyErrbackAsALastResort', lambda n: n - 1,
+     lambda n: ()),
+)
+
+
+def main(n=100000):
+    if examples is None:
+        print('Could not import examples.py. Run from the top-level source '
+              'directory.')
+        return
+    for description, combinator, exampleName, failures, args in CASES:
+        example = getattr(examples, exampleName)
+        exampleTime = _run(example, n, failures(n), *args(n))
+        combinatorTime = _run(combinator, n, failures(n), *args(n))
+        print('%-32s examples.%s %.3fs  txdlo.combinators.%s %.3fs' % (
+            description, exampleName, exampleTime, combinator.__name__,
+            combinatorTime))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,265 @@
+"""
+The txdlo benchmark suite.
+
+Each benchmark is a function that takes a size, C{n}, does any setup, and
+returns a zero-argument function that does the work to be measured, plus
+the number of operations that work performs. The work is run once to time
+it and once more (after fresh setup) under C{tracemalloc} to find its peak
+memory use.
+"""
+
+from __future__ import print_function
+
+import gc
+import time
+
+from twisted.internet.defer import Deferred, succeed
+
+from txdlo import DeferredListObserver
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import examples
+except ImportError:
+    examples = None
+
+
+def _ignore(*args):
+    pass
+
+
+def appendUnfired(n):
+    deferreds = [Deferred() for _ in range(n)]
+    dlo = DeferredListObserver()
+
+    def run():
+        for deferred in deferreds:
+            dlo.append(deferred)
+
+    return run, n
+
+
+def appendFired(n):
+    deferreds = [succeed(None) for _ in range(n)]
+    dlo = DeferredListObserver()
+
+    def run():
+        for deferred in deferreds:
+            dlo.append(deferred)
+
+    return run, n
+
+
+def extendUnfired(n):
+    deferreds = [Deferred() for _ in range(n)]
+    dlo = DeferredListObserver()
+
+    def run():
+        dlo.extend(deferreds)
+
+    return run, n
+
+
+def extendFired(n):
+    deferreds = [succeed(None) for _ in range(n)]
+    dlo = DeferredListObserver()
+
+    def run():
+        dlo.extend(deferreds)
+
+    return run, n
+
+
+def _fireWithObservers(observerCount):
+
+    def benchmark(n):
+        deferreds = [Deferred() for _ in range(n)]
+        dlo = DeferredListObserver()
+        for _ in range(observerCount):
+            dlo.observe(_ignore)
+        for deferred in deferreds:
+            dlo.append(deferred)
+
+        def run():
+            for deferred in deferreds:
+                deferred.callback(None)
+
+        return run, n
+
+    benchmark.__name__ = 'fireWith%dObservers' % observerCount
+    return benchmark
+
+
+def replayHistory(n):
+    dlo = DeferredListObserver(maintainHistory=True)
+    for index in range(n):
+        dlo.append(succeed(index))
+
+    def run():
+        dlo.observe(_ignore, replayHistory=True)
+
+    return run, n
+
+
+def snapshotAttach(n):
+    dlo = DeferredListObserver(maintainHistory=True)
+    for index in range(n):
+        dlo.append(succeed(index))
+
+    def run():
+        dlo.observe(_ignore, snapshot=_ignore)
+
+    # Attaching takes constant time, whatever the size of the history, so
+    # this is one operation (and its time is the attach latency).
+    return run, 1
+
+
+def _example(name, failures=0, args=()):
+    """
+    Make a benchmark for a function in C{examples.py}, which is called with
+    C{n} unfired deferreds that are then fired in order.
+
+    @param name: the C{str} name of the function in C{examples}.
+    @param failures: a function that takes C{n} and returns the C{int}
+        number of deferreds (starting from the first) to errback.
+    @param args: a function that takes C{n} and returns a C{tuple} of
+        additional arguments for the example function.
+    @return: a benchmark function.
+    """
+    def benchmark(n):
+        function = getattr(examples, name)
+        deferreds = [Deferred() for _ in range(n)]
+        failureCount = failures(n) if failures else 0
+        error = Exception('failure')
+
+        def run():
+            result = function(deferreds, *(args(n) if args else ()))
+            for index, deferred in enumerate(deferreds):
+                if index < failureCount:
+                    deferred.errback(error)
+                    deferred.addErrback(_ignore)
+                else:
+                    deferred.callback(index)
+            result.addErrback(_ignore)
+
+        return run, n
+
+    benchmark.__name__ = 'examples.' + name
+    return benchmark
+
+
+def exampleDeferredPool(n):
+    deferreds = [Deferred() for _ in range(n)]
+
+    def run():
+        pool = examples.DeferredPoolWithEmptyFunction()
+        for deferred in deferreds:
+            pool.append(deferred)
+        pool.notifyWhenEmpty()
+        for deferred in deferreds:
+            deferred.callback(None)
+
+    return run, n
+
+
+exampleDeferredPool.__name__ = 'examples.DeferredPoolWithEmptyFunction'
+
+
+def exampleDeferredList(n):
+    deferreds = [Deferred() for _ in range(n)]
+
+    def run():
+        deferredList = examples.DeferredList()
+        for deferred in deferreds:
+            deferredList.append(deferred)
+        for deferred in deferreds:
+            deferred.callback(None)
+
+    return run, n
+
+
+exampleDeferredList.__name__ = 'examples.DeferredList'
+
+
+BENCHMARKS = [
+    appendUnfired,
+    appendFired,
+    extendUnfired,
+    extendFired,
+    _fireWithObservers(1),
+    _fireWithObservers(10),
+    _fireWithObservers(100),
+    replayHistory,
+    snapshotAttach,
+]
+
+if examples is not None:
+    BENCHMARKS.extend([
+        _example('deferredList'),
+        exampleDeferredList,
+        _example('onFirstCallback'),
+        _example('onNCallbacks', args=lambda n: (n // 2,)),
+        _example('onFirstCallbackOnlyErrbackAsALastResort',
+                 failures=lambda n: n - 1),
+        exampleDeferredPool,
+    ])
+
+
+def measure(benchmark, n):
+    """
+    Run a benchmark.
+
+    @param benchmark: a benchmark function (see above).
+    @param n: the C{int} size to pass to C{benchmark}.
+    @return: a C{dict} with the benchmark name, the size, the number of
+        operations, the time taken, operations per second, and peak memory
+        use in bytes (or C{None} if C{tracemalloc} is not available).
+    """
+    run, operations = benchmark(n)
+    gc.collect()
+    start = time.time()
+    run()
+    elapsed = time.time() - start
+
+    peakMemory = None
+    if tracemalloc is not None:
+        run, _ = benchmark(n)
+        gc.collect()
+        tracemalloc.start()
+        run()
+        peakMemory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'name': benchmark.__name__,
+        'n': n,
+        'operations': operations,
+        'seconds': elapsed,
+        'opsPerSecond': operations / elapsed if elapsed else None,
+        'peakMemory': peakMemory,
+    }
+
+
+def runAll(n, names=None, report=None):
+    """
+    Run benchmarks.
+
+    @param n: the C{int} size to pass to each benchmark.
+    @param names: an iterable of C{str} benchmark names, or C{None} to run
+        all benchmarks.
+    @param report: a C{callable} to pass each result C{dict} to as it is
+        produced, or C{None}.
+    @return: a C{list} of result C{dict}s (see C{measure}).
+    """
+    results = []
+    for benchmark in BENCHMARKS:
+        if names is None or benchmark.__name__ in names:
+            result = measure(benchmark, n)
+            if report:
+                report(result)
+            results.append(result)
+    return results
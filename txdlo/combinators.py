@@ -0,0 +1,425 @@
+"""
+Combinators that fire a deferred when some combination of events has
+occurred on a set of observed deferreds.
+
+Each combinator is a class whose instances observe a
+L{txdlo.DeferredListObserver} and keep just enough state to make their
+decision in constant time per event (the history is never rescanned). Each
+class has a corresponding function that takes a list of deferreds and
+returns a deferred.
+"""
+
+from twisted.internet.defer import (
+    CancelledError, Deferred, FirstError, succeed)
+from twisted.python.failure import Failure
+
+from txdlo.dlo import DeferredListObserver
+
+
+class NoSuccessError(Exception):
+    """
+    Raised (via a failed deferred) when none of a set of observed deferreds
+    succeeded.
+
+    @ivar failures: a C{list} of (index, failure) tuples, one for each of the
+        observed deferreds, in the order they failed.
+    """
+
+    def __init__(self, failures):
+        Exception.__init__(self, failures)
+        self.failures = failures
+
+
+class _Combinator(object):
+    """
+    Base class for combinators. Subclasses implement C{__call__}, which is
+    added as an observer of C{dlo}.
+
+    @param dlo: the L{txdlo.DeferredListObserver} to observe.
+    @param count: the C{int} number of deferreds that will be observed, or
+        C{None} if this is not known in advance, in which case all deferreds
+        are considered to have fired whenever the C{pendingCount} of C{dlo}
+        is zero.
+    @ivar deferred: a L{twisted.internet.defer.Deferred} that fires when the
+        combinator has decided its result. The combinator then stops
+        observing C{dlo}.
+    """
+
+    __slots__ = ('deferred', '_dlo', '_count', '_fired', '_decided')
+
+    def __init__(self, dlo, count=None):
+        self.deferred = Deferred()
+        self._dlo = dlo
+        self._count = count
+        self._fired = 0
+        self._decided = False
+        dlo.observe(self)
+
+    def _allFired(self):
+        """
+        Have all the observed deferreds fired?
+
+        @return: a C{bool}.
+        """
+        if self._count is None:
+            return self._dlo.pendingCount == 0
+        else:
+            return self._fired == self._count
+
+    def _decide(self):
+        """
+        Note that the result has been decided, tell the observer, and stop
+        observing.
+        """
+        self._decided = True
+        self._dlo.decide()
+        if self in self._dlo._observers:
+            self._dlo.unobserve(self)
+
+    def _callback(self, result):
+        self._decide()
+        self.deferred.callback(result)
+
+    def _errback(self, failure):
+        self._decide()
+        self.deferred.errback(failure)
+
+
+class GatherAll(_Combinator):
+    """
+    Fire with a sequence of (success, value) tuples, in deferred index
+    order, once all observed deferreds have fired. If C{dlo} is maintaining
+    results, its result view is used, otherwise results are stored here.
+    """
+
+    __slots__ = ('_results',)
+
+    def __init__(self, dlo, count=None):
+        self._results = None if hasattr(dlo, 'results') else []
+        _Combinator.__init__(self, dlo, count)
+        if count == 0:
+            self._callback([])
+
+    def __call__(self, index, success, value):
+        if self._decided:
+            return
+        self._fired += 1
+        results = self._results
+        if results is not None:
+            if index >= len(results):
+                results.extend([None] * (index + 1 - len(results)))
+            results[index] = (success, value)
+        if self._allFired():
+            if results is None:
+                self._callback(self._dlo.results.view())
+            else:
+                self._callback(results)
+
+
+class FirstOf(_Combinator):
+    """
+    Fire with the (index, value) of the first observed deferred to fire. If
+    that deferred failed, errback with a
+    L{twisted.internet.defer.FirstError}.
+    """
+
+    __slots__ = ()
+
+    def __call__(self, index, success, value):
+        if self._decided:
+            return
+        if success:
+            self._callback((index, value))
+        else:
+            self._errback(FirstError(value, index))
+
+
+class FirstSuccess(_Combinator):
+    """
+    Fire with the (index, value) of the first observed deferred to succeed.
+    If all observed deferreds fail, errback with a L{NoSuccessError}
+    holding all the failures.
+    """
+
+    __slots__ = ('_failures',)
+
+    def __init__(self, dlo, count=None):
+        self._failures = []
+        _Combinator.__init__(self, dlo, count)
+
+    def __call__(self, index, success, value):
+        if self._decided:
+            return
+        self._fired += 1
+        if success:
+            self._failures = None
+            self._callback((index, value))
+        else:
+            self._failures.append((index, value))
+            if self._allFired():
+                self._errback(NoSuccessError(self._failures))
+
+
+class NOf(_Combinator):
+    """
+    Fire with a C{list} of (index, value) tuples, in firing order, once
+    C{n} observed deferreds have succeeded. If any deferred fails before
+    then, errback with a L{twisted.internet.defer.FirstError}.
+
+    @param n: the C{int} number of successes needed.
+    """
+
+    __slots__ = ('_n', '_successes')
+
+    def __init__(self, dlo, n, count=None):
+        if n < 0:
+            raise ValueError('n < 0 passed to NOf')
+        if count is not None and n > count:
+            raise ValueError('n > count passed to NOf')
+        self._n = n
+        self._successes = []
+        _Combinator.__init__(self, dlo, count)
+        if n == 0:
+            self._callback([])
+
+    def __call__(self, index, success, value):
+        if self._decided:
+            return
+        if success:
+            self._successes.append((index, value))
+            if len(self._successes) == self._n:
+                self._callback(self._successes)
+        else:
+            self._errback(FirstError(value, index))
+
+
+class FirstSuccessElseFirstError(_Combinator):
+    """
+    Fire with the (index, value) of the first observed deferred to succeed.
+    Failures are ignored while a success is still possible. If all observed
+    deferreds fail, errback with a L{twisted.internet.defer.FirstError} for
+    the first failure.
+    """
+
+    __slots__ = ('_firstError',)
+
+    def __init__(self, dlo, count=None):
+        self._firstError = None
+        _Combinator.__init__(self, dlo, count)
+
+    def __call__(self, index, success, value):
+        if self._decided:
+            return
+        self._fired += 1
+        if success:
+            self._firstError = None
+            self._callback((index, value))
+        else:
+            if self._firstError is None:
+                self._firstError = FirstError(value, index)
+            if self._allFired():
+                self._errback(self._firstError)
+
+
+class Condition(_Combinator):
+    """
+    Fire as soon as a predicate holds. The predicate is checked when the
+    condition is created and after each event.
+
+    @param predicate: a C{function} that will be called with C{reducer}'s
+        C{value} (or with C{dlo}, if C{reducer} is C{None}) and returns
+        C{True} when the condition holds.
+    @param reducer: a reducer (see L{txdlo.reducers}) that is passed each
+        event before the predicate is checked, or C{None}.
+    @ivar deferred: a L{twisted.internet.defer.Deferred} that fires with the
+        value the predicate was last called with, or fails if the predicate
+        (or reducer) raises.
+    """
+
+    __slots__ = ('_predicate', '_reducer')
+
+    def __init__(self, dlo, predicate, reducer=None):
+        self._predicate = predicate
+        self._reducer = reducer
+        _Combinator.__init__(self, dlo)
+        try:
+            self._check()
+        except Exception:
+            self._errback(Failure())
+
+    def _check(self):
+        """
+        Fire if the predicate holds.
+        """
+        state = self._dlo if self._reducer is None else self._reducer.value
+        if self._predicate(state):
+            self._callback(state)
+
+    def __call__(self, index, success, value):
+        if self._decided:
+            return
+        try:
+            if self._reducer is not None:
+                self._reducer(index, success, value)
+            self._check()
+        except Exception:
+            self._errback(Failure())
+
+
+def _swallowCancelled(failure):
+    failure.trap(CancelledError)
+
+
+def _observeAll(combinatorClass, deferreds, *args, **kwargs):
+    """
+    Observe a list of deferreds with a new combinator.
+
+    @param combinatorClass: the combinator class to use.
+    @param deferreds: a C{list} of deferreds.
+    @param args: additional positional arguments for C{combinatorClass}.
+    @param kwargs: keyword arguments for the L{DeferredListObserver}. A
+        C{timeout} keyword, if not C{None}, is used as a deadline for the
+        whole set (see L{DeferredListObserver.setDeadline}).
+    @return: the deferred of the combinator.
+    """
+    timeout = kwargs.pop('timeout', None)
+    if timeout is not None:
+        kwargs['deadlines'] = True
+    dlo = DeferredListObserver(autoSeal=True, **kwargs)
+    combinator = combinatorClass(dlo, *args, count=len(deferreds))
+    cancel = kwargs.get('cancelPendingOnDecision', False)
+    for deferred in deferreds:
+        if dlo.sealed:
+            # The result was decided by a deferred that had already fired,
+            # so this one will not be observed. Cancel it as it would have
+            # been if it had been appended before the decision.
+            if not cancel:
+                break
+            deferred.addErrback(_swallowCancelled)
+            deferred.cancel()
+        else:
+            dlo.append(deferred)
+    if timeout is not None and not dlo.sealed:
+        dlo.setDeadline(timeout)
+    return combinator.deferred
+
+
+def gatherAll(deferreds, timeout=None, clock=None):
+    """
+    Return a deferred that fires with a sequence of (success, result)
+    tuples, in the order of C{deferreds}, once they have all fired.
+    Deferreds that time out have a C{success} of C{None}.
+
+    @param deferreds: a C{list} of deferreds.
+    @param timeout: if not C{None}, the number of seconds after which any
+        deferreds that have not fired are treated as having failed with a
+        L{twisted.internet.defer.TimeoutError}.
+    @param clock: the L{twisted.internet.interfaces.IReactorTime} provider
+        used for C{timeout}. If C{None}, the reactor is used.
+    @return: a L{twisted.internet.defer.Deferred} that fires as above.
+    """
+    if len(deferreds) == 0:
+        return succeed([])
+    return _observeAll(GatherAll, deferreds, maintainResults=True,
+                       sizeHint=len(deferreds), timeout=timeout, clock=clock)
+
+
+def firstOf(deferreds, cancelPendingOnDecision=False, timeout=None,
+            clock=None):
+    """
+    Return a deferred that fires with an (index, result) tuple to indicate
+    which element of C{deferreds} fired first. If that deferred failed, the
+    returned deferred fails with a L{twisted.internet.defer.FirstError}.
+
+    @param deferreds: a non-empty C{list} of deferreds.
+    @param cancelPendingOnDecision: if C{True}, deferreds that have not
+        fired when the result is decided are cancelled.
+    @param timeout: if not C{None}, the number of seconds after which any
+        deferreds that have not fired are treated as having failed with a
+        L{twisted.internet.defer.TimeoutError}.
+    @param clock: the L{twisted.internet.interfaces.IReactorTime} provider
+        used for C{timeout}. If C{None}, the reactor is used.
+    @raise ValueError: if C{deferreds} is empty.
+    @return: a L{twisted.internet.defer.Deferred} that fires as above.
+    """
+    if len(deferreds) == 0:
+        raise ValueError('Empty list passed to firstOf')
+    return _observeAll(FirstOf, deferreds,
+                       cancelPendingOnDecision=cancelPendingOnDecision,
+                       timeout=timeout, clock=clock)
+
+
+def firstSuccess(deferreds, cancelPendingOnDecision=False, timeout=None,
+                 clock=None):
+    """
+    Return a deferred that fires with an (index, result) tuple for the first
+    element of C{deferreds} to succeed. If all fail, the returned deferred
+    fails with a L{NoSuccessError}.
+
+    @param deferreds: a non-empty C{list} of deferreds.
+    @param cancelPendingOnDecision: if C{True}, deferreds that have not
+        fired when the result is decided are cancelled.
+    @param timeout: if not C{None}, the number of seconds after which any
+        deferreds that have not fired are treated as having failed with a
+        L{twisted.internet.defer.TimeoutError}.
+    @param clock: the L{twisted.internet.interfaces.IReactorTime} provider
+        used for C{timeout}. If C{None}, the reactor is used.
+    @raise ValueError: if C{deferreds} is empty.
+    @return: a L{twisted.internet.defer.Deferred} that fires as above.
+    """
+    if len(deferreds) == 0:
+        raise ValueError('Empty list passed to firstSuccess')
+    return _observeAll(FirstSuccess, deferreds,
+                       cancelPendingOnDecision=cancelPendingOnDecision,
+                       timeout=timeout, clock=clock)
+
+
+def nOf(deferreds, n, cancelPendingOnDecision=False, timeout=None,
+        clock=None):
+    """
+    Return a deferred that fires with a list of C{n} (index, result) tuples
+    once C{n} of C{deferreds} have succeeded. If any deferred fails first,
+    the returned deferred fails with a L{twisted.internet.defer.FirstError}.
+
+    @param deferreds: a C{list} of deferreds.
+    @param n: the C{int} number of successes needed.
+    @param cancelPendingOnDecision: if C{True}, deferreds that have not
+        fired when the result is decided are cancelled.
+    @param timeout: if not C{None}, the number of seconds after which any
+        deferreds that have not fired are treated as having failed with a
+        L{twisted.internet.defer.TimeoutError}.
+    @param clock: the L{twisted.internet.interfaces.IReactorTime} provider
+        used for C{timeout}. If C{None}, the reactor is used.
+    @raise ValueError: if C{n} is negative or greater than the number of
+        deferreds.
+    @return: a L{twisted.internet.defer.Deferred} that fires as above.
+    """
+    return _observeAll(NOf, deferreds, n,
+                       cancelPendingOnDecision=cancelPendingOnDecision,
+                       timeout=timeout, clock=clock)
+
+
+def firstSuccessElseFirstError(deferreds, cancelPendingOnDecision=False,
+                               timeout=None, clock=None):
+    """
+    Return a deferred that fires with an (index, result) tuple for the first
+    element of C{deferreds} to succeed. Failures are ignored while a success
+    is still possible. If all fail, the returned deferred fails with a
+    L{twisted.internet.defer.FirstError} for the first failure.
+
+    @param deferreds: a non-empty C{list} of deferreds.
+    @param cancelPendingOnDecision: if C{True}, deferreds that have not
+        fired when the result is decided are cancelled.
+    @param timeout: if not C{None}, the number of seconds after which any
+        deferreds that have not fired are treated as having failed with a
+        L{twisted.internet.defer.TimeoutError}.
+    @param clock: the L{twisted.internet.interfaces.IReactorTime} provider
+        used for C{timeout}. If C{None}, the reactor is used.
+    @raise ValueError: if C{deferreds} is empty.
+    @return: a L{twisted.internet.defer.Deferred} that fires as above.
+    """
+    if len(deferreds) == 0:
+        raise ValueError('Empty list passed to firstSuccessElseFirstError')
+    return _observeAll(FirstSuccessElseFirstError, deferreds,
+                       cancelPendingOnDecision=cancelPendingOnDecision,
+                       timeout=timeout, clock=clock)
@@ -1,3 +1,49 @@
+from collections import deque
+from heapq import heappop, heappush
+from types import MethodType
+from weakref import ref
+
+try:
+    from weakref import WeakMethod
+except ImportError:
+    WeakMethod = None
+
+from txdlo.results import (
+    ResultStore, SUCCESS, FAILURE, CANCELLED, TIMED_OUT)
+
+# Twisted is only imported where it is needed (by which time it has usually
+# been imported anyway), so importing this module, and counting and
+# observing events, does not load twisted.internet.
+
+
+def _callLater(function):
+    """
+    Call a function in the next reactor iteration.
+
+    @param function: a zero-argument C{callable}.
+    """
+    from twisted.internet import reactor
+    reactor.callLater(0, function)
+
+
+def _makeRemover(dlo):
+    """
+    Make a weak reference callback that removes a dead weak observer.
+
+    @param dlo: the L{DeferredListObserver} the observer was added to. Only
+        a weak reference to it is kept.
+    @return: a C{function} to pass as the callback of a weak reference.
+    """
+    dloRef = ref(dlo)
+
+    def remove(observerRef):
+        dlo = dloRef()
+        if dlo is not None:
+            dlo._removeDead(observerRef)
+
+    return remove
+
+
 class DeferredListObserver(object):
     """
     Call a list of observer functions with information about firing events
@@ -7,62 +53,711 @@ class DeferredListObserver(object):
     @param maintainHistory: if C{True} a history of all events is maintained.
         This can be replayed to newly added observers and is accessible to
         class instances. If C{False}, the default, no history is kept.
+    @param historySize: if not C{None}, the C{int} maximum number of events
+        to keep in the history. When the history is full, the oldest event
+        is discarded to make room for a new one.
+    @param historyFailuresOnly: if C{True}, only failure events are kept in
+        the history.
+    @param historyValues: if C{False}, events in the history have C{None} in
+        place of the value the deferred fired with, so the history does not
+        keep values alive.
+    @param historyLog: if not C{None}, a L{txdlo.eventlog.EventLog} to use as
+        the history, so that events are kept on disk rather than in memory
+        (see also C{fromLog}). Cannot be used with C{historySize}.
+    @param maintainResults: if C{True} the result of each deferred is kept
+        in a L{txdlo.results.ResultStore}, addressed by deferred index.
+    @param sizeHint: the C{int} number of deferreds expected to be added.
+        Used to preallocate result storage if C{maintainResults} is C{True}.
+    @param autoSeal: if C{True}, the observer is sealed (see C{seal}) as soon
+        as its last observer function is removed via C{unobserve}.
+    @param cancelPendingOnDecision: if C{True}, weak references to pending
+        deferreds are kept and C{decide} cancels them (see C{cancelPending}).
+    @param batchScheduler: a C{callable} that will be passed a zero-argument
+        function to call later, used to deliver events to batch observers
+        (see C{observeBatch}). If C{None}, the function is called via
+        C{reactor.callLater(0, ...)}.
+    @param deadlines: if C{True}, deadlines may be given for deferreds (see
+        C{append}, C{extend}, and C{setDeadline}). This requires remembering
+        which deferreds are pending, so is off by default.
+    @param clock: the L{twisted.internet.interfaces.IReactorTime} provider
+        used to schedule deadlines. If C{None}, the reactor is used.
     @ivar history: a C{list} of (index, success, value) tuples, in the order
         that the deferreds in the set fired (this will generally not be the
         order in which the deferreds are added to the set). The history
         attribute will only exist if C{maintainHistory} (above) is C{True}.
+        If C{historySize} is given, the history is a C{collections.deque},
+        and if C{historyLog} is given, it is the history.
+    @ivar results: a L{txdlo.results.ResultStore} holding the result of each
+        deferred, by index. The results attribute will only exist if
+        C{maintainResults} (above) is C{True}.
     @ivar successCount: the number of observed deferreds that have been called
         successfully.
     @ivar failureCount: the number of observed deferreds that have been
         errored.
+    @ivar evictedCount: the number of events that are not in the history,
+        due to C{historySize} or C{historyFailuresOnly}. Only available if
+        C{maintainHistory} is C{True}.
     @ivar pendingCount: the number of observed deferreds that have not yet been
         called or errored.
+    @ivar cancelledCount: the number of observed deferreds that failed with
+        a C{CancelledError} after being cancelled by C{cancelPending}. These
+        are not counted as failures and are not passed to observers.
+    @ivar timedOutCount: the number of observed deferreds that did not fire
+        before their deadline. These are not counted as failures. Observers
+        are passed an event for each, with a C{success} value of C{None} and
+        a L{twisted.python.failure.Failure} wrapping a
+        L{twisted.internet.defer.TimeoutError}. If such a deferred fires
+        later, that is ignored. Timed-out deferreds are not cancelled, but
+        are still cancelled by C{cancelPending}.
+    @ivar instrumentation: a L{txdlo.instrument.Instrumentation} holding
+        timing information if C{instrument} has been called, else C{None}.
+    @ivar sealed: C{True} if C{seal} has been called. A sealed observer does
+        no work when observed deferreds fire and ignores further appends,
+        so its counts, history and results no longer change.
     """
 
-    def __init__(self, maintainHistory=False):
+    __slots__ = ('_maintainHistory', 'history', '_historySuccesses',
+                 '_historyValues', '_maintainResults', 'results',
+                 'successCount', 'failureCount', 'pendingCount', '_nextIndex',
+                 '_observers',
+                 '_autoSeal', 'sealed', 'cancelledCount', '_pending',
+                 '_cancelled', '_batchObservers', '_batch', '_batchScheduler',
+                 '_streams', 'instrumentation', 'timedOutCount', '_unfired',
+                 '_deadlines', '_setDeadline', '_timer', '_clock', '_cb',
+                 '_eb', '_completed', '_extras', '__weakref__')
+
+    def __init__(self, maintainHistory=False, maintainResults=False,
+                 sizeHint=0, autoSeal=False, cancelPendingOnDecision=False,
+                 historySize=None, historyFailuresOnly=False,
+                 historyValues=True, batchScheduler=None, deadlines=False,
+                 clock=None, historyLog=None):
+        if not maintainHistory and (historySize is not None or
+                                    historyFailuresOnly or not historyValues or
+                                    historyLog is not None):
+            raise ValueError('History options given but maintainHistory is '
+                             'not True')
+        if historySize is not None and historyLog is not None:
+            raise ValueError('historySize cannot be used with historyLog')
         self._maintainHistory = maintainHistory
+        self._historySuccesses = maintainHistory and not historyFailuresOnly
+        self._historyValues = historyValues
         if maintainHistory:
-            self.history = []
+            if historyLog is not None:
+                self.history = historyLog
+            elif historySize is None:
+                self.history = []
+            else:
+                self.history = deque(maxlen=historySize)
+        self._maintainResults = maintainResults
+        if maintainResults:
+            self.results = ResultStore(sizeHint)
         self.successCount = self.failureCount = self.pendingCount = 0
+        self._nextIndex = 0
+        # Indexes above _nextIndex that completed before a restart (see
+        # fromLog), which are skipped when allocating indexes.
+        self._completed = None
         self._observers = []
+        self._autoSeal = autoSeal
+        self.sealed = False
+        self.cancelledCount = 0
+        # Weak references to pending deferreds, by index, if we may need to
+        # cancel them. Indexes whose deferreds we have cancelled.
+        self._pending = {} if cancelPendingOnDecision else None
+        self._cancelled = set()
+        # Observers that are passed lists of events, the events waiting to be
+        # passed to them (or None if no delivery is scheduled), and how to
+        # schedule delivery.
+        self._batchObservers = []
+        self._batch = None
+        self._batchScheduler = batchScheduler or _callLater
+        # Open L{txdlo.stream.DeferredEventStream}s.
+        self._streams = []
+        self.instrumentation = None
+        # If deadlines are enabled: the indexes of pending deferreds, a heap
+        # of (time, index) per-deferred deadlines, the deadline for the whole
+        # set, and the one delayed call used to enforce them all.
+        self.timedOutCount = 0
+        self._unfired = set() if deadlines else None
+        self._deadlines = []
+        self._setDeadline = None
+        self._timer = None
+        self._clock = clock
+        # A single callback / errback pair is shared by every observed
+        # deferred. This observer and the deferred's index are passed to them
+        # via the callbackArgs and errbackArgs of addCallbacks, so appending
+        # a deferred does not need to create any new functions. They are
+        # plain functions, not bound methods, so holding them here does not
+        # create a reference cycle.
+        self._cb = DeferredListObserver._callback
+        self._eb = DeferredListObserver._errback
+        self._updateExtras()
 
-    def _makeCallbacks(self, index):
+    def _updateExtras(self):
+        """
+        Note whether any feature that needs more than the basic work when a
+        deferred fires (updating the counts and history and calling
+        observers) is in use. This must be called whenever one may have
+        been turned on or off.
+        """
+        self._extras = bool(
+            self._pending is not None or self._unfired is not None or
+            self.sealed or self._maintainResults or self._batchObservers or
+            self._streams or (self._maintainHistory and not (
+                self._historySuccesses and self._historyValues)))
 
-        def callback(value):
-            self.pendingCount -= 1
-            self.successCount += 1
-            event = (index, True, value)
-            if self._maintainHistory:
-                self.history.append(event)
-            for observer in self._observers:
-                observer(*event)
+    @classmethod
+    def fromLog(cls, log, **kwargs):
+        """
+        Rebuild an observer, e.g., after a restart, from the events in an
+        event log, which becomes its history. Its counts (and results, if
+        kept) are set from the events, and the indexes of the logged events
+        are skipped when indexes are given to newly appended deferreds. So
+        if deferreds are appended in the same order as before, except for
+        those whose index is in the log, each gets the index it had before.
+
+        @param log: a L{txdlo.eventlog.EventLog}. The events are read from
+            it once, to rebuild the counts and results.
+        @param kwargs: keyword arguments for the observer. C{maintainHistory}
+            and C{historyLog} are set.
+        @return: a L{DeferredListObserver}.
+        """
+        dlo = cls(maintainHistory=True, historyLog=log, **kwargs)
+        completed = set()
+        results = dlo.results if dlo._maintainResults else None
+        for index, success, value in log:
+            if index in completed:
+                continue
+            completed.add(index)
+            if success:
+                dlo.successCount += 1
+            elif success is None:
+                dlo.timedOutCount += 1
+            else:
+                dlo.failureCount += 1
+            if results is not None:
+                if index >= len(results):
+                    results._reserveRange(len(results),
+                                          index + 1 - len(results))
+                results._set(index, SUCCESS if success else
+                             (FAILURE if success is False else TIMED_OUT),
+                             value)
+        dlo._completed = completed
+        dlo._nextIndex = dlo._skipCompleted(0)
+        return dlo
+
+    @staticmethod
+    def _callback(value, dlo, index):
+        # Checking a single flag keeps firing fast when no extra features
+        # are in use.
+        if dlo._extras:
+            return DeferredListObserver._extraCallback(value, dlo, index)
+        dlo.pendingCount -= 1
+        dlo.successCount += 1
+        if dlo._maintainHistory:
+            dlo.history.append((index, True, value))
+        for observer in dlo._observers:
+            observer(index, True, value)
+        return value
+
+    @staticmethod
+    def _errback(value, dlo, index):
+        if dlo._extras:
+            return DeferredListObserver._extraErrback(value, dlo, index)
+        dlo.pendingCount -= 1
+        dlo.failureCount += 1
+        if dlo._maintainHistory:
+            dlo.history.append((index, False, value))
+        for observer in dlo._observers:
+            observer(index, False, value)
+        return value
+
+    @staticmethod
+    def _extraCallback(value, dlo, index):
+        if dlo._pending is not None:
+            dlo._pending.pop(index, None)
+            dlo._cancelled.discard(index)
+        if dlo._unfired is not None:
+            if index not in dlo._unfired:
+                # It timed out.
+                return value
+            dlo._unfired.discard(index)
+        if dlo.sealed:
             return value
+        dlo.pendingCount -= 1
+        dlo.successCount += 1
+        if dlo._historySuccesses:
+            dlo.history.append((index, True, value) if dlo._historyValues
+                               else (index, True, None))
+        if dlo._maintainResults:
+            dlo.results._set(index, SUCCESS, value)
+        for observer in dlo._observers:
+            observer(index, True, value)
+        if dlo._batchObservers:
+            dlo._addToBatch((index, True, value))
+        if dlo._streams:
+            return dlo._offerToStreams((index, True, value), value)
+        return value
 
-        def errback(value):
-            self.pendingCount -= 1
-            self.failureCount += 1
-            event = (index, False, value)
-            if self._maintainHistory:
-                self.history.append(event)
-            for observer in self._observers:
-                observer(*event)
+    @staticmethod
+    def _extraErrback(value, dlo, index):
+        if dlo._pending is not None:
+            dlo._pending.pop(index, None)
+            if index in dlo._cancelled:
+                dlo._cancelled.discard(index)
+                from twisted.internet.defer import CancelledError
+                if value.check(CancelledError):
+                    if dlo._unfired is None or index in dlo._unfired:
+                        if dlo._unfired is not None:
+                            dlo._unfired.discard(index)
+                        if not dlo.sealed:
+                            dlo.pendingCount -= 1
+                            dlo.cancelledCount += 1
+                            if dlo._maintainResults:
+                                dlo.results._set(index, CANCELLED, None)
+                    # Swallow the failure caused by our cancellation (of a
+                    # pending or timed-out deferred).
+                    return None
+        if dlo._unfired is not None:
+            if index not in dlo._unfired:
+                return value
+            dlo._unfired.discard(index)
+        if dlo.sealed:
             return value
+        dlo.pendingCount -= 1
+        dlo.failureCount += 1
+        if dlo._maintainHistory:
+            dlo.history.append((index, False, value) if dlo._historyValues
+                               else (index, False, None))
+        if dlo._maintainResults:
+            dlo.results._set(index, FAILURE, value)
+        for observer in dlo._observers:
+            observer(index, False, value)
+        if dlo._batchObservers:
+            dlo._addToBatch((index, False, value))
+        if dlo._streams:
+            return dlo._offerToStreams((index, False, value), value)
+        return value
+
+    def _addToBatch(self, event):
+        """
+        Add an event to the batch for batch observers, scheduling delivery of
+        the batch if this is the first event in it.
 
-        return (callback, errback)
+        @param event: an (index, success, value) C{tuple}.
+        """
+        if self._batch is None:
+            self._batch = [event]
+            self._batchScheduler(self._deliverBatch)
+        else:
+            self._batch.append(event)
+
+    def _deliverBatch(self):
+        """
+        Pass the current batch of events to all batch observers.
+        """
+        batch = self._batch
+        self._batch = None
+        if batch:
+            for observer in self._batchObservers:
+                observer(batch)
+
+    def _offerToStreams(self, event, result):
+        """
+        Offer an event to all streams.
+
+        @param event: an (index, success, value) C{tuple}.
+        @param result: the result to pass down the firing deferred's
+            callback chain.
+        @return: C{result}, or a L{twisted.internet.defer.Deferred} that fires
+            with C{result} once any streams that are full (and blocking) have
+            room for the event. This pauses the firing deferred.
+        """
+        waits = []
+        for stream in self._streams:
+            wait = stream._offer(event)
+            if wait is not None:
+                waits.append(wait)
+        if not waits:
+            return result
+        if len(waits) == 1:
+            wait = waits[0]
+        else:
+            from twisted.internet.defer import DeferredList
+            wait = DeferredList(waits)
+        return wait.addCallback(lambda _: result)
+
+    def stream(self, maxSize=1000, overflow='block'):
+        """
+        Get a pull-based stream of the events that occur from now on.
+
+        @param maxSize: the C{int} maximum number of events the stream will
+            hold for its consumer.
+        @param overflow: what to do with an event when the stream is full
+            (see L{txdlo.stream.DeferredEventStream}).
+        @return: a L{txdlo.stream.DeferredEventStream}. If this observer is
+            sealed, the stream is already closed.
+        """
+        from txdlo.stream import DeferredEventStream
+        stream = DeferredEventStream(self, maxSize, overflow)
+        if self.sealed:
+            stream.close()
+        else:
+            self._streams = self._streams + [stream]
+            self._updateExtras()
+        return stream
+
+    def _removeStream(self, stream):
+        """
+        Stop offering events to a stream.
 
-    def append(self, deferred):
+        @param stream: a L{txdlo.stream.DeferredEventStream}.
+        """
+        self._streams = [s for s in self._streams if s is not stream]
+        self._updateExtras()
+        self._maybeSeal()
+
+    def instrument(self, clock=None):
+        """
+        Start recording timing information: the time from each deferred
+        being appended to it firing, and the time spent in each call to each
+        observer function (including batch observers). Timings are kept in
+        fixed-size histograms. When instrumentation is not enabled, the cost
+        of supporting it is one attribute check per append.
+
+        Only deferreds appended after this is called have their firing
+        latency recorded. Calling this again has no effect.
+
+        @param clock: a zero-argument C{callable} returning the time (see
+            L{txdlo.instrument.Instrumentation}).
+        @return: the L{txdlo.instrument.Instrumentation}, also available as
+            C{self.instrumentation}.
+        """
+        if self.instrumentation is None:
+            from txdlo.instrument import Instrumentation
+            instrumentation = Instrumentation(clock)
+            observers = [instrumentation._wrap(observer)
+                         for observer in self._observers]
+            batchObservers = [instrumentation._wrap(observer)
+                              for observer in self._batchObservers]
+            self.instrumentation = instrumentation
+            self._observers = observers
+            self._batchObservers = batchObservers
+            self._cb = DeferredListObserver._timedCallback
+            self._eb = DeferredListObserver._timedErrback
+        return self.instrumentation
+
+    @staticmethod
+    def _timedCallback(value, dlo, index):
+        dlo.instrumentation._fired(index)
+        return DeferredListObserver._callback(value, dlo, index)
+
+    @staticmethod
+    def _timedErrback(value, dlo, index):
+        dlo.instrumentation._fired(index)
+        return DeferredListObserver._errback(value, dlo, index)
+
+    @property
+    def evictedCount(self):
+        if not self._maintainHistory:
+            raise AttributeError('evictedCount')
+        return (self.successCount + self.failureCount + self.timedOutCount -
+                len(self.history))
+
+    def _reserve(self, cancellable):
+        """
+        Allocate an index for a newly observed deferred (or future).
+
+        @param cancellable: the observed object, which must have a C{cancel}
+            method if this observer may cancel pending deferreds, or C{None}.
+        @return: the C{int} index of C{cancellable}.
+        """
+        index = self._nextIndex
+        if self._completed:
+            self._nextIndex = self._skipCompleted(index + 1)
+        else:
+            self._nextIndex = index + 1
+        self.pendingCount += 1
+        if self._maintainResults:
+            self.results._reserve(index)
+        if (self._pending is not None or self.instrumentation is not None or
+                self._unfired is not None):
+            self._track(index, cancellable)
+        return index
+
+    def _skipCompleted(self, index):
+        """
+        Find the first index, from C{index} on, that did not complete before
+        a restart.
+
+        @param index: the C{int} index to start from.
+        @return: the C{int} index.
+        """
+        completed = self._completed
+        while index in completed:
+            completed.discard(index)
+            index += 1
+        return index
+
+    def _track(self, index, cancellable):
+        """
+        Remember an observed deferred (or future) for later cancellation,
+        note when it was appended, and/or note that it is pending (for
+        deadlines), as needed.
+
+        @param index: the C{int} index of C{cancellable}.
+        @param cancellable: the observed object, or C{None} if there is
+            nothing that can be cancelled.
+        """
+        if self._pending is not None and cancellable is not None:
+            self._pending[index] = ref(cancellable)
+        if self.instrumentation is not None:
+            self.instrumentation._appended(index)
+        if self._unfired is not None:
+            self._unfired.add(index)
+
+    def append(self, deferred, deadline=None):
         """
         Monitor a deferred.
 
         @param deferred: An instance of L{twisted.internet.defer.Deferred}.
-        @return: the passed deferred.
+            An C{asyncio} future, task, or coroutine may also be given (see
+            L{txdlo.aio.appendAwaitable}). If the observer is sealed, the
+            deferred is not monitored.
+        @param deadline: if not C{None}, the number of seconds from now by
+            which the deferred must fire. If it has not, it is counted in
+            C{timedOutCount} and observers are told (see above).
+        @raise RuntimeError: if a deadline is given but the observer was not
+            created with C{deadlines=True}.
+        @return: the passed deferred (or the C{asyncio} future for an
+            awaitable).
         """
-        index = self.successCount + self.failureCount + self.pendingCount
-        callback, errback = self._makeCallbacks(index)
-        self.pendingCount += 1
-        return deferred.addCallbacks(callback, errback)
+        if deadline is not None and self._unfired is None:
+            raise RuntimeError('Cannot give a deferred a deadline unless '
+                               'deadlines is True')
+        try:
+            addCallbacks = deferred.addCallbacks
+        except AttributeError:
+            from txdlo.aio import appendAwaitable
+            index = self._nextIndex
+            future = appendAwaitable(self, deferred)
+            if deadline is not None and not self.sealed:
+                self._addDeadline(index, deadline)
+            return future
+        if self.sealed:
+            return deferred
+        index = self._reserve(deferred)
+        args = (self, index)
+        addCallbacks(self._cb, self._eb, callbackArgs=args, errbackArgs=args)
+        if deadline is not None:
+            self._addDeadline(index, deadline)
+        return deferred
+
+    def extend(self, deferreds, deadline=None):
+        """
+        Monitor several deferreds. This has the same effect as passing each
+        of them to C{append}, in order, but is faster. The deferreds are
+        given consecutive indexes, allocated in one step. Deferreds that
+        have already fired are recorded directly, without adding callbacks
+        to them (unless the observer has streams, which may need to pause
+        them).
+
+        @param deferreds: an iterable of L{twisted.internet.defer.Deferred}
+            instances. Use C{append} for C{asyncio} awaitables.
+        @param deadline: if not C{None}, the number of seconds from now by
+            which each of the deferreds must fire (see C{append}).
+        @raise RuntimeError: if a deadline is given but the observer was not
+            created with C{deadlines=True}.
+        @return: a C{range} of the indexes given to the deferreds (or, for
+            an observer made by C{fromLog} that is still skipping completed
+            indexes, a C{list} of them).
+        """
+        if deadline is not None and self._unfired is None:
+            raise RuntimeError('Cannot give a deferred a deadline unless '
+                               'deadlines is True')
+        from twisted.python.failure import Failure
+        deferreds = list(deferreds)
+        start = self._nextIndex
+        if self.sealed:
+            return range(start, start)
+        if self._completed:
+            # Indexes are not consecutive while completed ones are skipped.
+            indexes = []
+            for deferred in deferreds:
+                indexes.append(self._nextIndex)
+                self.append(deferred, deadline)
+            return indexes
+        count = len(deferreds)
+        self._nextIndex = stop = start + count
+        self.pendingCount += count
+        if self._maintainResults:
+            self.results._reserveRange(start, count)
+        track = (self._pending is not None or
+                 self.instrumentation is not None or
+                 self._unfired is not None)
+        direct = not self._streams
+        callback, errback = self._cb, self._eb
+        index = start
+        for deferred in deferreds:
+            if track:
+                self._track(index, deferred)
+            # Only use a result that is final: not while the deferred is
+            # paused or still running its callbacks (e.g., if we are called
+            # from one of them).
+            if (direct and deferred.called and not deferred.paused and
+                    not deferred._runningCallbacks and
+                    not deferred.callbacks):
+                result = deferred.result
+                if isinstance(result, Failure):
+                    errback(result, self, index)
+                else:
+                    callback(result, self, index)
+            else:
+                args = (self, index)
+                deferred.addCallbacks(callback, errback, callbackArgs=args,
+                                      errbackArgs=args)
+            index += 1
+        if deadline is not None:
+            for index in range(start, stop):
+                self._addDeadline(index, deadline)
+        return range(start, stop)
+
+    def setDeadline(self, seconds):
+        """
+        Set a deadline for the whole set: deferreds that are still pending
+        C{seconds} from now (whenever they were appended) time out, as if
+        they had been given that deadline individually. Calling this again
+        replaces the previous set deadline.
+
+        @param seconds: the C{int} or C{float} number of seconds from now, or
+            C{None} to remove the set deadline.
+        @raise RuntimeError: if the observer was not created with
+            C{deadlines=True}.
+        """
+        if self._unfired is None:
+            raise RuntimeError('Cannot set a deadline unless deadlines is '
+                               'True')
+        if seconds is None:
+            self._setDeadline = None
+        else:
+            self._setDeadline = self._getClock().seconds() + seconds
+        self._schedule()
+
+    def _getClock(self):
+        """
+        Get the clock used for deadlines.
 
-    def observe(self, observer, replayHistory=False):
+        @return: an L{twisted.internet.interfaces.IReactorTime} provider.
+        """
+        if self._clock is None:
+            from twisted.internet import reactor
+            self._clock = reactor
+        return self._clock
+
+    def _addDeadline(self, index, seconds):
+        """
+        Give a pending deferred a deadline.
+
+        @param index: the C{int} index of the deferred.
+        @param seconds: the C{int} or C{float} number of seconds from now.
+        """
+        if index in self._unfired:
+            when = self._getClock().seconds() + seconds
+            heappush(self._deadlines, (when, index))
+            timer = self._timer
+            if timer is None or when < timer.getTime():
+                self._schedule()
+
+    def _schedule(self):
+        """
+        Make sure the single timer is due at the earliest deadline, or not
+        scheduled if there are no deadlines. Per-deferred deadlines of
+        deferreds that have fired are left in the heap until they are
+        reached, rather than being searched for when the deferred fires.
+        """
+        when = self._setDeadline
+        if self._deadlines:
+            first = self._deadlines[0][0]
+            if when is None or first < when:
+                when = first
+        timer = self._timer
+        if when is None or self.sealed:
+            if timer is not None:
+                timer.cancel()
+                self._timer = None
+        else:
+            clock = self._getClock()
+            delay = max(0, when - clock.seconds())
+            if timer is None:
+                self._timer = clock.callLater(delay, self._expire)
+            elif timer.getTime() != when:
+                timer.reset(delay)
+
+    def _expire(self):
+        """
+        Time out all pending deferreds whose deadline has passed, then
+        reschedule the timer for the next deadline.
+        """
+        self._timer = None
+        now = self._getClock().seconds()
+        deadlines = self._deadlines
+        expired = []
+        while deadlines and deadlines[0][0] <= now:
+            index = heappop(deadlines)[1]
+            if index in self._unfired:
+                expired.append(index)
+        if self._setDeadline is not None and self._setDeadline <= now:
+            self._setDeadline = None
+            expired.extend(sorted(self._unfired))
+            # All pending deferreds are about to time out, so none of the
+            # remaining per-deferred deadlines matter.
+            del deadlines[:]
+        from twisted.internet.defer import TimeoutError
+        from twisted.python.failure import Failure
+        failure = Failure(TimeoutError())
+        for index in expired:
+            if index in self._unfired:
+                self._timeOut(index, failure)
+        self._schedule()
+
+    def _timeOut(self, index, failure):
+        """
+        Record that a deferred did not fire before its deadline, and tell
+        observers.
+
+        @param index: the C{int} index of the deferred.
+        @param failure: a L{twisted.python.failure.Failure} wrapping a
+            L{twisted.internet.defer.TimeoutError}.
+        """
+        self._unfired.discard(index)
+        if self.instrumentation is not None:
+            self.instrumentation._forget(index)
+        self.pendingCount -= 1
+        self.timedOutCount += 1
+        if self._maintainHistory:
+            self.history.append((index, None, failure) if self._historyValues
+                                else (index, None, None))
+        if self._maintainResults:
+            self.results._set(index, TIMED_OUT, failure)
+        for observer in self._observers:
+            observer(index, None, failure)
+        if self._batchObservers:
+            self._addToBatch((index, None, failure))
+        # There is no firing deferred for a stream to pause, so any wait it
+        # returns is ignored.
+        for stream in self._streams:
+            stream._offer((index, None, failure))
+
+    def __aiter__(self):
+        """
+        Iterate asynchronously over events (see L{txdlo.aio.EventStream}).
+
+        @return: a L{txdlo.aio.EventStream}.
+        """
+        from txdlo.aio import EventStream
+        return EventStream(self)
+
+    def observe(self, observer, replayHistory=False, snapshot=None,
+                weak=False):
         """
         Add an observer function that will be called (as below) with details
         of deferred firings.
@@ -71,14 +766,33 @@ class DeferredListObserver(object):
             each time one of the observed deferreds in the set fires. The
             arguments will be:
                 - The index of the deferred that fired.
-                - C{True} if the deferred was called, C{False} if it errored.
-                - The value passed to the callback or errback.
+                - C{True} if the deferred was called, C{False} if it errored,
+                  or C{None} if it timed out (see C{timedOutCount}).
+                - The value passed to the callback or errback (or the
+                  timeout failure).
         @param replayHistory: if C{True}, the history of deferred firings
             that occurred prior to this observer being added will be sent
             to the observer. If no history is being maintained, C{RuntimeError}
-            will be raised.
+            will be raised. Only events still in the history are replayed (see
+            C{evictedCount}).
+        @param snapshot: if not C{None}, a C{function} that will be called
+            once, immediately, with a L{Snapshot} of the current state
+            (before C{observer} is added). This lets a late observer catch up
+            in one call, rather than one call per past event as with
+            C{replayHistory}, which cannot also be given.
+        @param weak: if C{True}, only a weak reference to C{observer} is
+            kept, so observing does not keep it (or anything it refers to)
+            alive. It is removed when it is garbage collected. A bound
+            method is referred to via a C{weakref.WeakMethod}.
+        @raise ValueError: if both C{replayHistory} and C{snapshot} are
+            given.
         """
-        if replayHistory:
+        if snapshot is not None:
+            if replayHistory:
+                raise ValueError('Cannot both replay history and pass a '
+                                 'snapshot to a new observer')
+            snapshot(self.snapshot())
+        elif replayHistory:
             if self._maintainHistory:
                 for event in self.history:
                     observer(*event)
@@ -86,4 +800,349 @@ class DeferredListObserver(object):
                 raise RuntimeError('Cannot replay non-existent event history '
                                    'to new observer')
 
+        if weak:
+            observer = _WeakObserver(observer, self)
+        if self.instrumentation is not None:
+            observer = self.instrumentation._wrap(observer)
         self._observers.append(observer)
+
+    def whenCondition(self, predicate, reducer=None):
+        """
+        Get a deferred that fires as soon as a condition on the events holds
+        (which may be immediately). Once it fires, C{decide} is called, as
+        for the combinators in L{txdlo.combinators}.
+
+        @param predicate: a C{function} that will be called after each
+            event with the current value of C{reducer} (or with this
+            observer, if C{reducer} is C{None}, so it can check the counts)
+            and returns C{True} when the condition holds.
+        @param reducer: if not C{None}, an incremental fold over the events
+            from now on (see L{txdlo.reducers}), e.g., a sum of the values
+            of successful deferreds.
+        @return: a L{twisted.internet.defer.Deferred} that fires with the
+            value the predicate was last called with. If the predicate or
+            the reducer raises, the deferred fails. If the condition never
+            holds, the deferred never fires (see C{setDeadline}).
+        """
+        from txdlo.combinators import Condition
+        return Condition(self, predicate, reducer).deferred
+
+    def clearHistory(self):
+        """
+        Discard the events in the history, freeing the values they hold.
+        They are then counted in C{evictedCount}. Views of the history from
+        earlier snapshots are not affected.
+
+        @raise RuntimeError: if no history is being maintained, or the history
+            is an event log (see C{historyLog}).
+        """
+        if not self._maintainHistory:
+            raise RuntimeError('Cannot clear non-existent event history')
+        if isinstance(self.history, list):
+            self.history = []
+        elif isinstance(self.history, deque):
+            self.history = deque(maxlen=self.history.maxlen)
+        else:
+            raise RuntimeError('Cannot clear a history log')
+
+    def snapshot(self):
+        """
+        Get a summary of the current state.
+
+        @return: a L{Snapshot}.
+        """
+        return Snapshot(self)
+
+    def observeBatch(self, observer, replayHistory=False, weak=False):
+        """
+        Add an observer function that will be called with batches of events,
+        rather than once per event. Events from deferreds that fire between
+        one call of the C{batchScheduler} (see above) and the function it is
+        given being run, e.g., in the same reactor iteration, are delivered
+        to the observer in one call.
+
+        @param observer: a C{function} that will be called with a C{list} of
+            (index, success, value) tuples, in firing order. The same list
+            is passed to all batch observers, so it must not be modified.
+        @param replayHistory: if C{True}, the history of deferred firings
+            that occurred prior to this observer being added will be sent
+            to the observer immediately, as a single batch. If no history is
+            being maintained, C{RuntimeError} will be raised.
+        @param weak: if C{True}, only a weak reference to C{observer} is
+            kept (see C{observe}).
+        """
+        if replayHistory:
+            if self._maintainHistory:
+                if self.history:
+                    observer(list(self.history))
+            else:
+                raise RuntimeError('Cannot replay non-existent event history '
+                                   'to new observer')
+
+        if weak:
+            observer = _WeakObserver(observer, self)
+        if self.instrumentation is not None:
+            observer = self.instrumentation._wrap(observer)
+        self._batchObservers.append(observer)
+        self._updateExtras()
+
+    def unobserve(self, observer):
+        """
+        Remove an observer function (added by C{observe} or
+        C{observeBatch}). It is safe to call this from within an
+        observer (including to remove itself) while an event is being
+        delivered: observers already due to receive that event will still
+        receive it.
+
+        @param observer: a C{function} previously passed to C{observe} or
+            C{observeBatch}.
+        @raise ValueError: if C{observer} is not being called.
+        """
+        # Replace (rather than mutate) the list, in case we are being called
+        # while the callback or errback is iterating over it.
+        if observer in self._observers:
+            observers = list(self._observers)
+            observers.remove(observer)
+            self._observers = observers
+        else:
+            observers = list(self._batchObservers)
+            observers.remove(observer)
+            self._batchObservers = observers
+            self._updateExtras()
+        self._maybeSeal()
+
+    def _removeDead(self, observerRef):
+        """
+        Remove a weak observer whose observer function has been garbage
+        collected.
+
+        @param observerRef: the dead weak reference to the observer function.
+        """
+        # Weak observers compare equal to their weak reference (see
+        # _WeakObserver.__eq__), as do instrumentation wrappers of them.
+        self._observers = [observer for observer in self._observers
+                           if not observer == observerRef]
+        self._batchObservers = [observer for observer in self._batchObservers
+                                if not observer == observerRef]
+        self._updateExtras()
+        self._maybeSeal()
+
+    def _maybeSeal(self):
+        """
+        Seal if we are auto-sealing and there is nothing left observing us.
+        """
+        if self._autoSeal and not (self.sealed or self._observers or
+                                   self._batchObservers or self._streams):
+            self.seal()
+
+    def seal(self):
+        """
+        Stop doing any work when observed deferreds fire. All observer
+        functions are removed (including batch observers, which will not be
+        passed any batch that has not yet been delivered), all streams are
+        closed, and the counts, history and results are left as they are.
+        Deferreds appended after sealing are not monitored, and no further
+        deferreds time out.
+        """
+        self.sealed = True
+        self._extras = True
+        self._observers = []
+        self._batchObservers = []
+        streams = self._streams
+        self._streams = []
+        for stream in streams:
+            stream.close()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def close(self):
+        """
+        Seal (see C{seal}) and release everything that can refer to other
+        objects: the history (which is replaced by an empty one, after
+        closing it if it is an event log), the results, any deadlines, and
+        references to pending deferreds. The
+        counts are left as they are. Use this when finished with an observer
+        that may itself be kept alive for some time.
+        """
+        self.seal()
+        if self._maintainHistory:
+            if isinstance(self.history, (list, deque)):
+                self.clearHistory()
+            else:
+                self.history.close()
+                self.history = []
+        if self._maintainResults:
+            self.results = ResultStore()
+        if self._pending is not None:
+            self._pending.clear()
+            self._cancelled.clear()
+        if self._unfired is not None:
+            self._unfired.clear()
+            self._deadlines = []
+            self._setDeadline = None
+
+    def decide(self):
+        """
+        Indicate that the outcome that observers of this deferred list
+        observer care about has been decided. Combinators call this when
+        they fire, and observer functions may call it too.
+
+        If the observer was created with C{cancelPendingOnDecision=True},
+        all pending deferreds are cancelled.
+        """
+        if self._pending is not None:
+            self.cancelPending()
+
+    def cancelPending(self):
+        """
+        Cancel all pending deferreds that are still referenced elsewhere.
+        If they fail with a C{CancelledError} as a result, the failure is
+        swallowed and counted in C{cancelledCount} rather than as a failure,
+        and observers are not called.
+
+        @raise RuntimeError: if the observer was not created with
+            C{cancelPendingOnDecision=True}.
+        """
+        if self._pending is None:
+            raise RuntimeError('Cannot cancel pending deferreds unless '
+                               'cancelPendingOnDecision is True')
+        for index, deferredRef in list(self._pending.items()):
+            deferred = deferredRef()
+            if deferred is None:
+                del self._pending[index]
+            else:
+                self._cancelled.add(index)
+                deferred.cancel()
+
+
+class _WeakObserver(object):
+    """
+    Call an observer function via a weak reference, so the function is not
+    kept alive by being an observer.
+
+    @param observer: the observer function.
+    @param dlo: the L{DeferredListObserver} the observer is being added to,
+        which will remove it when it is garbage collected.
+    """
+
+    __slots__ = ('_ref', '_hash', '__weakref__')
+
+    def __init__(self, observer, dlo):
+        if WeakMethod is not None and isinstance(observer, MethodType):
+            self._ref = WeakMethod(observer, _makeRemover(dlo))
+        else:
+            self._ref = ref(observer, _makeRemover(dlo))
+        # We compare equal to the observer, so must hash as it does. The hash
+        # is computed now, as the observer may be gone when it is needed (a
+        # bound method referred to by a WeakMethod is gone at once).
+        try:
+            self._hash = hash(observer)
+        except TypeError:
+            self._hash = None
+
+    def __call__(self, *args):
+        observer = self._ref()
+        if observer is not None:
+            observer(*args)
+
+    def __eq__(self, other):
+        # Allow DeferredListObserver.unobserve to be passed the observer
+        # that was given to observe, and _removeDead to be passed our
+        # reference.
+        if other is self._ref:
+            return True
+        if isinstance(other, _WeakObserver):
+            return other._ref is self._ref
+        observer = self._ref()
+        return observer is not None and observer == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        if self._hash is None:
+            raise TypeError('unhashable observer')
+        return self._hash
+
+
+class HistoryView(object):
+    """
+    A read-only sequence view of the first C{length} events in a history
+    C{list}. Because a history list is only ever appended to, the view does
+    not change as later events are added to the history.
+
+    @param history: a history C{list} of (index, success, value) tuples.
+    @param length: the C{int} number of events to include.
+    """
+
+    __slots__ = ('_history', '_length')
+
+    def __init__(self, history, length):
+        self._history = history
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._history[i]
+                    for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._history[index]
+
+    def __iter__(self):
+        history = self._history
+        for index in range(self._length):
+            yield history[index]
+
+
+class Snapshot(object):
+    """
+    A summary of the state of a L{DeferredListObserver} at one moment.
+
+    @param dlo: the L{DeferredListObserver} to summarize.
+    @ivar successCount: as for L{DeferredListObserver}.
+    @ivar failureCount: as for L{DeferredListObserver}.
+    @ivar pendingCount: as for L{DeferredListObserver}.
+    @ivar cancelledCount: as for L{DeferredListObserver}.
+    @ivar timedOutCount: as for L{DeferredListObserver}.
+    @ivar evictedCount: as for L{DeferredListObserver}, or C{None} if no
+        history is being maintained.
+    @ivar history: a read-only sequence of the (index, success, value)
+        events in the history, or C{None} if no history is being maintained.
+        An unbounded history is not copied. A bounded one (see
+        C{historySize}) is. A history log is read from disk as needed.
+    @ivar results: a L{txdlo.results.ResultView} of the results (which,
+        unlike the other attributes, reflects later changes), or C{None} if
+        results are not being maintained.
+    """
+
+    __slots__ = ('successCount', 'failureCount', 'pendingCount',
+                 'cancelledCount', 'timedOutCount', 'evictedCount', 'history',
+                 'results')
+
+    def __init__(self, dlo):
+        self.successCount = dlo.successCount
+        self.failureCount = dlo.failureCount
+        self.pendingCount = dlo.pendingCount
+        self.cancelledCount = dlo.cancelledCount
+        self.timedOutCount = dlo.timedOutCount
+        if dlo._maintainHistory:
+            self.evictedCount = dlo.evictedCount
+            if isinstance(dlo.history, list):
+                self.history = HistoryView(dlo.history, len(dlo.history))
+            elif isinstance(dlo.history, deque):
+                self.history = tuple(dlo.history)
+            else:
+                self.history = dlo.history.view(len(dlo.history))
+        else:
+            self.evictedCount = self.history = None
+        if dlo._maintainResults:
+            self.results = dlo.results.view()
+        else:
+            self.results = None
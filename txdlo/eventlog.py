@@ -0,0 +1,265 @@
+"""
+An append-only, on-disk event log that can be used as the history of a
+L{txdlo.DeferredListObserver}, so that a long fan-out can be resumed after
+a restart (see L{txdlo.DeferredListObserver.fromLog}).
+"""
+
+import mmap
+import os
+import struct
+from array import array
+
+from txdlo.results import SUCCESS, FAILURE, TIMED_OUT
+
+# The file starts with a header of magic bytes and a format version.
+_MAGIC = b'TXDLOLOG'
+_VERSION = 1
+_header = struct.Struct('<8sI4x')
+
+# Each record is a fixed-size header (index, status, payload length),
+# followed by the payload (the encoded value reference).
+_record = struct.Struct('<QB3xI')
+
+_statuses = {True: SUCCESS, False: FAILURE, None: TIMED_OUT}
+_successes = {SUCCESS: True, FAILURE: False, TIMED_OUT: None}
+
+
+class EventLogError(Exception):
+    """
+    Raised when a file is not a valid event log.
+    """
+
+
+def _encodeNothing(success, value):
+    return b''
+
+
+def _decodeNothing(success, data):
+    return None
+
+
+class EventLog(object):
+    """
+    An append-only log of (index, success, value) events in a binary file.
+
+    Records are written through a buffer, which is flushed when it is full,
+    when C{flush} or C{close} is called, and (if C{flushInterval} is not
+    C{None}) at most C{flushInterval} seconds after an event is logged. Only
+    the location of each record is kept in memory, so reading the events
+    back (e.g., to replay them to a new observer) streams them from the
+    file, via C{mmap}.
+
+    Values are not stored as they are. Instead, C{encode} is used to make a
+    reference to each value (e.g., a key under which it is stored
+    elsewhere, or a small serialized value), and C{decode} turns such a
+    reference back into a value when events are read.
+
+    If the file already exists, its events are kept and new ones are
+    appended. An incomplete last record (from a crash while writing) is
+    discarded.
+
+    @param path: the C{str} path of the log file.
+    @param encode: a C{function} taking (success, value) and returning
+        C{bytes}. If C{None}, no value references are stored.
+    @param decode: a C{function} taking (success, data) and returning a
+        value. If C{None}, events read back have a value of C{None}.
+    @param bufferSize: the C{int} size, in bytes, of the write buffer.
+    @param flushInterval: the C{float} number of seconds after logging an
+        event within which the buffer is flushed, or C{None} to flush only
+        when the buffer is full or C{flush} is called.
+    @param sync: if C{True}, each flush also asks the operating system to
+        write the file to disk (with C{os.fsync}).
+    @param clock: the L{twisted.internet.interfaces.IReactorTime} provider
+        used for C{flushInterval}. If C{None}, the reactor is used.
+    @raise EventLogError: if the file exists but is not an event log.
+    """
+
+    def __init__(self, path, encode=None, decode=None, bufferSize=65536,
+                 flushInterval=1.0, sync=False, clock=None):
+        self.path = path
+        self._encode = encode or _encodeNothing
+        self._decode = decode or _decodeNothing
+        self._flushInterval = flushInterval
+        self._sync = sync
+        self._clock = clock
+        self._flushCall = None
+        # The file offset of each record.
+        self._offsets = array('Q')
+        self._size = self._scan()
+        self._file = open(path, 'ab', bufferSize)
+        if self._size == 0:
+            self._file.write(_header.pack(_MAGIC, _VERSION))
+            self._size = _header.size
+
+    def _scan(self):
+        """
+        Find the records in an existing log, discarding any incomplete last
+        record.
+
+        @raise EventLogError: if the file is not an event log.
+        @return: the C{int} size of the valid part of the file, or zero if
+            the file does not exist or is empty.
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        if size == 0:
+            return 0
+        with open(self.path, 'r+b') as fp:
+            header = fp.read(_header.size)
+            if (len(header) < _header.size or
+                    _header.unpack(header) != (_MAGIC, _VERSION)):
+                raise EventLogError('%r is not an event log' % self.path)
+            offset = _header.size
+            if size > offset:
+                data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    while offset + _record.size <= size:
+                        length = _record.unpack_from(data, offset)[2]
+                        end = offset + _record.size + length
+                        if end > size:
+                            break
+                        self._offsets.append(offset)
+                        offset = end
+                finally:
+                    data.close()
+                if offset < size:
+                    fp.truncate(offset)
+        return offset
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, event):
+        """
+        Log an event.
+
+        @param event: an (index, success, value) C{tuple}.
+        """
+        index, success, value = event
+        data = self._encode(success, value)
+        self._offsets.append(self._size)
+        self._file.write(_record.pack(index, _statuses[success], len(data)))
+        self._file.write(data)
+        self._size += _record.size + len(data)
+        if self._flushInterval is not None and self._flushCall is None:
+            if self._clock is None:
+                from twisted.internet import reactor
+                self._clock = reactor
+            self._flushCall = self._clock.callLater(self._flushInterval,
+                                                    self.flush)
+
+    def flush(self):
+        """
+        Write any buffered records to the file.
+        """
+        if self._flushCall is not None:
+            if self._flushCall.active():
+                self._flushCall.cancel()
+            self._flushCall = None
+        self._file.flush()
+        if self._sync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """
+        Flush and close the log. It cannot be written to afterwards, but can
+        still be read. Closing a closed log has no effect.
+        """
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def _read(self, start, stop):
+        """
+        Read events from the file.
+
+        @param start: the C{int} position of the first event to read.
+        @param stop: the C{int} position after the last event to read.
+        @return: a generator of (index, success, value) tuples.
+        """
+        if not self._file.closed:
+            self._file.flush()
+        if start >= stop:
+            return
+        offsets = self._offsets
+        decode = self._decode
+        with open(self.path, 'rb') as fp:
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for position in range(start, stop):
+                    offset = offsets[position]
+                    index, status, length = _record.unpack_from(data, offset)
+                    offset += _record.size
+                    success = _successes[status]
+                    yield (index, success,
+                           decode(success, data[offset:offset + length]))
+            finally:
+                data.close()
+
+    def __iter__(self):
+        return self._read(0, len(self._offsets))
+
+    def __getitem__(self, position):
+        return _getitem(self, len(self), position)
+
+    def view(self, length):
+        """
+        Get a read-only view of the first C{length} events. Because the log
+        is only ever appended to, the view does not change as later events
+        are logged.
+
+        @param length: the C{int} number of events to include.
+        @return: an L{EventLogView}.
+        """
+        return EventLogView(self, length)
+
+
+def _getitem(log, length, position):
+    """
+    Get one event, or a C{list} of events, from the first C{length} events
+    of a log.
+
+    @param log: an L{EventLog}.
+    @param length: the C{int} number of events that may be read.
+    @param position: an C{int} position or a C{slice}.
+    @raise IndexError: if C{position} is out of range.
+    @return: an (index, success, value) C{tuple}, or a C{list} of them.
+    """
+    if isinstance(position, slice):
+        start, stop, step = position.indices(length)
+        if step == 1:
+            return list(log._read(start, stop))
+        return [_getitem(log, length, p) for p in range(start, stop, step)]
+    if position < 0:
+        position += length
+    if not 0 <= position < length:
+        raise IndexError(position)
+    for event in log._read(position, position + 1):
+        return event
+
+
+class EventLogView(object):
+    """
+    A read-only sequence view of the first C{length} events in an
+    L{EventLog}. Events are read from the file as they are needed.
+
+    @param log: the L{EventLog}.
+    @param length: the C{int} number of events to include.
+    """
+
+    __slots__ = ('_log', '_length')
+
+    def __init__(self, log, length):
+        self._log = log
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return self._log._read(0, self._length)
+
+    def __getitem__(self, position):
+        return _getitem(self._log, self._length, position)
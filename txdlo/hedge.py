@@ -0,0 +1,166 @@
+"""
+Hedged requests: start one attempt at a request and launch extra replicas
+of it only if no answer arrives within a latency budget.
+"""
+
+from twisted.internet.defer import Deferred, maybeDeferred
+
+from txdlo.combinators import NoSuccessError
+from txdlo.dlo import DeferredListObserver
+from txdlo.instrument import Histogram
+
+
+def _ignore(failure):
+    pass
+
+
+class Hedger(object):
+    """
+    Make hedged requests. Each request starts with one attempt. If it has
+    not succeeded after a delay, another attempt (a replica) is started,
+    and so on, up to C{maxAttempts}. An attempt that fails causes the next
+    one to start at once. The first attempt to succeed gives the result of
+    the request, and the other attempts are cancelled.
+
+    The attempts of a request are observed by one
+    L{txdlo.DeferredListObserver}, to which each replica is appended as it
+    is started.
+
+    @param delay: the C{float} number of seconds to wait for an attempt
+        before starting another, or C{None} to use the C{percentile} of the
+        latencies of the successful attempts of earlier requests.
+    @param percentile: the C{float} percentile of the observed latencies to
+        use as the delay, if C{delay} is C{None}.
+    @param initialDelay: the C{float} delay to use when C{delay} is C{None}
+        but fewer than C{minSamples} latencies have been observed.
+    @param minSamples: the C{int} number of latencies needed before their
+        C{percentile} is used.
+    @param maxAttempts: the C{int} maximum number of attempts per request,
+        including the first.
+    @param clock: the L{twisted.internet.interfaces.IReactorTime} provider
+        used to schedule replicas and measure latencies. If C{None}, the
+        reactor is used.
+    @raise ValueError: if C{maxAttempts} is less than one.
+    @ivar latency: a L{txdlo.instrument.Histogram} of the latencies of
+        successful attempts, in seconds.
+    @ivar requestCount: the C{int} number of requests made.
+    @ivar replicaCount: the C{int} number of extra attempts started.
+    """
+
+    def __init__(self, delay=None, percentile=95, initialDelay=0.1,
+                 minSamples=20, maxAttempts=2, clock=None):
+        if maxAttempts < 1:
+            raise ValueError('maxAttempts must be at least 1')
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self._delay = delay
+        self._percentile = percentile
+        self._initialDelay = initialDelay
+        self._minSamples = minSamples
+        self._maxAttempts = maxAttempts
+        self._clock = clock
+        self.latency = Histogram()
+        self.requestCount = self.replicaCount = 0
+
+    def _currentDelay(self):
+        """
+        Get the delay before starting a replica.
+
+        @return: a C{float} number of seconds.
+        """
+        if self._delay is not None:
+            return self._delay
+        if self.latency.count < self._minSamples:
+            return self._initialDelay
+        return self.latency.percentile(self._percentile)
+
+    def request(self, factory):
+        """
+        Make a hedged request.
+
+        @param factory: a zero-argument function that starts an attempt and
+            returns a deferred (or a plain value, or raises an exception).
+            Each replica is started by calling it again, so it must be safe
+            to call more than once.
+        @return: a L{twisted.internet.defer.Deferred} that fires with the
+            result of the first attempt to succeed or, if every attempt
+            fails, fails with a L{txdlo.combinators.NoSuccessError}.
+            Cancelling it cancels all pending attempts.
+        """
+        self.requestCount += 1
+        return _HedgedRequest(self, factory).deferred
+
+
+class _HedgedRequest(object):
+    """
+    The attempts of one hedged request.
+
+    @param hedger: the L{Hedger} making the request.
+    @param factory: the function that starts an attempt.
+    @ivar deferred: the L{twisted.internet.defer.Deferred} for the result.
+    """
+
+    __slots__ = ('deferred', '_hedger', '_factory', '_dlo', '_started',
+                 '_failures', '_timer', '_decided')
+
+    def __init__(self, hedger, factory):
+        self.deferred = Deferred(self._cancel)
+        self._hedger = hedger
+        self._factory = factory
+        self._dlo = DeferredListObserver(cancelPendingOnDecision=True,
+                                         autoSeal=True)
+        self._dlo.observe(self._observer)
+        self._started = []
+        self._failures = []
+        self._timer = None
+        self._decided = False
+        self._launch()
+
+    def _launch(self):
+        """
+        Start an attempt and, if more are allowed, schedule the next one.
+        """
+        self._timer = None
+        hedger = self._hedger
+        if self._started:
+            hedger.replicaCount += 1
+        self._started.append(hedger._clock.seconds())
+        # Failures are reported in our result, so are not passed on.
+        self._dlo.append(maybeDeferred(self._factory)).addErrback(_ignore)
+        if (not self._decided and self._timer is None and
+                len(self._started) < hedger._maxAttempts):
+            self._timer = hedger._clock.callLater(hedger._currentDelay(),
+                                                  self._launch)
+
+    def _finish(self):
+        """
+        Note that the result is decided: stop starting attempts, cancel
+        those that are pending, and stop observing.
+        """
+        self._decided = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._dlo.decide()
+        self._dlo.unobserve(self._observer)
+
+    def _observer(self, index, success, value):
+        if success:
+            hedger = self._hedger
+            hedger.latency.record(hedger._clock.seconds() -
+                                  self._started[index])
+            self._finish()
+            self.deferred.callback(value)
+        else:
+            self._failures.append((index, value))
+            if len(self._started) < self._hedger._maxAttempts:
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._launch()
+            elif self._dlo.pendingCount == 0:
+                self._finish()
+                self.deferred.errback(NoSuccessError(self._failures))
+
+    def _cancel(self, deferred):
+        if not self._decided:
+            self._finish()
@@ -0,0 +1,223 @@
+"""
+Optional timing instrumentation for a L{txdlo.DeferredListObserver}. Enable
+it with the observer's C{instrument} method.
+"""
+
+import time
+from array import array
+from math import log
+from weakref import WeakKeyDictionary
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+class Histogram(object):
+    """
+    A histogram of durations (in seconds) with a fixed number of
+    logarithmically sized buckets, so its memory use does not grow with the
+    number of values recorded.
+
+    Bucket zero holds values up to C{minimum}. Each power of two above that
+    is split into C{subBuckets} buckets, giving a relative error of about
+    C{1 / subBuckets} for reported percentiles. Values beyond the last
+    bucket are counted in it.
+
+    @param minimum: the C{float} upper bound of the first bucket.
+    @param octaves: the C{int} number of powers of two above C{minimum} to
+        cover.
+    @param subBuckets: the C{int} number of buckets per power of two.
+    @ivar count: the number of values recorded.
+    @ivar total: the sum of the values recorded.
+    @ivar min: the smallest value recorded, or C{None}.
+    @ivar max: the largest value recorded, or C{None}.
+    """
+
+    def __init__(self, minimum=1e-6, octaves=32, subBuckets=4):
+        self._minimum = minimum
+        self._scale = subBuckets / log(2)
+        self._counts = array('d', [0]) * (octaves * subBuckets + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = self.max = None
+
+    def _bucket(self, value):
+        """
+        Find the bucket for a value.
+
+        @param value: a C{float}.
+        @return: the C{int} index of the bucket for C{value}.
+        """
+        if value <= self._minimum:
+            return 0
+        return min(int(log(value / self._minimum) * self._scale) + 1,
+                   len(self._counts) - 1)
+
+    def _upperBound(self, bucket):
+        """
+        Get the upper bound of a bucket.
+
+        @param bucket: the C{int} index of a bucket.
+        @return: the C{float} largest value that falls in C{bucket}.
+        """
+        return self._minimum * 2.0 ** (bucket / (self._scale * log(2)))
+
+    def record(self, value):
+        """
+        Record a value.
+
+        @param value: a C{float} duration.
+        """
+        self._counts[self._bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def mean(self):
+        """
+        Get the mean of the recorded values.
+
+        @return: the C{float} mean, or C{None} if nothing has been recorded.
+        """
+        if self.count:
+            return self.total / self.count
+
+    def percentile(self, percent):
+        """
+        Estimate a percentile of the recorded values.
+
+        @param percent: the C{float} percentile wanted, from 0 to 100.
+        @return: a C{float} value that at least C{percent} percent of the
+            recorded values are less than or equal to (to within the
+            resolution of the buckets), or C{None} if nothing has been
+            recorded.
+        """
+        if not self.count:
+            return None
+        if percent <= 0:
+            return self.min
+        rank = self.count * percent / 100.0
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            seen += count
+            if count and seen >= rank:
+                return max(self.min, min(self.max, self._upperBound(bucket)))
+        return self.max
+
+    def buckets(self):
+        """
+        Get the non-empty buckets.
+
+        @return: a C{list} of (upper bound, count) tuples, in increasing
+            order of upper bound.
+        """
+        return [(self._upperBound(bucket), int(count))
+                for bucket, count in enumerate(self._counts) if count]
+
+
+class _TimedObserver(object):
+    """
+    Wrap an observer function to record how long each call of it takes.
+
+    @param observer: the observer function to wrap.
+    @param histogram: the L{Histogram} to record call durations in.
+    @param clock: a zero-argument C{callable} returning the time.
+    @ivar histogram: the L{Histogram} of call durations.
+    """
+
+    __slots__ = ('observer', 'histogram', '_clock')
+
+    def __init__(self, observer, histogram, clock):
+        self.observer = observer
+        self.histogram = histogram
+        self._clock = clock
+
+    def __call__(self, *args):
+        start = self._clock()
+        try:
+            self.observer(*args)
+        finally:
+            self.histogram.record(self._clock() - start)
+
+    def __eq__(self, other):
+        # Allow DeferredListObserver.unobserve to be passed the observer
+        # that was given to observe.
+        if isinstance(other, _TimedObserver):
+            other = other.observer
+        return self.observer == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+
+class Instrumentation(object):
+    """
+    Timing information for a L{txdlo.DeferredListObserver}.
+
+    @param clock: a zero-argument C{callable} returning the time in seconds.
+        If C{None}, C{time.perf_counter} is used (or C{time.time} if that is
+        not available).
+    @ivar fireLatency: a L{Histogram} of the time between each deferred
+        being appended and it firing.
+    @ivar observerTimes: a C{weakref.WeakKeyDictionary} mapping each
+        observer function to a L{Histogram} of the time spent in calls to
+        it. The histogram is held by the wrapper that times the observer, so
+        an observer's entry goes away once it is no longer observing (and
+        nothing else refers to it). Observers that cannot be hashed or
+        weakly referred to are timed, but are not included.
+    """
+
+    def __init__(self, clock=None):
+        self._clock = clock or _clock
+        self._started = {}
+        self.fireLatency = Histogram()
+        self.observerTimes = WeakKeyDictionary()
+
+    def _appended(self, index):
+        """
+        Note that a deferred has been appended.
+
+        @param index: the C{int} index of the deferred.
+        """
+        self._started[index] = self._clock()
+
+    def _fired(self, index):
+        """
+        Note that a deferred has fired.
+
+        @param index: the C{int} index of the deferred.
+        """
+        started = self._started.pop(index, None)
+        if started is not None:
+            self.fireLatency.record(self._clock() - started)
+
+    def _forget(self, index):
+        """
+        Note that a deferred timed out, so its firing latency will not be
+        recorded.
+
+        @param index: the C{int} index of the deferred.
+        """
+        self._started.pop(index, None)
+
+    def _wrap(self, observer):
+        """
+        Wrap an observer function so calls to it are timed.
+
+        @param observer: an observer function.
+        @return: a C{callable} to use in place of C{observer}.
+        """
+        if isinstance(observer, _TimedObserver):
+            return observer
+        try:
+            histogram = self.observerTimes.get(observer)
+            if histogram is None:
+                histogram = self.observerTimes[observer] = Histogram()
+        except TypeError:
+            # The observer is unhashable or cannot be weakly referred to.
+            histogram = Histogram()
+        return _TimedObserver(observer, histogram, self._clock)
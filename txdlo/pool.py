@@ -0,0 +1,91 @@
+from twisted.internet.defer import Deferred, maybeDeferred, succeed
+
+from txdlo.dlo import DeferredListObserver
+
+
+def _ignore(failure):
+    pass
+
+
+class BoundedPool(object):
+    """
+    Run deferred-returning functions, keeping at most C{concurrency} of
+    their deferreds pending at once. Functions are taken lazily from
+    C{factories} as earlier deferreds fire, so a very long (or infinite)
+    iterable of work can be processed in constant memory.
+
+    The deferreds are observed by C{dlo}, so observers can be added to it to
+    see the results. A deferred's index is the order in which its function
+    was called.
+
+    @param factories: an iterable of zero-argument functions that return a
+        deferred (or a plain value, or raise an exception).
+    @param concurrency: the C{int} maximum number of pending deferreds.
+    @param dlo: the L{txdlo.DeferredListObserver} to use. If C{None}, a new
+        one (with no history) is made. Once it is sealed, no more functions
+        are called.
+    @param consumeErrors: if C{True}, failures are not passed on down the
+        callback chains of the deferreds (so they are not logged as
+        unhandled errors). Observers still see them.
+    @raise ValueError: if C{concurrency} is less than one.
+    @ivar dlo: the L{txdlo.DeferredListObserver} observing the deferreds.
+    """
+
+    def __init__(self, factories, concurrency, dlo=None,
+                 consumeErrors=False):
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self._factories = iter(factories)
+        self._concurrency = concurrency
+        self._consumeErrors = consumeErrors
+        self._exhausted = False
+        self._filling = False
+        self._notify = []
+        self.dlo = DeferredListObserver() if dlo is None else dlo
+        self.dlo.observe(self._observer)
+        self._fill()
+
+    def _observer(self, index, success, value):
+        self._fill()
+
+    def _fill(self):
+        """
+        Call functions until C{concurrency} deferreds are pending or there
+        are no more functions. Nothing is called once C{dlo} is sealed, as
+        it no longer counts the deferreds appended to it.
+        """
+        if self._filling:
+            # A deferred fired synchronously while we were filling. The loop
+            # below will continue.
+            return
+        self._filling = True
+        dlo = self.dlo
+        try:
+            while (not self._exhausted and not dlo.sealed and
+                   dlo.pendingCount < self._concurrency):
+                try:
+                    factory = next(self._factories)
+                except StopIteration:
+                    self._exhausted = True
+                else:
+                    deferred = dlo.append(maybeDeferred(factory))
+                    if self._consumeErrors:
+                        deferred.addErrback(_ignore)
+        finally:
+            self._filling = False
+
+        if self._exhausted and dlo.pendingCount == 0:
+            notify, self._notify = self._notify, []
+            for deferred in notify:
+                deferred.callback(None)
+
+    def notifyWhenEmpty(self):
+        """
+        Return a deferred that will be called (with C{None}) when all the
+        functions have been called and all their deferreds have fired.
+        """
+        if self._exhausted and self.dlo.pendingCount == 0:
+            return succeed(None)
+        deferred = Deferred()
+        self._notify.append(deferred)
+        return deferred
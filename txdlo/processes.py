@@ -0,0 +1,170 @@
+"""
+Run CPU-bound functions in other processes, observing their results with a
+L{txdlo.DeferredListObserver}.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+from twisted.internet.defer import Deferred
+from twisted.python.failure import Failure
+
+from txdlo.dlo import DeferredListObserver
+
+
+def _runChunk(calls):
+    """
+    Run a chunk of function calls (in a worker process).
+
+    @param calls: a C{list} of (function, args, kwargs) tuples.
+    @return: a C{list} of (success, value) tuples, where C{value} is the
+        result of the call or the exception it raised.
+    """
+    results = []
+    for function, args, kwargs in calls:
+        try:
+            results.append((True, function(*args, **kwargs)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+
+class ProcessFanOut(object):
+    """
+    Submit function calls to a C{concurrent.futures} executor (by default a
+    C{ProcessPoolExecutor}, so CPU-bound work is not limited by the GIL),
+    and get a deferred for each call's result. The deferreds are added to
+    C{dlo}, so its observers (and any combinators) see the results.
+
+    Calls are sent to the executor in chunks of up to C{chunkSize}, so the
+    cost of sending work to (and results back from) a worker process is
+    shared by the calls in a chunk. A chunk is sent when it is full, or in
+    the next reactor iteration after its first call was submitted. The
+    results of a chunk are passed back to the reactor thread with a single
+    C{callFromThread}.
+
+    Functions, arguments and results must be picklable for a process
+    executor.
+
+    @param dlo: the L{txdlo.DeferredListObserver} to add deferreds to. If
+        C{None}, a new one is made.
+    @param executor: a C{concurrent.futures.Executor}. If C{None}, a
+        C{ProcessPoolExecutor} with C{maxWorkers} workers is made (and is
+        shut down by C{shutdown}).
+    @param maxWorkers: the C{int} number of worker processes for a new
+        executor, or C{None} to use the number of CPUs.
+    @param chunkSize: the C{int} maximum number of calls per chunk.
+    @param reactor: the reactor to use. If C{None}, the global reactor is
+        used.
+    @raise ValueError: if C{chunkSize} is less than one.
+    @ivar dlo: the L{txdlo.DeferredListObserver} observing the deferreds.
+    """
+
+    def __init__(self, dlo=None, executor=None, maxWorkers=None,
+                 chunkSize=64, reactor=None):
+        if chunkSize < 1:
+            raise ValueError('chunkSize must be at least 1')
+        if reactor is None:
+            from twisted.internet import reactor
+        self.dlo = DeferredListObserver() if dlo is None else dlo
+        self._ownExecutor = executor is None
+        if executor is None:
+            executor = ProcessPoolExecutor(maxWorkers)
+        self._executor = executor
+        self._chunkSize = chunkSize
+        self._reactor = reactor
+        self._calls = []
+        self._deferreds = []
+        self._flushCall = None
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Call a function in the executor.
+
+        @param function: the C{callable} to call.
+        @param args: positional arguments for C{function}.
+        @param kwargs: keyword arguments for C{function}.
+        @return: a L{twisted.internet.defer.Deferred} (already added to
+            C{dlo}) that fires with the result of the call, or fails with
+            the exception it raised.
+        """
+        deferred = Deferred()
+        self._calls.append((function, args, kwargs))
+        self._deferreds.append(deferred)
+        self.dlo.append(deferred)
+        if len(self._calls) >= self._chunkSize:
+            self.flush()
+        elif self._flushCall is None:
+            self._flushCall = self._reactor.callLater(0, self.flush)
+        return deferred
+
+    def map(self, function, iterable):
+        """
+        Call a function on each item of an iterable, in the executor.
+
+        @param function: a one-argument C{callable}.
+        @param iterable: the arguments to call C{function} with.
+        @return: a C{list} of deferreds, as for C{submit}.
+        """
+        return [self.submit(function, item) for item in iterable]
+
+    def flush(self):
+        """
+        Send the calls that have not yet been sent to the executor.
+        """
+        if self._flushCall is not None:
+            if self._flushCall.active():
+                self._flushCall.cancel()
+            self._flushCall = None
+        if not self._calls:
+            return
+        calls, self._calls = self._calls, []
+        deferreds, self._deferreds = self._deferreds, []
+        try:
+            future = self._executor.submit(_runChunk, calls)
+        except Exception:
+            self._deliverFailure(deferreds, Failure())
+        else:
+            future.add_done_callback(
+                lambda future: self._reactor.callFromThread(
+                    self._deliver, deferreds, future))
+
+    def _deliver(self, deferreds, future):
+        """
+        Fire the deferreds for a chunk of calls (in the reactor thread).
+
+        @param deferreds: the C{list} of deferreds for the chunk.
+        @param future: the completed C{concurrent.futures.Future} for the
+            chunk.
+        """
+        exception = future.exception()
+        if exception is not None:
+            self._deliverFailure(deferreds, Failure(exception))
+            return
+        for deferred, (success, value) in zip(deferreds, future.result()):
+            if not deferred.called:
+                if success:
+                    deferred.callback(value)
+                else:
+                    deferred.errback(Failure(value))
+
+    def _deliverFailure(self, deferreds, failure):
+        """
+        Fail all the deferreds for a chunk that could not be run.
+
+        @param deferreds: the C{list} of deferreds for the chunk.
+        @param failure: the L{twisted.python.failure.Failure}.
+        """
+        for deferred in deferreds:
+            if not deferred.called:
+                deferred.errback(failure)
+
+    def shutdown(self, wait=True):
+        """
+        Send any unsent calls and, if the executor was made by this
+        instance, shut it down.
+
+        @param wait: passed to the executor's C{shutdown} method.
+        """
+        self.flush()
+        if self._ownExecutor:
+            self._executor.shutdown(wait)
@@ -0,0 +1,155 @@
+"""
+Incremental folds over the events of a L{txdlo.DeferredListObserver}, for
+use with L{txdlo.DeferredListObserver.whenCondition}.
+
+A reducer is called, like an observer function, with (index, success,
+value) for each event, and keeps its aggregate in its C{value} attribute.
+Each event is folded in with constant work (or O(log k) for L{TopK}), so
+the aggregate never needs to be rebuilt from the history. Except for
+L{Count}, reducers only fold in the values of successful events.
+"""
+
+from heapq import heappush, heapreplace
+
+
+class Count(object):
+    """
+    Count events of the given kinds.
+
+    @param successes: if C{True}, count successes.
+    @param failures: if C{True}, count failures.
+    @param timeouts: if C{True}, count time outs (see
+        L{txdlo.DeferredListObserver.timedOutCount}).
+    @ivar value: the C{int} count.
+    """
+
+    __slots__ = ('_successes', '_failures', '_timeouts', 'value')
+
+    def __init__(self, successes=True, failures=False, timeouts=False):
+        self._successes = successes
+        self._failures = failures
+        self._timeouts = timeouts
+        self.value = 0
+
+    def __call__(self, index, success, value):
+        if success:
+            if self._successes:
+                self.value += 1
+        elif success is None:
+            if self._timeouts:
+                self.value += 1
+        elif self._failures:
+            self.value += 1
+
+
+class Sum(object):
+    """
+    Sum the values of successful events.
+
+    @param key: a C{function} to get the number to add from a value, or
+        C{None} to add the value itself.
+    @param start: the initial sum.
+    @ivar value: the sum.
+    """
+
+    __slots__ = ('_key', 'value')
+
+    def __init__(self, key=None, start=0):
+        self._key = key
+        self.value = start
+
+    def __call__(self, index, success, value):
+        if success:
+            self.value += value if self._key is None else self._key(value)
+
+
+class Min(object):
+    """
+    Track the smallest value of the successful events.
+
+    @param key: a C{function} to get the quantity to compare from a value,
+        or C{None} to compare the values themselves.
+    @ivar value: the smallest value (not its key), or C{None} if there have
+        been no successes.
+    @ivar index: the C{int} index of the deferred with the smallest value,
+        or C{None}.
+    """
+
+    __slots__ = ('_key', '_best', 'value', 'index')
+
+    def __init__(self, key=None):
+        self._key = key
+        self._best = self.value = self.index = None
+
+    def _better(self, candidate, best):
+        return candidate < best
+
+    def __call__(self, index, success, value):
+        if success:
+            candidate = value if self._key is None else self._key(value)
+            if self.index is None or self._better(candidate, self._best):
+                self._best = candidate
+                self.value = value
+                self.index = index
+
+
+class Max(Min):
+    """
+    Track the largest value of the successful events.
+
+    @param key: a C{function} to get the quantity to compare from a value,
+        or C{None} to compare the values themselves.
+    @ivar value: the largest value (not its key), or C{None} if there have
+        been no successes.
+    @ivar index: the C{int} index of the deferred with the largest value,
+        or C{None}.
+    """
+
+    __slots__ = ()
+
+    def _better(self, candidate, best):
+        return candidate > best
+
+
+class TopK(object):
+    """
+    Track the C{k} largest values of the successful events, using a heap of
+    size at most C{k}.
+
+    @param k: the C{int} number of values to keep.
+    @param key: a C{function} to get the quantity to compare from a value,
+        or C{None} to compare the values themselves.
+    @raise ValueError: if C{k} is less than one.
+    """
+
+    __slots__ = ('_k', '_key', '_heap')
+
+    def __init__(self, k, key=None):
+        if k < 1:
+            raise ValueError('k must be at least 1')
+        self._k = k
+        self._key = key
+        # A min-heap of (key, -index, value) tuples. The negated index
+        # breaks ties in favour of earlier events, so values are never
+        # compared.
+        self._heap = []
+
+    def __call__(self, index, success, value):
+        if success:
+            item = (value if self._key is None else self._key(value), -index,
+                    value)
+            if len(self._heap) < self._k:
+                heappush(self._heap, item)
+            elif item[:2] > self._heap[0][:2]:
+                heapreplace(self._heap, item)
+
+    @property
+    def value(self):
+        """
+        The kept values, largest first.
+
+        @return: a C{list} of (index, value) tuples.
+        """
+        return [(-negatedIndex, value)
+                for _, negatedIndex, value in sorted(self._heap,
+                                                     reverse=True)]
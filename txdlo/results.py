@@ -0,0 +1,166 @@
+from array import array
+
+# The status codes held in a ResultStore's status vector.
+PENDING = 0
+SUCCESS = 1
+FAILURE = 2
+CANCELLED = 3
+TIMED_OUT = 4
+
+
+class ResultStore(object):
+    """
+    Hold the results of a set of observed deferreds, addressed by the index
+    of each deferred (i.e., the order in which it was added to its
+    L{txdlo.DeferredListObserver}).
+
+    Values are kept in a C{list} and the status of each deferred (pending,
+    succeeded, failed, cancelled, or timed out) in a compact C{array} of
+    signed chars, so recording a result is constant work and no per-event
+    tuples are stored.
+
+    @param sizeHint: the C{int} number of deferreds expected. Storage for
+        this many results is allocated up front. The store will grow beyond
+        this if needed.
+    """
+
+    __slots__ = ('_values', '_status', '_size')
+
+    def __init__(self, sizeHint=0):
+        self._values = [None] * sizeHint
+        self._status = array('b', [PENDING]) * sizeHint
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, index):
+        """
+        Make room for the result of the deferred with index C{index}.
+
+        @param index: the C{int} index of a newly added deferred.
+        """
+        if index >= len(self._values):
+            self._values.append(None)
+            self._status.append(PENDING)
+        if index >= self._size:
+            self._size = index + 1
+
+    def _reserveRange(self, start, count):
+        """
+        Make room for the results of C{count} deferreds with consecutive
+        indexes.
+
+        @param start: the C{int} index of the first of the deferreds.
+        @param count: the C{int} number of deferreds.
+        """
+        missing = start + count - len(self._values)
+        if missing > 0:
+            self._values.extend([None] * missing)
+            self._status.extend(array('b', [PENDING]) * missing)
+        self._size = start + count
+
+    def _set(self, index, status, value):
+        """
+        Record the result of a deferred.
+
+        @param index: the C{int} index of the deferred.
+        @param status: one of C{SUCCESS}, C{FAILURE}, C{CANCELLED}, or
+            C{TIMED_OUT}.
+        @param value: the value the deferred fired with.
+        """
+        self._status[index] = status
+        self._values[index] = value
+
+    def _releaseValues(self, start, stop):
+        """
+        Discard the values of fired deferreds, keeping their statuses. Their
+        results are then reported with a value of C{None}.
+
+        @param start: the C{int} index of the first deferred.
+        @param stop: the C{int} index after the last deferred.
+        """
+        self._values[start:stop] = [None] * (stop - start)
+
+    def statusAt(self, index):
+        """
+        Get the status of a deferred.
+
+        @param index: the C{int} index of a deferred.
+        @raise IndexError: if C{index} is out of range.
+        @return: one of C{PENDING}, C{SUCCESS}, C{FAILURE}, C{CANCELLED}, or
+            C{TIMED_OUT}.
+        """
+        if index >= self._size:
+            raise IndexError(index)
+        return self._status[index]
+
+    def resultAt(self, index):
+        """
+        Get the result of a deferred.
+
+        @param index: the C{int} index of a deferred.
+        @raise IndexError: if C{index} is out of range.
+        @return: a (success, value) C{tuple} if the deferred has fired, else
+            C{None} (i.e., if it is pending or was cancelled). If it timed
+            out, C{success} is C{None}.
+        """
+        status = self.statusAt(index)
+        if status == PENDING or status == CANCELLED:
+            return None
+        if status == TIMED_OUT:
+            return (None, self._values[index])
+        return (status == SUCCESS, self._values[index])
+
+    def view(self):
+        """
+        Get an ordered, read-only view of the results. No results are
+        copied.
+
+        @return: a L{ResultView}.
+        """
+        return ResultView(self)
+
+
+class ResultView(object):
+    """
+    A read-only sequence of (success, value) tuples, in deferred index
+    order, backed by a L{ResultStore}. The view reflects later changes to
+    the store. Pending and cancelled deferreds appear as C{None}.
+
+    @param store: the L{ResultStore} to view.
+    """
+
+    __slots__ = ('_store',)
+
+    def __init__(self, store):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError(index)
+        return self._store.resultAt(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._store.resultAt(index)
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        return 'ResultView(%r)' % (list(self),)
@@ -0,0 +1,188 @@
+"""
+Spread a very large set of observed deferreds over several
+L{txdlo.DeferredListObserver}s.
+"""
+
+from txdlo.dlo import DeferredListObserver
+
+
+class ShardedDeferredListObserver(object):
+    """
+    Observe a set of deferreds by spreading them (round-robin) over C{shards}
+    child L{txdlo.DeferredListObserver}s. Each child keeps its own counts
+    (and history and results, if asked for), and the counts here are the
+    totals for all children. The success and failure counts are kept up to
+    date incrementally as events occur; the others are summed when read.
+
+    Observers added here are called with the same (index, success, value)
+    arguments as those of a L{txdlo.DeferredListObserver}, where the index
+    is the order in which the deferred was added here. The combinators in
+    L{txdlo.combinators} can be used with a sharded observer, and decide
+    from its merged counts.
+
+    @param shards: the C{int} number of child observers.
+    @param releaseCompletedShards: if C{True}, whenever a child observer
+        has no pending deferreds, its history (if any) is discarded, and the
+        values in its results (if any) are released (their statuses are
+        kept, and their values become C{None}), freeing the memory they
+        used. Discarded events are counted in the child's C{evictedCount}.
+        Note that this also happens if a child briefly has nothing pending
+        while more deferreds are still being added, so a child's history
+        then only holds the events since it last had nothing pending.
+    @param kwargs: keyword arguments for each child
+        L{txdlo.DeferredListObserver}.
+    @raise ValueError: if C{shards} is less than one.
+    @ivar shards: the C{list} of child observers.
+    @ivar successCount: the total C{successCount} of the children.
+    @ivar failureCount: the total C{failureCount} of the children.
+    @ivar pendingCount: the total C{pendingCount} of the children.
+    @ivar timedOutCount: the total C{timedOutCount} of the children.
+    """
+
+    def __init__(self, shards=8, releaseCompletedShards=False, **kwargs):
+        if shards < 1:
+            raise ValueError('shards must be at least 1')
+        self._releaseCompletedShards = releaseCompletedShards
+        self._nextIndex = 0
+        self.successCount = self.failureCount = 0
+        self._observers = []
+        # For each child, the number of its results whose values have been
+        # released.
+        self._released = [0] * shards
+        self.shards = []
+        for shard in range(shards):
+            child = DeferredListObserver(**kwargs)
+            child.observe(self._makeShardObserver(child, shard, shards))
+            self.shards.append(child)
+
+    def _makeShardObserver(self, child, shard, shardCount):
+        """
+        Make an observer for a child, which updates our counts and passes
+        events on to our observers with their index converted.
+
+        @param child: the child L{txdlo.DeferredListObserver}.
+        @param shard: the C{int} number of the child.
+        @param shardCount: the C{int} number of children.
+        @return: an observer function.
+        """
+        def observer(index, success, value):
+            if success:
+                self.successCount += 1
+            elif success is not None:
+                # A success of None is a timeout, counted by the child.
+                self.failureCount += 1
+            if self._releaseCompletedShards and child.pendingCount == 0:
+                if child._maintainHistory:
+                    child.clearHistory()
+                if child._maintainResults:
+                    # Everything up to the end of the results has fired.
+                    stop = len(child.results)
+                    child.results._releaseValues(self._released[shard], stop)
+                    self._released[shard] = stop
+            index = index * shardCount + shard
+            for observer in self._observers:
+                observer(index, success, value)
+
+        return observer
+
+    @property
+    def pendingCount(self):
+        # Children do not call observers for deferreds they cancel (see
+        # decide), so this cannot be kept up to date from their events.
+        return sum(child.pendingCount for child in self.shards)
+
+    @property
+    def cancelledCount(self):
+        return sum(child.cancelledCount for child in self.shards)
+
+    @property
+    def timedOutCount(self):
+        return sum(child.timedOutCount for child in self.shards)
+
+    def append(self, deferred, deadline=None):
+        """
+        Monitor a deferred, with the next child observer.
+
+        @param deferred: An instance of L{twisted.internet.defer.Deferred}.
+        @param deadline: if not C{None}, the number of seconds from now by
+            which the deferred must fire (see
+            L{txdlo.DeferredListObserver.append}).
+        @return: the passed deferred.
+        """
+        index = self._nextIndex
+        self._nextIndex = index + 1
+        child = self.shards[index % len(self.shards)]
+        return child.append(deferred, deadline)
+
+    def extend(self, deferreds, deadline=None):
+        """
+        Monitor several deferreds.
+
+        @param deferreds: an iterable of deferreds.
+        @param deadline: if not C{None}, the number of seconds from now by
+            which each deferred must fire.
+        @return: a C{range} of the indexes given to the deferreds.
+        """
+        start = self._nextIndex
+        for deferred in deferreds:
+            self.append(deferred, deadline)
+        return range(start, self._nextIndex)
+
+    def observe(self, observer):
+        """
+        Add an observer function (see L{txdlo.DeferredListObserver.observe}).
+        History cannot be replayed to it, but the history of each child is
+        available in C{shards}.
+
+        @param observer: a C{function} that will be called with (index,
+            success, value) for each event.
+        """
+        self._observers.append(observer)
+
+    def unobserve(self, observer):
+        """
+        Remove an observer function.
+
+        @param observer: a C{function} previously passed to C{observe}.
+        @raise ValueError: if C{observer} is not being called.
+        """
+        observers = list(self._observers)
+        observers.remove(observer)
+        self._observers = observers
+
+    def setDeadline(self, seconds):
+        """
+        Set a deadline for the whole set, in all children (see
+        L{txdlo.DeferredListObserver.setDeadline}). Each child has its own
+        timer.
+
+        @param seconds: the C{int} or C{float} number of seconds from now, or
+            C{None} to remove the set deadline.
+        """
+        for child in self.shards:
+            child.setDeadline(seconds)
+
+    def decide(self):
+        """
+        Pass on a decision to all children (see
+        L{txdlo.DeferredListObserver.decide}).
+        """
+        for child in self.shards:
+            child.decide()
+
+    def seal(self):
+        """
+        Seal all children (see L{txdlo.DeferredListObserver.seal}).
+        """
+        self._observers = []
+        for child in self.shards:
+            child.seal()
+
+    def shardSummaries(self):
+        """
+        Get a summary of each child.
+
+        @return: a C{list} of L{txdlo.dlo.Snapshot}s, one per child, in shard
+            order.
+        """
+        return [child.snapshot() for child in self.shards]
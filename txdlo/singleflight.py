@@ -0,0 +1,147 @@
+"""
+Coalesce concurrent requests for the same key into one call, optionally
+caching results.
+"""
+
+from collections import OrderedDict
+
+from twisted.internet.defer import Deferred, maybeDeferred, succeed
+
+from txdlo.dlo import DeferredListObserver
+
+
+def _ignore(failure):
+    pass
+
+
+class SingleFlight(object):
+    """
+    Make at most one call at a time for each key. The first C{get} for a
+    key calls its factory. Later calls for the same key, made before the
+    resulting deferred fires, do not call their factory but are given the
+    same result.
+
+    Completed successful results can also be kept in a bounded cache, with
+    the least recently used result discarded when it is full, and results
+    expiring C{ttl} seconds after they arrived.
+
+    The deferreds returned by the factories are all observed by C{dlo}, so
+    observers can be added to it to see every backend result. A deferred's
+    index is the order in which its factory was called.
+
+    @param cacheSize: the C{int} maximum number of results to cache. If
+        zero, the default, nothing is cached.
+    @param ttl: the C{float} number of seconds a cached result can be used
+        for, or C{None} if cached results do not expire.
+    @param clock: the L{twisted.internet.interfaces.IReactorTime} provider
+        used to expire cached results. If C{None}, the reactor is used
+        (only if C{ttl} is not C{None}).
+    @ivar dlo: the L{txdlo.DeferredListObserver} observing the factories'
+        deferreds.
+    @ivar hits: the C{int} number of calls to C{get} answered from the
+        cache.
+    @ivar coalesced: the C{int} number of calls to C{get} that were given
+        the result of a call already in flight.
+    @ivar misses: the C{int} number of calls to C{get} that called their
+        factory.
+    """
+
+    def __init__(self, cacheSize=0, ttl=None, clock=None):
+        if ttl is not None and clock is None:
+            from twisted.internet import reactor as clock
+        self._cacheSize = cacheSize
+        self._ttl = ttl
+        self._clock = clock
+        # key -> (expiry time, value), in least to most recently used order.
+        self._cache = OrderedDict()
+        # key -> list of waiting deferreds, for calls in flight.
+        self._waiting = {}
+        # deferred index -> key, and key -> deferred, for calls in flight.
+        self._keys = {}
+        self._calls = {}
+        self._nextIndex = 0
+        self.hits = self.coalesced = self.misses = 0
+        self.dlo = DeferredListObserver()
+        self.dlo.observe(self._observer)
+
+    def get(self, key, factory):
+        """
+        Get the result for a key.
+
+        @param key: a hashable key.
+        @param factory: a zero-argument function that returns a deferred (or
+            a plain value, or raises an exception). It is only called if no
+            call for C{key} is in flight and there is no cached result.
+        @return: a L{twisted.internet.defer.Deferred} that fires with the
+            result. Every caller for a key is given the same value (so it
+            should not be modified). Cancelling the deferred stops it
+            waiting, and cancels the call if nothing else is waiting for it.
+        """
+        if key in self._cache:
+            expires, value = self._cache[key]
+            if expires is None or expires > self._clock.seconds():
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return succeed(value)
+            del self._cache[key]
+
+        deferred = Deferred(lambda d: self._cancel(key, d))
+        if key in self._waiting:
+            self.coalesced += 1
+            self._waiting[key].append(deferred)
+            return deferred
+
+        self.misses += 1
+        index = self._nextIndex
+        self._nextIndex = index + 1
+        self._keys[index] = key
+        self._waiting[key] = [deferred]
+        # The result is passed to the waiting deferreds, so a failure is not
+        # passed on (where it would be logged as unhandled).
+        call = self.dlo.append(maybeDeferred(factory))
+        call.addErrback(_ignore)
+        if key in self._waiting:
+            # It did not fire synchronously.
+            self._calls[key] = call
+        return deferred
+
+    def _observer(self, index, success, value):
+        key = self._keys.pop(index)
+        waiting = self._waiting.pop(key)
+        self._calls.pop(key, None)
+        if success and self._cacheSize:
+            if self._ttl is None:
+                expires = None
+            else:
+                expires = self._clock.seconds() + self._ttl
+            self._cache[key] = (expires, value)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self._cacheSize:
+                self._cache.popitem(last=False)
+        for deferred in waiting:
+            if success:
+                deferred.callback(value)
+            else:
+                deferred.errback(value)
+
+    def _cancel(self, key, deferred):
+        """
+        Stop a deferred returned by C{get} from waiting.
+
+        @param key: the key C{deferred} is waiting for.
+        @param deferred: the L{twisted.internet.defer.Deferred} being
+            cancelled.
+        """
+        waiting = self._waiting.get(key)
+        if waiting is not None and deferred in waiting:
+            waiting.remove(deferred)
+            if not waiting:
+                self._calls[key].cancel()
+
+    def forget(self, key):
+        """
+        Discard any cached result for a key.
+
+        @param key: a hashable key.
+        """
+        self._cache.pop(key, None)
@@ -0,0 +1,152 @@
+"""
+A pull-based stream of the events of a L{txdlo.DeferredListObserver}.
+
+Rather than having an observer called synchronously as each deferred
+fires, a consumer asks for events one at a time, at its own pace, via
+C{next}. Events are held in a bounded queue until the consumer asks for
+them.
+"""
+
+from collections import deque
+
+from twisted.internet.defer import Deferred, succeed, fail
+
+# Overflow policies for a full stream.
+BLOCK = 'block'
+DROP_OLDEST = 'drop-oldest'
+ERROR = 'error'
+
+
+class StreamOverflowError(Exception):
+    """
+    An event arrived when a stream using the C{ERROR} overflow policy was
+    full.
+    """
+
+
+class StreamClosedError(Exception):
+    """
+    An event was requested from a stream that has been closed and has no
+    more events.
+    """
+
+
+class DeferredEventStream(object):
+    """
+    A stream of (index, success, value) events from a
+    L{txdlo.DeferredListObserver}. Get one via the observer's C{stream}
+    method.
+
+    When an event arrives and the stream holds C{maxSize} events, the
+    C{overflow} policy decides what happens:
+
+        - C{BLOCK}: the firing deferred is paused (its callback chain does
+          not continue) until the consumer has made room for the event.
+        - C{DROP_OLDEST}: the oldest event in the stream is dropped, and
+          counted in C{droppedCount}.
+        - C{ERROR}: the stream is closed. Once the consumer has taken the
+          events already in the stream, C{next} fails with
+          L{StreamOverflowError}.
+
+    @param dlo: the L{txdlo.DeferredListObserver} whose events to stream.
+    @param maxSize: the C{int} maximum number of events to hold.
+    @param overflow: one of C{BLOCK}, C{DROP_OLDEST}, or C{ERROR}.
+    @raise ValueError: if C{maxSize} is less than one or C{overflow} is not
+        a known policy.
+    @ivar droppedCount: the number of events dropped due to overflow.
+    """
+
+    def __init__(self, dlo, maxSize, overflow):
+        if maxSize < 1:
+            raise ValueError('maxSize must be at least 1')
+        if overflow not in (BLOCK, DROP_OLDEST, ERROR):
+            raise ValueError('Unknown overflow policy %r' % (overflow,))
+        self._dlo = dlo
+        self._maxSize = maxSize
+        self._overflow = overflow
+        self._events = deque()
+        # Deferreds returned by next() that are waiting for an event.
+        self._waiting = deque()
+        # (event, deferred) pairs for producers blocked on a full stream.
+        self._blocked = deque()
+        self._error = None
+        self.closed = False
+        self.droppedCount = 0
+
+    def __len__(self):
+        return len(self._events)
+
+    def _offer(self, event):
+        """
+        Add an event to the stream.
+
+        @param event: an (index, success, value) C{tuple}.
+        @return: C{None} if the event was accepted (or dropped), else a
+            L{twisted.internet.defer.Deferred} that fires when the stream
+            accepts the event.
+        """
+        if self._waiting:
+            self._waiting.popleft().callback(event)
+        elif len(self._events) < self._maxSize:
+            self._events.append(event)
+        elif self._overflow == DROP_OLDEST:
+            self._events.popleft()
+            self._events.append(event)
+            self.droppedCount += 1
+        elif self._overflow == BLOCK:
+            deferred = Deferred()
+            self._blocked.append((event, deferred))
+            return deferred
+        else:
+            self.droppedCount += 1
+            self._error = StreamOverflowError()
+            self.close()
+
+    def _cancelNext(self, deferred):
+        """
+        Forget a deferred returned by C{next} that has been cancelled.
+
+        @param deferred: the cancelled L{twisted.internet.defer.Deferred}.
+        """
+        self._waiting.remove(deferred)
+
+    def next(self):
+        """
+        Get the next event.
+
+        @return: a L{twisted.internet.defer.Deferred} that fires with the
+            next (index, success, value) event. If the stream is closed and
+            has no more events, the deferred fails with L{StreamClosedError}
+            (or L{StreamOverflowError} if it was closed due to overflow).
+        """
+        if self._events:
+            event = self._events.popleft()
+            if self._blocked:
+                blockedEvent, deferred = self._blocked.popleft()
+                self._events.append(blockedEvent)
+                deferred.callback(None)
+            return succeed(event)
+        elif self.closed:
+            return fail(self._error or StreamClosedError())
+        else:
+            deferred = Deferred(self._cancelNext)
+            self._waiting.append(deferred)
+            return deferred
+
+    def close(self):
+        """
+        Stop receiving events. Events already in the stream can still be
+        taken with C{next}. Producers blocked on the stream are released
+        (their events are dropped) and any deferreds returned by C{next}
+        that are waiting for an event fail with L{StreamClosedError}.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self._dlo._removeStream(self)
+        while self._blocked:
+            _, deferred = self._blocked.popleft()
+            self.droppedCount += 1
+            deferred.callback(None)
+        while self._waiting:
+            self._waiting.popleft().errback(StreamClosedError())
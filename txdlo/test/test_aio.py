@@ -0,0 +1,140 @@
+from twisted.internet.defer import succeed
+from twisted.trial.unittest import TestCase
+
+from txdlo import DeferredListObserver
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+
+class TestAsyncio(TestCase):
+
+    if asyncio is None:
+        skip = 'asyncio is not available'
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def runUntilComplete(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def testFuture(self):
+        """
+        A future appended to an observer must be observed like a deferred.
+        """
+        result = []
+        dlo = DeferredListObserver(maintainHistory=True)
+        dlo.observe(lambda *event: result.append(event))
+        future = self.loop.create_future()
+        self.assertIs(future, dlo.append(future))
+        self.assertEqual(1, dlo.pendingCount)
+        future.set_result(42)
+
+        async def wait():
+            await future
+            await asyncio.sleep(0)
+
+        self.runUntilComplete(wait())
+        self.assertEqual([(0, True, 42)], result)
+        self.assertEqual([(0, True, 42)], dlo.history)
+        self.assertEqual(1, dlo.successCount)
+
+    def testCoroutines(self):
+        """
+        Coroutines appended to an observer must be run as tasks, and their
+        results and exceptions observed.
+        """
+        dlo = DeferredListObserver(maintainResults=True)
+
+        async def ok():
+            return 42
+
+        async def oops():
+            raise ValueError('oops')
+
+        async def main():
+            tasks = [dlo.append(ok()), dlo.append(oops())]
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.sleep(0)
+
+        self.runUntilComplete(main())
+        self.assertEqual(1, dlo.successCount)
+        self.assertEqual(1, dlo.failureCount)
+        self.assertEqual((True, 42), dlo.results.resultAt(0))
+        success, failure = dlo.results.resultAt(1)
+        self.assertFalse(success)
+        self.assertTrue(failure.check(ValueError))
+
+    def testCancelPending(self):
+        """
+        A future cancelled via C{cancelPending} must be counted as
+        cancelled.
+        """
+        dlo = DeferredListObserver(cancelPendingOnDecision=True)
+        future = self.loop.create_future()
+        dlo.append(future)
+        dlo.decide()
+
+        async def wait():
+            await asyncio.sleep(0)
+
+        self.runUntilComplete(wait())
+        self.assertTrue(future.cancelled())
+        self.assertEqual(1, dlo.cancelledCount)
+        self.assertEqual(0, dlo.failureCount)
+        self.assertEqual(0, dlo.pendingCount)
+
+    def testEventStream(self):
+        """
+        Iterating over an observer with C{async for} must produce its events
+        and stop when nothing is pending.
+        """
+        dlo = DeferredListObserver()
+        future = self.loop.create_future()
+        dlo.append(future)
+
+        async def main():
+            events = []
+            self.loop.call_soon(dlo.append, succeed(41))
+            self.loop.call_soon(future.set_result, 42)
+            async for event in dlo:
+                events.append(event)
+            return events
+
+        self.assertEqual([(1, True, 41), (0, True, 42)],
+                         self.runUntilComplete(main()))
+        self.assertEqual([], dlo._observers)
+
+    def testEventStreamBreak(self):
+        """
+        Breaking out of an C{async for} loop over an observer must stop the
+        stream observing it.
+        """
+        dlo = DeferredListObserver()
+        future = self.loop.create_future()
+        dlo.append(future)
+        dlo.append(succeed(1))
+
+        async def main():
+            self.loop.call_soon(future.set_result, 42)
+            async for event in dlo:
+                break
+            return event
+
+        self.assertEqual((0, True, 42), self.runUntilComplete(main()))
+        self.assertEqual([], dlo._observers)
+
+    def testEventStreamAclose(self):
+        """
+        Closing an event stream must stop it observing, and discard events
+        it has not produced.
+        """
+        dlo = DeferredListObserver()
+        stream = dlo.__aiter__()
+        dlo.append(succeed(1))
+        self.runUntilComplete(stream.aclose())
+        self.assertEqual([], dlo._observers)
+        self.assertEqual(0, len(stream._events))
@@ -0,0 +1,284 @@
+from twisted.internet.defer import Deferred, FirstError, succeed, fail
+from twisted.trial.unittest import TestCase
+
+from txdlo import DeferredListObserver
+from txdlo.combinators import (
+    gatherAll, firstOf, firstSuccess, nOf, firstSuccessElseFirstError,
+    GatherAll, FirstOf, NoSuccessError)
+
+
+class TestGatherAll(TestCase):
+
+    def testEmpty(self):
+        """
+        An empty list of deferreds must result in an empty list.
+        """
+        self.assertEqual([], self.successResultOf(gatherAll([])))
+
+    def testResultsAreInIndexOrder(self):
+        """
+        Results must be in the order of the deferreds, not firing order.
+        """
+        d1, d2 = Deferred(), Deferred()
+        deferred = gatherAll([d1, succeed(1), d2])
+        self.assertNoResult(deferred)
+        d2.callback(3)
+        d1.callback(2)
+        self.assertEqual([(True, 2), (True, 1), (True, 3)],
+                         self.successResultOf(deferred))
+
+    def testFailuresAreIncluded(self):
+        """
+        Failed deferreds must appear in the result as (False, failure).
+        """
+        f = fail(Exception('oops'))
+        results = self.successResultOf(gatherAll([f, succeed(1)]))
+        self.assertFalse(results[0][0])
+        self.assertEqual('oops', str(results[0][1].value))
+        self.assertEqual((True, 1), results[1])
+        f.addErrback(lambda value: None)
+
+    def testWithoutCountOrResults(self):
+        """
+        A L{GatherAll} with no count must fire when the observer has no
+        pending deferreds, storing results itself if the observer does not
+        maintain them.
+        """
+        dlo = DeferredListObserver()
+        combinator = GatherAll(dlo)
+        d1 = Deferred()
+        dlo.append(d1)
+        dlo.append(Deferred()).callback(5)
+        self.assertNoResult(combinator.deferred)
+        d1.callback(4)
+        self.assertEqual([(True, 4), (True, 5)],
+                         self.successResultOf(combinator.deferred))
+
+
+class TestFirstOf(TestCase):
+
+    def testEmpty(self):
+        """
+        An empty list of deferreds must result in a C{ValueError}.
+        """
+        self.assertRaises(ValueError, firstOf, [])
+
+    def testFirstSuccess(self):
+        """
+        The index and value of the first deferred to fire must be returned.
+        """
+        d1, d2 = Deferred(), Deferred()
+        deferred = firstOf([d1, d2])
+        d2.callback(3)
+        d1.callback(2)
+        self.assertEqual((1, 3), self.successResultOf(deferred))
+
+    def testFirstFailure(self):
+        """
+        If the first deferred to fire fails, a C{FirstError} must result.
+        """
+        d1, d2 = Deferred(), Deferred()
+        deferred = firstOf([d1, d2])
+        d1.errback(Exception('oops'))
+        d2.callback(3)
+        failure = self.failureResultOf(deferred, FirstError)
+        self.assertEqual(0, failure.value.index)
+        d1.addErrback(lambda value: None)
+
+
+class TestFirstSuccess(TestCase):
+
+    def testEmpty(self):
+        """
+        An empty list of deferreds must result in a C{ValueError}.
+        """
+        self.assertRaises(ValueError, firstSuccess, [])
+
+    def testFailuresAreIgnored(self):
+        """
+        Failures before the first success must be ignored.
+        """
+        d1, d2 = Deferred(), Deferred()
+        deferred = firstSuccess([d1, d2])
+        d1.errback(Exception('oops'))
+        d2.callback(3)
+        self.assertEqual((1, 3), self.successResultOf(deferred))
+        d1.addErrback(lambda value: None)
+
+    def testAllFail(self):
+        """
+        If all deferreds fail, a L{NoSuccessError} holding all the failures
+        must result.
+        """
+        d1, d2 = Deferred(), Deferred()
+        deferred = firstSuccess([d1, d2])
+        d2.errback(Exception('two'))
+        d1.errback(Exception('one'))
+        failure = self.failureResultOf(deferred, NoSuccessError)
+        self.assertEqual([1, 0],
+                         [index for index, _ in failure.value.failures])
+        d1.addErrback(lambda value: None)
+        d2.addErrback(lambda value: None)
+
+
+class TestNOf(TestCase):
+
+    def testNegativeN(self):
+        """
+        A negative C{n} must result in a C{ValueError}.
+        """
+        self.assertRaises(ValueError, nOf, [succeed(1)], -1)
+
+    def testNTooBig(self):
+        """
+        An C{n} greater than the number of deferreds must result in a
+        C{ValueError}.
+        """
+        self.assertRaises(ValueError, nOf, [succeed(1)], 2)
+
+    def testZero(self):
+        """
+        An C{n} of zero must result in an empty list.
+        """
+        self.assertEqual([], self.successResultOf(nOf([Deferred()], 0)))
+
+    def testNSuccesses(self):
+        """
+        The first C{n} successes must be returned, in firing order.
+        """
+        d1, d2, d3 = Deferred(), Deferred(), Deferred()
+        deferred = nOf([d1, d2, d3], 2)
+        d3.callback(3)
+        self.assertNoResult(deferred)
+        d1.callback(1)
+        self.assertEqual([(2, 3), (0, 1)], self.successResultOf(deferred))
+
+    def testFailure(self):
+        """
+        A failure before C{n} successes must result in a C{FirstError}.
+        """
+        d1, d2 = Deferred(), Deferred()
+        deferred = nOf([d1, d2], 2)
+        d1.callback(1)
+        d2.errback(Exception('oops'))
+        failure = self.failureResultOf(deferred, FirstError)
+        self.assertEqual(1, failure.value.index)
+        d2.addErrback(lambda value: None)
+
+
+class TestFirstSuccessElseFirstError(TestCase):
+
+    def testEmpty(self):
+        """
+        An empty list of deferreds must result in a C{ValueError}.
+        """
+        self.assertRaises(ValueError, firstSuccessElseFirstError, [])
+
+    def testSuccessAfterFailure(self):
+        """
+        A success after a failure must be returned.
+        """
+        d1, d2 = Deferred(), Deferred()
+        deferred = firstSuccessElseFirstError([d1, d2])
+        d1.errback(Exception('oops'))
+        self.assertNoResult(deferred)
+        d2.callback(3)
+        self.assertEqual((1, 3), self.successResultOf(deferred))
+        d1.addErrback(lambda value: None)
+
+    def testAllFail(self):
+        """
+        If all deferreds fail, a C{FirstError} for the first failure must
+        result.
+        """
+        d1, d2 = Deferred(), Deferred()
+        deferred = firstSuccessElseFirstError([d1, d2])
+        d2.errback(Exception('two'))
+        d1.errback(Exception('one'))
+        failure = self.failureResultOf(deferred, FirstError)
+        self.assertEqual(1, failure.value.index)
+        self.assertEqual('two', str(failure.value.subFailure.value))
+        d1.addErrback(lambda value: None)
+        d2.addErrback(lambda value: None)
+
+
+class TestEarlyDetach(TestCase):
+
+    def testDecidedCombinatorSealsObserver(self):
+        """
+        Once a combinator has decided, an auto-sealing observer it was the
+        only observer of must be sealed and ignore later firings.
+        """
+        dlo = DeferredListObserver(autoSeal=True)
+        combinator = FirstOf(dlo)
+        d1, d2 = Deferred(), Deferred()
+        dlo.append(d1)
+        dlo.append(d2)
+        d1.callback(1)
+        self.assertEqual((0, 1), self.successResultOf(combinator.deferred))
+        self.assertTrue(dlo.sealed)
+        d2.callback(2)
+        self.assertEqual(1, dlo.pendingCount)
+
+    def testCombinatorOnSharedObserverUnobserves(self):
+        """
+        A combinator attached to an existing observer must stop observing it
+        once decided, without sealing it or disturbing other observers.
+        """
+        result = []
+        dlo = DeferredListObserver()
+        combinator = FirstOf(dlo)
+        dlo.observe(lambda index, success, value: result.append(index))
+        dlo.append(succeed(1))
+        dlo.append(succeed(2))
+        self.assertEqual((0, 1), self.successResultOf(combinator.deferred))
+        self.assertEqual([0, 1], result)
+        self.assertFalse(dlo.sealed)
+        self.assertEqual(2, dlo.successCount)
+
+
+class TestCancelPendingOnDecision(TestCase):
+
+    def testLosersAreCancelled(self):
+        """
+        When C{cancelPendingOnDecision} is C{True}, the deferreds that have
+        not fired when the combinator decides must be cancelled, without
+        their C{CancelledError}s being left unhandled.
+        """
+        cancelled = []
+        d1 = Deferred()
+        d2 = Deferred(cancelled.append)
+        d3 = Deferred(cancelled.append)
+        deferred = firstOf([d1, d2, d3], cancelPendingOnDecision=True)
+        d1.callback(1)
+        self.assertEqual((0, 1), self.successResultOf(deferred))
+        self.assertEqual([d2, d3], cancelled)
+        self.assertIs(None, self.successResultOf(d2))
+        self.assertIs(None, self.successResultOf(d3))
+
+    def testLosersAreCancelledAfterEarlyDecision(self):
+        """
+        When the result is decided by a deferred that has already fired, the
+        deferreds after it in the list must still be cancelled.
+        """
+        cancelled = []
+        d2 = Deferred(cancelled.append)
+        deferred = firstOf([succeed(1), d2], cancelPendingOnDecision=True)
+        self.assertEqual((0, 1), self.successResultOf(deferred))
+        self.assertEqual([d2], cancelled)
+        self.assertIs(None, self.successResultOf(d2))
+        d3 = Deferred(cancelled.append)
+        deferred = nOf([succeed(1), d3], 1, cancelPendingOnDecision=True)
+        self.assertEqual([(0, 1)], self.successResultOf(deferred))
+        self.assertEqual([d2, d3], cancelled)
+        self.assertIs(None, self.successResultOf(d3))
+
+    def testNoCancellationByDefault(self):
+        """
+        By default, deferreds that have not fired when the combinator
+        decides must not be cancelled.
+        """
+        d1, d2 = Deferred(), Deferred()
+        firstOf([d1, d2])
+        d1.callback(1)
+        self.assertNoResult(d2)
@@ -0,0 +1,257 @@
+from twisted.internet.defer import Deferred, FirstError, TimeoutError
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+from txdlo.combinators import firstOf, gatherAll
+from txdlo.dlo import DeferredListObserver
+from txdlo.results import TIMED_OUT
+
+
+class TestDeadlines(TestCase):
+
+    def testDeadlineWithoutDeadlines(self):
+        """
+        Giving a deadline to an observer that was not created with
+        deadlines=True must raise a RuntimeError.
+        """
+        dlo = DeferredListObserver(maintainResults=True)
+        self.assertRaises(RuntimeError, dlo.append, Deferred(), 1)
+        self.assertRaises(RuntimeError, dlo.extend, [Deferred()] * 2, 1)
+        self.assertRaises(RuntimeError, dlo.setDeadline, 1)
+
+    def testDeadlineErrorLeavesObserverUnchanged(self):
+        """
+        A deferred given a deadline that cannot be set must not be
+        observed.
+        """
+        dlo = DeferredListObserver(maintainResults=True)
+        d = Deferred()
+        self.assertRaises(RuntimeError, dlo.append, d, 1)
+        self.assertRaises(RuntimeError, dlo.extend, [d, Deferred()], 1)
+        self.assertEqual(0, dlo.pendingCount)
+        self.assertEqual(0, len(dlo.results))
+        self.assertEqual([0], list(dlo.extend([d])))
+        d.callback(3)
+        self.assertEqual(1, dlo.successCount)
+        self.assertEqual(0, dlo.pendingCount)
+
+    def testTimeOut(self):
+        """
+        A deferred that has not fired by its deadline must be counted as
+        timed out (not failed), and observers must be called with a success
+        of None and a TimeoutError failure.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock,
+                                   maintainHistory=True, maintainResults=True)
+        events = []
+        dlo.observe(lambda *event: events.append(event))
+        dlo.append(Deferred(), deadline=5)
+        clock.advance(4)
+        self.assertEqual([], events)
+        clock.advance(1)
+        [(index, success, failure)] = events
+        self.assertEqual(0, index)
+        self.assertIs(None, success)
+        failure.trap(TimeoutError)
+        self.assertEqual(1, dlo.timedOutCount)
+        self.assertEqual(0, dlo.failureCount)
+        self.assertEqual(0, dlo.pendingCount)
+        self.assertEqual([(0, None, failure)], dlo.history)
+        self.assertEqual(TIMED_OUT, dlo.results.statusAt(0))
+        self.assertEqual((None, failure), dlo.results.resultAt(0))
+
+    def testFiringBeforeDeadline(self):
+        """
+        A deferred that fires before its deadline must not time out.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock)
+        d = Deferred()
+        dlo.append(d, deadline=5)
+        d.callback(None)
+        clock.advance(10)
+        self.assertEqual(1, dlo.successCount)
+        self.assertEqual(0, dlo.timedOutCount)
+
+    def testLateFiringIsIgnored(self):
+        """
+        If a deferred fires after it has timed out, that must be ignored and
+        its result must be passed down its callback chain unchanged.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock)
+        events = []
+        dlo.observe(lambda *event: events.append(event))
+        d = Deferred()
+        dlo.append(d, deadline=1)
+        clock.advance(1)
+        d.callback(3)
+        self.assertEqual(1, len(events))
+        self.assertEqual(0, dlo.successCount)
+        self.assertEqual(3, self.successResultOf(d))
+
+    def testOneTimer(self):
+        """
+        However many deferreds have deadlines, only one timer must be
+        scheduled, for the earliest deadline.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock)
+        for deadline in (7, 3, 5, 3):
+            dlo.append(Deferred(), deadline=deadline)
+        [call] = clock.getDelayedCalls()
+        self.assertEqual(3, call.getTime())
+        clock.advance(3)
+        self.assertEqual(2, dlo.timedOutCount)
+        [call] = clock.getDelayedCalls()
+        self.assertEqual(5, call.getTime())
+        clock.advance(4)
+        self.assertEqual(4, dlo.timedOutCount)
+        self.assertEqual([], clock.getDelayedCalls())
+
+    def testTimerIsCancelledWhenNothingIsLeft(self):
+        """
+        If the only deferred with a deadline fires, the timer must not be
+        left waiting forever: it wakes once, finds nothing to do, and is not
+        rescheduled.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock)
+        d = Deferred()
+        dlo.append(d, deadline=2)
+        d.callback(None)
+        clock.advance(2)
+        self.assertEqual([], clock.getDelayedCalls())
+
+    def testSetDeadline(self):
+        """
+        When the set deadline is reached, all pending deferreds must time
+        out, in index order.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock)
+        events = []
+        dlo.observe(lambda index, success, value: events.append(index))
+        deferreds = [Deferred() for _ in range(4)]
+        dlo.extend(deferreds)
+        dlo.setDeadline(10)
+        deferreds[2].callback(None)
+        dlo.append(Deferred(), deadline=20)
+        clock.advance(10)
+        self.assertEqual([2, 0, 1, 3, 4], events)
+        self.assertEqual(4, dlo.timedOutCount)
+        self.assertEqual([], clock.getDelayedCalls())
+
+    def testRemoveSetDeadline(self):
+        """
+        Passing None to setDeadline must remove the set deadline.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock)
+        dlo.append(Deferred())
+        dlo.setDeadline(10)
+        dlo.setDeadline(None)
+        self.assertEqual([], clock.getDelayedCalls())
+        clock.advance(10)
+        self.assertEqual(0, dlo.timedOutCount)
+
+    def testExtendWithDeadline(self):
+        """
+        A deadline passed to extend must apply to each pending deferred, but
+        not to those that have already fired.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock)
+        fired = Deferred()
+        fired.callback(None)
+        dlo.extend([Deferred(), fired, Deferred()], deadline=1)
+        clock.advance(1)
+        self.assertEqual(1, dlo.successCount)
+        self.assertEqual(2, dlo.timedOutCount)
+
+    def testSealCancelsTimer(self):
+        """
+        Sealing must cancel the timer.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock)
+        dlo.append(Deferred(), deadline=1)
+        dlo.seal()
+        self.assertEqual([], clock.getDelayedCalls())
+
+    def testTimedOutDeferredIsCancelledOnDecision(self):
+        """
+        A timed-out deferred must still be cancelled on a decision, and the
+        resulting CancelledError must be swallowed without being counted.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock,
+                                   cancelPendingOnDecision=True)
+        d = dlo.append(Deferred(), deadline=1)
+        clock.advance(1)
+        dlo.decide()
+        self.assertIs(None, self.successResultOf(d))
+        self.assertEqual(0, dlo.cancelledCount)
+        self.assertEqual(1, dlo.timedOutCount)
+        self.assertEqual(0, dlo.pendingCount)
+
+    def testEvictedCount(self):
+        """
+        Timed-out events must be included in the evicted count.
+        """
+        clock = Clock()
+        dlo = DeferredListObserver(deadlines=True, clock=clock,
+                                   maintainHistory=True)
+        dlo.append(Deferred(), deadline=1)
+        clock.advance(1)
+        dlo.clearHistory()
+        self.assertEqual(1, dlo.evictedCount)
+
+
+class TestCombinatorTimeouts(TestCase):
+
+    def testGatherAllTimeout(self):
+        """
+        gatherAll must fire once the timeout is reached, with timed-out
+        deferreds having a success of None.
+        """
+        clock = Clock()
+        d1 = Deferred()
+        d = gatherAll([d1, Deferred()], timeout=5, clock=clock)
+        d1.callback(3)
+        self.assertNoResult(d)
+        clock.advance(5)
+        [first, (success, failure)] = self.successResultOf(d)
+        self.assertEqual((True, 3), first)
+        self.assertIs(None, success)
+        failure.trap(TimeoutError)
+
+    def testFirstOfTimeout(self):
+        """
+        firstOf must fail with a FirstError wrapping a TimeoutError if
+        nothing fires before the timeout, and must cancel the deferreds
+        if asked to.
+        """
+        clock = Clock()
+        deferreds = [Deferred(), Deferred()]
+        d = firstOf(deferreds, cancelPendingOnDecision=True, timeout=1,
+                    clock=clock)
+        clock.advance(1)
+        error = self.failureResultOf(d, FirstError).value
+        error.subFailure.trap(TimeoutError)
+        self.assertEqual(0, error.index)
+        for deferred in deferreds:
+            self.assertIs(None, self.successResultOf(deferred))
+        self.assertEqual([], clock.getDelayedCalls())
+
+    def testNoTimeoutAfterDecision(self):
+        """
+        Once a combinator has fired, its timer must be cancelled.
+        """
+        clock = Clock()
+        d1 = Deferred()
+        d = firstOf([d1, Deferred()], timeout=1, clock=clock)
+        d1.callback(4)
+        self.assertEqual((0, 4), self.successResultOf(d))
+        self.assertEqual([], clock.getDelayedCalls())
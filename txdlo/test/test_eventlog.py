@@ -0,0 +1,197 @@
+import os
+
+from twisted.internet.defer import Deferred, succeed
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+from txdlo.dlo import DeferredListObserver
+from txdlo.eventlog import EventLog, EventLogError
+
+
+def encode(success, value):
+    if success and value is not None:
+        return str(value).encode('utf-8')
+    return b''
+
+
+def decode(success, data):
+    return data.decode('utf-8') if data else None
+
+
+class TestEventLog(TestCase):
+
+    def makeLog(self, path=None, **kwargs):
+        """
+        Make an event log that encodes values as strings and is only flushed
+        when asked to.
+
+        @param path: the C{str} path of the log, or C{None} to use a new
+            temporary file.
+        @param kwargs: other keyword arguments for L{EventLog}.
+        @return: an L{EventLog}.
+        """
+        kwargs.setdefault('flushInterval', None)
+        log = EventLog(path or self.mktemp(), encode=encode, decode=decode,
+                       **kwargs)
+        self.addCleanup(log.close)
+        return log
+
+    def testRoundTrip(self):
+        """
+        Logged events must be read back, with decoded values.
+        """
+        log = self.makeLog()
+        log.append((3, True, 'x'))
+        log.append((1, False, None))
+        log.append((0, None, None))
+        self.assertEqual(3, len(log))
+        self.assertEqual([(3, True, 'x'), (1, False, None), (0, None, None)],
+                         list(log))
+        self.assertEqual((0, None, None), log[-1])
+        self.assertEqual([(3, True, 'x'), (0, None, None)], log[::2])
+
+    def testReopen(self):
+        """
+        Events logged before a log is closed must be read back when it is
+        opened again, and new events appended after them.
+        """
+        log = self.makeLog()
+        log.append((0, True, 'a'))
+        log.close()
+        log = self.makeLog(log.path)
+        log.append((1, True, 'b'))
+        self.assertEqual([(0, True, 'a'), (1, True, 'b')], list(log))
+
+    def testIncompleteRecordIsDiscarded(self):
+        """
+        An incomplete last record must be discarded.
+        """
+        log = self.makeLog()
+        log.append((0, True, 'a'))
+        log.append((1, True, 'bcd'))
+        log.close()
+        with open(log.path, 'r+b') as fp:
+            fp.truncate(os.path.getsize(log.path) - 1)
+        log = self.makeLog(log.path)
+        self.assertEqual([(0, True, 'a')], list(log))
+        log.append((1, True, 'b'))
+        self.assertEqual([(0, True, 'a'), (1, True, 'b')], list(log))
+
+    def testNotALog(self):
+        """
+        Opening a file that is not an event log must raise EventLogError.
+        """
+        path = self.mktemp()
+        with open(path, 'wb') as fp:
+            fp.write(b'not an event log')
+        self.assertRaises(EventLogError, EventLog, path)
+
+    def testPeriodicFlush(self):
+        """
+        Buffered events must be written to the file when the flush interval
+        has passed, using one delayed call.
+        """
+        clock = Clock()
+        log = self.makeLog(flushInterval=1, clock=clock)
+        size = os.path.getsize(log.path)
+        log.append((0, True, 'a'))
+        log.append((1, True, 'b'))
+        self.assertEqual(1, len(clock.getDelayedCalls()))
+        self.assertEqual(size, os.path.getsize(log.path))
+        clock.advance(1)
+        self.assertTrue(os.path.getsize(log.path) > size)
+        self.assertEqual([], clock.getDelayedCalls())
+
+
+class TestObserverWithEventLog(TestCase):
+
+    def makeLog(self, path=None):
+        log = EventLog(path or self.mktemp(), encode=encode, decode=decode,
+                       flushInterval=None)
+        self.addCleanup(log.close)
+        return log
+
+    def testHistoryLogWithoutHistory(self):
+        """
+        Passing a history log without maintainHistory must raise a
+        ValueError, as must passing one with a history size.
+        """
+        log = self.makeLog()
+        self.assertRaises(ValueError, DeferredListObserver, historyLog=log)
+        self.assertRaises(ValueError, DeferredListObserver,
+                          maintainHistory=True, historyLog=log, historySize=3)
+
+    def testHistoryIsLogged(self):
+        """
+        Events must be written to the history log, replayed from it, and
+        visible in snapshots.
+        """
+        log = self.makeLog()
+        dlo = DeferredListObserver(maintainHistory=True, historyLog=log)
+        self.assertIs(log, dlo.history)
+        dlo.append(succeed(5))
+        snapshot = dlo.snapshot()
+        dlo.append(succeed(6))
+        events = []
+        dlo.observe(lambda *event: events.append(event), replayHistory=True)
+        self.assertEqual([(0, True, '5'), (1, True, '6')], events)
+        self.assertEqual([(0, True, '5')], list(snapshot.history))
+        self.assertEqual(0, dlo.evictedCount)
+
+    def testClearHistoryLog(self):
+        """
+        A history log must not be cleared.
+        """
+        dlo = DeferredListObserver(maintainHistory=True,
+                                   historyLog=self.makeLog())
+        self.assertRaises(RuntimeError, dlo.clearHistory)
+
+    def testClose(self):
+        """
+        Closing an observer must close its history log.
+        """
+        log = self.makeLog()
+        dlo = DeferredListObserver(maintainHistory=True, historyLog=log)
+        dlo.append(succeed(5))
+        dlo.close()
+        self.assertEqual([], dlo.history)
+        self.assertEqual([(0, True, '5')], list(EventLog(
+            log.path, decode=decode, flushInterval=None)))
+
+    def testRestart(self):
+        """
+        An observer rebuilt from a log must have the logged counts and
+        results, and must give newly appended deferreds the indexes that
+        were not completed before the restart.
+        """
+        log = self.makeLog()
+        dlo = DeferredListObserver(maintainHistory=True, historyLog=log)
+        deferreds = [Deferred() for _ in range(6)]
+        dlo.extend(deferreds)
+        deferreds[0].callback(0)
+        deferreds[2].callback(2)
+        deferreds[3].errback(Exception())
+        self.failureResultOf(deferreds[3])
+        deferreds[5].callback(5)
+        log.close()
+
+        log = self.makeLog(log.path)
+        dlo = DeferredListObserver.fromLog(log, maintainResults=True)
+        self.assertEqual((3, 1, 0), (dlo.successCount, dlo.failureCount,
+                                     dlo.pendingCount))
+        completed = set(index for index, _, _ in log)
+        events = []
+        dlo.observe(lambda *event: events.append(event))
+        remaining = [index for index in range(6) if index not in completed]
+        self.assertEqual([1, 4], remaining)
+        d1, d4 = Deferred(), Deferred()
+        dlo.append(d1)
+        self.assertEqual([4], dlo.extend([d4]))
+        dlo.append(succeed(6))
+        d4.callback(4)
+        d1.callback(1)
+        self.assertEqual([(6, True, 6), (4, True, 4), (1, True, 1)], events)
+        self.assertEqual([(True, '0'), (True, 1), (True, '2'), (False, None),
+                          (True, 4), (True, '5'), (True, 6)],
+                         list(dlo.results.view()))
+        self.assertEqual(7, len(dlo.history))
@@ -0,0 +1,125 @@
+from twisted.internet.defer import Deferred, CancelledError, fail, succeed
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+from txdlo.combinators import NoSuccessError
+from txdlo.hedge import Hedger
+
+
+class Backend(object):
+    """
+    A fake backend whose requests are answered by the test.
+    """
+
+    def __init__(self):
+        self.deferreds = []
+
+    def __call__(self):
+        deferred = Deferred()
+        self.deferreds.append(deferred)
+        return deferred
+
+
+class TestHedger(TestCase):
+
+    def testBadMaxAttempts(self):
+        """
+        Fewer than one attempt must not be allowed.
+        """
+        self.assertRaises(ValueError, Hedger, maxAttempts=0, clock=Clock())
+
+    def testFastAnswer(self):
+        """
+        If the first attempt succeeds within the delay, no replica must be
+        started.
+        """
+        clock = Clock()
+        backend = Backend()
+        hedger = Hedger(delay=1, clock=clock)
+        d = hedger.request(backend)
+        clock.advance(0.5)
+        backend.deferreds[0].callback(3)
+        self.assertEqual(3, self.successResultOf(d))
+        clock.advance(5)
+        self.assertEqual(1, len(backend.deferreds))
+        self.assertEqual(0, hedger.replicaCount)
+        self.assertEqual([], clock.getDelayedCalls())
+
+    def testReplicaWins(self):
+        """
+        If the first attempt is slow, a replica must be started after the
+        delay, and when it succeeds the first attempt must be cancelled.
+        """
+        clock = Clock()
+        backend = Backend()
+        hedger = Hedger(delay=1, maxAttempts=3, clock=clock)
+        d = hedger.request(backend)
+        clock.advance(1)
+        self.assertEqual(2, len(backend.deferreds))
+        backend.deferreds[1].callback(4)
+        self.assertEqual(4, self.successResultOf(d))
+        self.assertIs(None, self.successResultOf(backend.deferreds[0]))
+        clock.advance(5)
+        self.assertEqual(2, len(backend.deferreds))
+        self.assertEqual(1, hedger.replicaCount)
+
+    def testFailureStartsReplicaAtOnce(self):
+        """
+        If an attempt fails, the next must be started immediately.
+        """
+        clock = Clock()
+        results = [fail(Exception()), succeed(5)]
+        hedger = Hedger(delay=1, clock=clock)
+        d = hedger.request(lambda: results.pop(0))
+        self.assertEqual(5, self.successResultOf(d))
+        self.assertEqual([], clock.getDelayedCalls())
+
+    def testAllFail(self):
+        """
+        If every attempt fails, the result must be a NoSuccessError holding
+        all the failures.
+        """
+        clock = Clock()
+        backend = Backend()
+        hedger = Hedger(delay=1, clock=clock)
+        d = hedger.request(backend)
+        clock.advance(1)
+        backend.deferreds[1].errback(Exception('b'))
+        self.assertNoResult(d)
+        backend.deferreds[0].errback(Exception('a'))
+        failures = self.failureResultOf(d, NoSuccessError).value.failures
+        self.assertEqual([1, 0], [index for index, _ in failures])
+
+    def testObservedPercentileDelay(self):
+        """
+        With no fixed delay, the initial delay must be used until enough
+        latencies have been observed, and then their percentile.
+        """
+        clock = Clock()
+        hedger = Hedger(initialDelay=10, minSamples=2, clock=clock)
+        for latency in (2, 2):
+            backend = Backend()
+            d = hedger.request(backend)
+            clock.advance(latency)
+            backend.deferreds[0].callback(None)
+            self.successResultOf(d)
+        backend = Backend()
+        hedger.request(backend)
+        clock.advance(1.9)
+        self.assertEqual(1, len(backend.deferreds))
+        clock.advance(0.1)
+        self.assertEqual(2, len(backend.deferreds))
+
+    def testCancel(self):
+        """
+        Cancelling a request must cancel its pending attempts and stop
+        replicas from being started.
+        """
+        clock = Clock()
+        backend = Backend()
+        hedger = Hedger(delay=1, clock=clock)
+        d = hedger.request(backend)
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        self.assertIs(None, self.successResultOf(backend.deferreds[0]))
+        self.assertEqual([], clock.getDelayedCalls())
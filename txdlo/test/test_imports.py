@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+
+from twisted.trial.unittest import TestCase
+
+import txdlo
+
+# The most time, in seconds, that importing txdlo and then
+# txdlo.DeferredListObserver may take. Both normally take a few
+# milliseconds. The budget is generous so the test does not fail on a slow
+# or busy machine, but it catches an import of something heavy.
+IMPORT_BUDGET = 0.1
+
+
+def runPython(code):
+    """
+    Run Python code in a new interpreter, so that nothing has already been
+    imported.
+
+    @param code: the C{str} code to run. It must print a JSON value as its
+        last line of output.
+    @return: the value the code printed.
+    """
+    # Make sure the interpreter imports this copy of txdlo, whatever the
+    # current directory.
+    path = os.path.dirname(os.path.dirname(os.path.abspath(txdlo.__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [path] + [p for p in [env.get('PYTHONPATH')] if p])
+    output = subprocess.check_output([sys.executable, '-c', code], env=env)
+    return json.loads(output.decode('utf-8').splitlines()[-1])
+
+
+class TestImports(TestCase):
+
+    def testImportIsLazy(self):
+        """
+        Importing txdlo must not import Twisted or any txdlo submodule.
+        """
+        modules = runPython(
+            'import json, sys\n'
+            'import txdlo\n'
+            'print(json.dumps(sorted(m for m in sys.modules\n'
+            '                        if m.startswith(("twisted", "txdlo")))))')
+        self.assertEqual(['txdlo'], modules)
+
+    def testLazyAttributes(self):
+        """
+        Public names and submodules must be loaded on first access.
+        """
+        result = runPython(
+            'import json\n'
+            'import txdlo\n'
+            'from txdlo.dlo import DeferredListObserver\n'
+            'print(json.dumps([\n'
+            '    txdlo.DeferredListObserver is DeferredListObserver,\n'
+            '    txdlo.combinators.__name__,\n'
+            '    hasattr(txdlo, "nonexistent")]))')
+        self.assertEqual([True, 'txdlo.combinators', False], result)
+
+    def testCoreWithoutTwistedInternet(self):
+        """
+        Creating an observer, observing it, and feeding it events from
+        C{asyncio} futures must not import twisted.internet.
+        """
+        result = runPython(
+            'import asyncio, json, sys\n'
+            'from txdlo import DeferredListObserver\n'
+            'events = []\n'
+            'async def main():\n'
+            '    dlo = DeferredListObserver(maintainHistory=True,\n'
+            '                               maintainResults=True)\n'
+            '    dlo.observe(lambda *event: events.append(event[:2]))\n'
+            '    loop = asyncio.get_event_loop()\n'
+            '    future = loop.create_future()\n'
+            '    dlo.append(future)\n'
+            '    future.set_result(3)\n'
+            '    await asyncio.sleep(0)\n'
+            '    return dlo.snapshot().successCount\n'
+            'count = asyncio.new_event_loop().run_until_complete(main())\n'
+            'print(json.dumps([count, events,\n'
+            '                  "twisted.internet" in sys.modules]))')
+        self.assertEqual([1, [[0, True]], False], result)
+
+    def testImportTime(self):
+        """
+        Importing txdlo and its DeferredListObserver must be within the
+        startup budget.
+        """
+        elapsed = runPython(
+            'import json, time\n'
+            'start = time.perf_counter()\n'
+            'import txdlo\n'
+            'txdlo.DeferredListObserver\n'
+            'print(json.dumps(time.perf_counter() - start))')
+        self.assertTrue(elapsed < IMPORT_BUDGET,
+                        'Importing took %.3fs (budget %.3fs)' %
+                        (elapsed, IMPORT_BUDGET))
@@ -0,0 +1,171 @@
+from weakref import ref
+
+from twisted.internet.defer import Deferred, succeed
+from twisted.trial.unittest import TestCase
+
+from txdlo import DeferredListObserver
+from txdlo.instrument import Histogram
+
+
+class FakeClock(object):
+    """
+    A clock whose time is set by the test.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHistogram(TestCase):
+
+    def testEmpty(self):
+        """
+        An empty histogram must have no count, mean, or percentiles.
+        """
+        histogram = Histogram()
+        self.assertEqual(0, histogram.count)
+        self.assertIs(None, histogram.mean())
+        self.assertIs(None, histogram.percentile(50))
+        self.assertEqual([], histogram.buckets())
+
+    def testRecord(self):
+        """
+        Recorded values must be reflected in the count, mean, min and max.
+        """
+        histogram = Histogram()
+        histogram.record(0.5)
+        histogram.record(1.5)
+        self.assertEqual(2, histogram.count)
+        self.assertEqual(1.0, histogram.mean())
+        self.assertEqual(0.5, histogram.min)
+        self.assertEqual(1.5, histogram.max)
+        self.assertEqual(2, sum(count for _, count in histogram.buckets()))
+
+    def testPercentile(self):
+        """
+        Percentiles must be accurate to within the bucket resolution.
+        """
+        histogram = Histogram()
+        for value in range(1, 1001):
+            histogram.record(value / 1000.0)
+        # With 4 buckets per power of two, values are within 19%.
+        self.assertTrue(0.5 <= histogram.percentile(50) <= 0.5 * 1.19)
+        self.assertTrue(0.95 <= histogram.percentile(95) <= 1.0)
+        self.assertEqual(1.0, histogram.percentile(100))
+        self.assertEqual(0.001, histogram.percentile(0))
+
+    def testHugeValue(self):
+        """
+        A value larger than the last bucket must be counted in it.
+        """
+        histogram = Histogram(octaves=2)
+        histogram.record(1e9)
+        self.assertEqual(1e9, histogram.percentile(50))
+
+
+class TestInstrumentation(TestCase):
+
+    def testNotInstrumentedByDefault(self):
+        """
+        An observer must have no instrumentation by default.
+        """
+        self.assertIs(None, DeferredListObserver().instrumentation)
+
+    def testFireLatency(self):
+        """
+        The time between appending a deferred and its firing must be
+        recorded.
+        """
+        clock = FakeClock()
+        dlo = DeferredListObserver()
+        instrumentation = dlo.instrument(clock)
+        self.assertIs(instrumentation, dlo.instrumentation)
+        deferred = Deferred()
+        dlo.append(deferred)
+        clock.now = 2.0
+        deferred.callback(None)
+        self.assertEqual(1, instrumentation.fireLatency.count)
+        self.assertEqual(2.0, instrumentation.fireLatency.max)
+
+    def testObserverTime(self):
+        """
+        The time spent in each observer, including ones added before
+        instrumentation was enabled, must be recorded.
+        """
+        clock = FakeClock()
+
+        def slow(index, success, value):
+            clock.now += 3.0
+
+        def fast(index, success, value):
+            pass
+
+        dlo = DeferredListObserver()
+        dlo.observe(slow)
+        instrumentation = dlo.instrument(clock)
+        dlo.observe(fast)
+        dlo.append(succeed(None))
+        self.assertEqual(3.0, instrumentation.observerTimes[slow].total)
+        self.assertEqual(0.0, instrumentation.observerTimes[fast].total)
+
+    def testUnobservedObserverIsReleased(self):
+        """
+        Instrumentation must not keep an observer alive once it has been
+        removed.
+        """
+        def observer(index, success, value):
+            pass
+
+        dlo = DeferredListObserver()
+        instrumentation = dlo.instrument()
+        dlo.observe(observer)
+        dlo.append(succeed(None))
+        self.assertEqual(1, instrumentation.observerTimes[observer].count)
+        dlo.unobserve(observer)
+        observerRef = ref(observer)
+        del observer
+        self.assertIs(None, observerRef())
+        self.assertEqual(0, len(instrumentation.observerTimes))
+
+    def testUnhashableObserver(self):
+        """
+        An observer that cannot be hashed must still be called when
+        instrumentation is enabled.
+        """
+        class Observer(object):
+            def __init__(self):
+                self.events = []
+
+            def __call__(self, *event):
+                self.events.append(event)
+
+            def __eq__(self, other):
+                return self is other
+
+            __hash__ = None
+
+        observer = Observer()
+        dlo = DeferredListObserver()
+        dlo.instrument()
+        dlo.observe(observer)
+        dlo.append(succeed(None))
+        self.assertEqual([(0, True, None)], observer.events)
+
+    def testUnobserveInstrumentedObserver(self):
+        """
+        An instrumented observer must be removable with C{unobserve}.
+        """
+        result = []
+
+        def observer(*event):
+            result.append(event)
+
+        dlo = DeferredListObserver()
+        dlo.instrument()
+        dlo.observe(observer)
+        dlo.unobserve(observer)
+        dlo.append(succeed(None))
+        self.assertEqual([], result)
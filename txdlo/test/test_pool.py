@@ -0,0 +1,79 @@
+from twisted.internet.defer import Deferred
+from twisted.trial.unittest import TestCase
+
+from txdlo import DeferredListObserver
+from txdlo.pool import BoundedPool
+
+
+class TestBoundedPool(TestCase):
+
+    def testBadConcurrency(self):
+        """
+        A concurrency of less than one must not be allowed.
+        """
+        self.assertRaises(ValueError, BoundedPool, [], 0)
+
+    def testEmpty(self):
+        """
+        A pool with no functions must be empty immediately.
+        """
+        pool = BoundedPool([], 3)
+        self.successResultOf(pool.notifyWhenEmpty())
+
+    def testConcurrencyIsLimited(self):
+        """
+        No more than C{concurrency} deferreds must be pending at once, and
+        functions must only be called when there is room.
+        """
+        deferreds = [Deferred() for _ in range(5)]
+        called = []
+
+        def factories():
+            for index, deferred in enumerate(deferreds):
+                called.append(index)
+                yield lambda deferred=deferred: deferred
+
+        pool = BoundedPool(factories(), 2)
+        self.assertEqual([0, 1], called)
+        self.assertEqual(2, pool.dlo.pendingCount)
+        deferreds[1].callback(None)
+        self.assertEqual([0, 1, 2], called)
+        self.assertEqual(2, pool.dlo.pendingCount)
+        empty = pool.notifyWhenEmpty()
+        for deferred in deferreds[0], deferreds[2], deferreds[3]:
+            deferred.callback(None)
+        self.assertNoResult(empty)
+        deferreds[4].callback(None)
+        self.assertIs(None, self.successResultOf(empty))
+        self.assertEqual(5, pool.dlo.successCount)
+
+    def testSynchronousResults(self):
+        """
+        Functions that return plain values or raise must all be run, without
+        recursion, and their results observed.
+        """
+        def oops():
+            raise ValueError('oops')
+
+        factories = [lambda: 42] * 2000 + [oops]
+        dlo = DeferredListObserver()
+        pool = BoundedPool(factories, 1, dlo=dlo, consumeErrors=True)
+        self.successResultOf(pool.notifyWhenEmpty())
+        self.assertEqual(2000, dlo.successCount)
+        self.assertEqual(1, dlo.failureCount)
+
+    def testSealedObserver(self):
+        """
+        No functions must be called once the observer is sealed.
+        """
+        called = []
+
+        def factories():
+            while True:
+                called.append(None)
+                yield Deferred
+
+        dlo = DeferredListObserver()
+        dlo.seal()
+        BoundedPool(factories(), 2, dlo=dlo)
+        self.assertEqual([], called)
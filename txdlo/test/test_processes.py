@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from twisted.internet.defer import gatherResults
+from twisted.trial.unittest import TestCase
+
+from txdlo import DeferredListObserver
+from txdlo.processes import ProcessFanOut
+
+
+def square(x):
+    return x * x
+
+
+def oops(x):
+    raise ValueError(x)
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    """
+    A thread pool executor that records the chunks submitted to it.
+    """
+
+    def __init__(self):
+        ThreadPoolExecutor.__init__(self, 2)
+        self.chunks = []
+
+    def submit(self, function, calls):
+        self.chunks.append(len(calls))
+        return ThreadPoolExecutor.submit(self, function, calls)
+
+
+class TestProcessFanOut(TestCase):
+
+    def makeFanOut(self, **kwargs):
+        executor = RecordingExecutor()
+        self.addCleanup(executor.shutdown)
+        return ProcessFanOut(executor=executor, **kwargs), executor
+
+    def testBadChunkSize(self):
+        """
+        A chunk size of less than one must not be allowed.
+        """
+        self.assertRaises(ValueError, ProcessFanOut, chunkSize=0,
+                          executor=object())
+
+    def testResultsAreObserved(self):
+        """
+        Results and exceptions must fire the returned deferreds and be seen
+        by the observer.
+        """
+        dlo = DeferredListObserver(maintainResults=True)
+        fanOut, _ = self.makeFanOut(dlo=dlo)
+        deferreds = fanOut.map(square, range(5))
+        failed = fanOut.submit(oops, 3)
+        failed.addErrback(lambda f: f.trap(ValueError))
+
+        def check(results):
+            self.assertEqual([0, 1, 4, 9, 16], results[:5])
+            self.assertEqual(5, dlo.successCount)
+            self.assertEqual(1, dlo.failureCount)
+            self.assertEqual((True, 16), dlo.results.resultAt(4))
+
+        return gatherResults(deferreds + [failed]).addCallback(check)
+
+    def testChunking(self):
+        """
+        Calls must be sent to the executor in chunks.
+        """
+        fanOut, executor = self.makeFanOut(chunkSize=4)
+        deferreds = fanOut.map(square, range(10))
+        # Two full chunks have been sent. The remaining two calls are sent
+        # in the next reactor iteration.
+        self.assertEqual([4, 4], executor.chunks)
+
+        def check(results):
+            self.assertEqual([4, 4, 2], executor.chunks)
+            self.assertEqual([x * x for x in range(10)], results)
+
+        return gatherResults(deferreds).addCallback(check)
+
+    def testProcessPool(self):
+        """
+        Calls must work with the default process pool executor.
+        """
+        fanOut = ProcessFanOut(maxWorkers=1)
+        deferreds = fanOut.map(square, range(3))
+        fanOut.flush()
+
+        def check(results):
+            self.assertEqual([0, 1, 4], results)
+            fanOut.shutdown()
+
+        return gatherResults(deferreds).addCallback(check)
@@ -0,0 +1,132 @@
+from twisted.internet.defer import Deferred, succeed, fail
+from twisted.trial.unittest import TestCase
+
+from txdlo.dlo import DeferredListObserver
+from txdlo.reducers import Count, Sum, Min, Max, TopK
+
+
+class TestReducers(TestCase):
+
+    def testCount(self):
+        """
+        A Count must count only the kinds of event it is asked to.
+        """
+        successes = Count()
+        everything = Count(failures=True, timeouts=True)
+        for event in ((0, True, 1), (1, False, None), (2, None, None)):
+            successes(*event)
+            everything(*event)
+        self.assertEqual(1, successes.value)
+        self.assertEqual(3, everything.value)
+
+    def testSum(self):
+        """
+        A Sum must add the (keyed) values of successful events only.
+        """
+        reducer = Sum(key=len)
+        reducer(0, True, 'abc')
+        reducer(1, False, 'ignored')
+        reducer(2, True, 'de')
+        self.assertEqual(5, reducer.value)
+
+    def testMinAndMax(self):
+        """
+        Min and Max must track the extreme value and its index, keeping the
+        earliest of equal values.
+        """
+        smallest = Min()
+        largest = Max(key=abs)
+        self.assertIs(None, smallest.value)
+        for index, value in enumerate([3, -7, 1, 7, 1]):
+            smallest(index, True, value)
+            largest(index, True, value)
+        smallest(5, False, -100)
+        self.assertEqual((-7, 1), (smallest.value, smallest.index))
+        self.assertEqual((-7, 1), (largest.value, largest.index))
+
+    def testTopK(self):
+        """
+        TopK must keep the k largest values, largest first.
+        """
+        reducer = TopK(2)
+        for index, value in enumerate([5, 1, 9, 5, 3]):
+            reducer(index, True, value)
+        reducer(5, False, 100)
+        self.assertEqual([(2, 9), (0, 5)], reducer.value)
+
+    def testTopKBadK(self):
+        """
+        A k less than one must not be allowed.
+        """
+        self.assertRaises(ValueError, TopK, 0)
+
+
+class TestWhenCondition(TestCase):
+
+    def testCountsPredicate(self):
+        """
+        Without a reducer, the predicate must be passed the observer, and
+        the deferred must fire once it holds.
+        """
+        dlo = DeferredListObserver()
+        d = dlo.whenCondition(
+            lambda dlo: dlo.successCount >= 2 and dlo.failureCount <= 1)
+        dlo.append(succeed(None))
+        self.failureResultOf(dlo.append(fail(Exception())))
+        self.assertNoResult(d)
+        dlo.append(succeed(None))
+        self.assertIs(dlo, self.successResultOf(d))
+        self.assertEqual([], dlo._observers)
+
+    def testReducer(self):
+        """
+        With a reducer, the predicate must be passed its value, and the
+        deferred must fire with that value.
+        """
+        dlo = DeferredListObserver()
+        d = dlo.whenCondition(lambda total: total > 10, Sum())
+        for value in (4, 5, 6, 7):
+            dlo.append(succeed(value))
+        self.assertEqual(15, self.successResultOf(d))
+
+    def testAlreadyTrue(self):
+        """
+        If the predicate already holds, the deferred must fire immediately.
+        """
+        dlo = DeferredListObserver()
+        dlo.append(succeed(None))
+        d = dlo.whenCondition(lambda dlo: dlo.successCount == 1)
+        self.assertIs(dlo, self.successResultOf(d))
+
+    def testPredicateError(self):
+        """
+        If the predicate raises, the deferred must fail.
+        """
+        dlo = DeferredListObserver()
+        d = dlo.whenCondition(lambda dlo: 1 / (1 - dlo.successCount) > 1)
+        dlo.append(succeed(None))
+        self.failureResultOf(d, ZeroDivisionError)
+
+    def testInitialPredicateError(self):
+        """
+        If the predicate raises when it is first checked, the deferred must
+        fail and the condition must stop observing.
+        """
+        dlo = DeferredListObserver()
+        d = dlo.whenCondition(
+            lambda dlo: dlo.successCount / dlo.failureCount > 1)
+        self.failureResultOf(d, ZeroDivisionError)
+        self.assertEqual([], dlo._observers)
+
+    def testDecide(self):
+        """
+        When the condition holds, pending deferreds must be cancelled if the
+        observer was asked to do so.
+        """
+        dlo = DeferredListObserver(cancelPendingOnDecision=True)
+        pending = dlo.append(Deferred())
+        d = dlo.whenCondition(lambda dlo: dlo.successCount == 1)
+        dlo.append(succeed(None))
+        self.successResultOf(d)
+        self.assertIs(None, self.successResultOf(pending))
+        self.assertEqual(1, dlo.cancelledCount)
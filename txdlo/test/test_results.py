@@ -0,0 +1,69 @@
+from twisted.trial.unittest import TestCase
+
+from txdlo.results import ResultStore, PENDING, SUCCESS, FAILURE
+
+
+class TestResultStore(TestCase):
+
+    def testEmptyStoreHasLengthZero(self):
+        """
+        A new store must have length zero, even if given a size hint.
+        """
+        self.assertEqual(0, len(ResultStore()))
+        self.assertEqual(0, len(ResultStore(10)))
+
+    def testReservedIndexIsPending(self):
+        """
+        A reserved index must have a pending status and a C{None} result.
+        """
+        store = ResultStore()
+        store._reserve(0)
+        self.assertEqual(1, len(store))
+        self.assertEqual(PENDING, store.statusAt(0))
+        self.assertIs(None, store.resultAt(0))
+
+    def testSetResults(self):
+        """
+        Results that are set must be returned by C{resultAt}.
+        """
+        store = ResultStore(2)
+        store._reserve(0)
+        store._reserve(1)
+        store._set(1, FAILURE, 'x')
+        store._set(0, SUCCESS, 'y')
+        self.assertEqual(SUCCESS, store.statusAt(0))
+        self.assertEqual((True, 'y'), store.resultAt(0))
+        self.assertEqual((False, 'x'), store.resultAt(1))
+
+    def testGrowsBeyondSizeHint(self):
+        """
+        A store must grow beyond its size hint.
+        """
+        store = ResultStore(1)
+        for index in range(3):
+            store._reserve(index)
+            store._set(index, SUCCESS, index)
+        self.assertEqual([(True, 0), (True, 1), (True, 2)],
+                         list(store.view()))
+
+    def testResultAtOutOfRange(self):
+        """
+        Asking for the result of an unreserved index must raise
+        C{IndexError}, even if space has been preallocated.
+        """
+        store = ResultStore(5)
+        self.assertRaises(IndexError, store.resultAt, 0)
+
+    def testViewReflectsLaterChanges(self):
+        """
+        A view must reflect results set after it was created.
+        """
+        store = ResultStore()
+        store._reserve(0)
+        view = store.view()
+        self.assertEqual([None], view)
+        store._set(0, SUCCESS, 3)
+        store._reserve(1)
+        self.assertEqual([(True, 3), None], view)
+        self.assertEqual((True, 3), view[-2])
+        self.assertEqual([None], view[1:])
@@ -0,0 +1,128 @@
+from twisted.internet.defer import Deferred, succeed, fail
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+from txdlo.combinators import NOf
+from txdlo.sharded import ShardedDeferredListObserver
+
+
+class TestShardedDeferredListObserver(TestCase):
+
+    def testBadShards(self):
+        """
+        Fewer than one shard must not be allowed.
+        """
+        self.assertRaises(ValueError, ShardedDeferredListObserver, shards=0)
+
+    def testDeferredsAreSpreadOverShards(self):
+        """
+        Deferreds must be spread round-robin over the shards.
+        """
+        sdlo = ShardedDeferredListObserver(shards=3)
+        sdlo.extend(Deferred() for _ in range(7))
+        self.assertEqual([3, 2, 2],
+                         [child.pendingCount for child in sdlo.shards])
+        self.assertEqual(7, sdlo.pendingCount)
+
+    def testCountsAndIndexes(self):
+        """
+        The counts must be the totals of the shards' counts, and observers
+        must be called with the index the deferred was added with.
+        """
+        result = []
+        sdlo = ShardedDeferredListObserver(shards=2)
+        sdlo.observe(lambda index, success, value: result.append(index))
+        deferreds = [Deferred() for _ in range(5)]
+        self.assertEqual([0, 1, 2, 3, 4], list(sdlo.extend(deferreds)))
+        for index in 3, 0, 4:
+            deferreds[index].callback(None)
+        f = fail(Exception('oops'))
+        sdlo.append(f)
+        self.assertEqual([3, 0, 4, 5], result)
+        self.assertEqual(3, sdlo.successCount)
+        self.assertEqual(1, sdlo.failureCount)
+        self.assertEqual(2, sdlo.pendingCount)
+        summaries = sdlo.shardSummaries()
+        self.assertEqual([2, 1], [s.successCount for s in summaries])
+        f.addErrback(lambda value: None)
+
+    def testCombinator(self):
+        """
+        A combinator must be able to decide from a sharded observer.
+        """
+        sdlo = ShardedDeferredListObserver(shards=4)
+        combinator = NOf(sdlo, 3)
+        deferreds = [Deferred() for _ in range(10)]
+        sdlo.extend(deferreds)
+        for index in 9, 2, 5:
+            deferreds[index].callback(index)
+        self.assertEqual([(9, 9), (2, 2), (5, 5)],
+                         self.successResultOf(combinator.deferred))
+        self.assertEqual([], sdlo._observers)
+
+    def testDecideCancelsPending(self):
+        """
+        Deferreds cancelled by C{decide} must no longer be counted as
+        pending.
+        """
+        sdlo = ShardedDeferredListObserver(shards=2,
+                                           cancelPendingOnDecision=True)
+        deferreds = [Deferred() for _ in range(4)]
+        sdlo.extend(deferreds)
+        deferreds[0].callback(0)
+        sdlo.decide()
+        self.assertEqual([0, 0], [child.pendingCount for child in sdlo.shards])
+        self.assertEqual(0, sdlo.pendingCount)
+        self.assertEqual(3, sdlo.cancelledCount)
+
+    def testReleaseCompletedShards(self):
+        """
+        When C{releaseCompletedShards} is C{True}, a shard with no pending
+        deferreds must discard its history.
+        """
+        sdlo = ShardedDeferredListObserver(shards=2, maintainHistory=True,
+                                           releaseCompletedShards=True)
+        d = Deferred()
+        sdlo.append(d)
+        sdlo.append(succeed(1))
+        sdlo.append(succeed(2))
+        self.assertEqual([], sdlo.shards[1].history)
+        self.assertEqual(1, sdlo.shards[1].evictedCount)
+        # The shard's history has its local index.
+        self.assertEqual([(1, True, 2)], sdlo.shards[0].history)
+        d.callback(0)
+        self.assertEqual([], sdlo.shards[0].history)
+        self.assertEqual(2, sdlo.shards[0].evictedCount)
+
+    def testTimeOutsAreNotFailures(self):
+        """
+        Timed-out deferreds must be counted in timedOutCount, not as
+        failures.
+        """
+        clock = Clock()
+        sdlo = ShardedDeferredListObserver(shards=2, deadlines=True,
+                                           clock=clock)
+        sdlo.extend([Deferred(), Deferred(), Deferred()], deadline=1)
+        clock.advance(1)
+        self.assertEqual(3, sdlo.timedOutCount)
+        self.assertEqual(0, sdlo.failureCount)
+        self.assertEqual(0, sdlo.pendingCount)
+
+    def testReleaseCompletedShardsResults(self):
+        """
+        When C{releaseCompletedShards} is C{True}, a shard with no pending
+        deferreds must release the values of its results, but keep their
+        statuses.
+        """
+        sdlo = ShardedDeferredListObserver(shards=2, maintainResults=True,
+                                           releaseCompletedShards=True)
+        d = Deferred()
+        sdlo.append(d)
+        sdlo.append(succeed(1))
+        sdlo.append(succeed(2))
+        self.assertEqual([(True, None)], list(sdlo.shards[1].results.view()))
+        self.assertEqual([None, (True, 2)],
+                         list(sdlo.shards[0].results.view()))
+        d.callback(0)
+        self.assertEqual([(True, None), (True, None)],
+                         list(sdlo.shards[0].results.view()))
@@ -0,0 +1,144 @@
+from twisted.internet.defer import Deferred, CancelledError, succeed
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+from txdlo.singleflight import SingleFlight
+
+
+class Backend(object):
+    """
+    A fake backend that records its calls, answered by the test.
+    """
+
+    def __init__(self):
+        self.deferreds = []
+
+    def __call__(self):
+        deferred = Deferred()
+        self.deferreds.append(deferred)
+        return deferred
+
+
+class TestSingleFlight(TestCase):
+
+    def testCoalesce(self):
+        """
+        Concurrent calls for the same key must make only one backend call,
+        and all callers must get its result.
+        """
+        backend = Backend()
+        flight = SingleFlight()
+        d1 = flight.get('x', backend)
+        d2 = flight.get('x', backend)
+        self.assertEqual(1, len(backend.deferreds))
+        backend.deferreds[0].callback(3)
+        self.assertEqual(3, self.successResultOf(d1))
+        self.assertEqual(3, self.successResultOf(d2))
+        self.assertEqual((1, 1, 0), (flight.misses, flight.coalesced,
+                                     flight.hits))
+
+    def testDifferentKeys(self):
+        """
+        Calls for different keys must not be coalesced.
+        """
+        backend = Backend()
+        flight = SingleFlight()
+        flight.get('x', backend)
+        flight.get('y', backend)
+        self.assertEqual(2, len(backend.deferreds))
+
+    def testFailure(self):
+        """
+        A failure must be given to all callers and must not be cached.
+        """
+        backend = Backend()
+        flight = SingleFlight(cacheSize=10)
+        d1 = flight.get('x', backend)
+        d2 = flight.get('x', backend)
+        backend.deferreds[0].errback(ZeroDivisionError())
+        self.failureResultOf(d1, ZeroDivisionError)
+        self.failureResultOf(d2, ZeroDivisionError)
+        flight.get('x', backend)
+        self.assertEqual(2, len(backend.deferreds))
+
+    def testNoCacheByDefault(self):
+        """
+        Without a cache, a call after the result has arrived must call the
+        backend again.
+        """
+        flight = SingleFlight()
+        flight.get('x', lambda: succeed(1))
+        flight.get('x', lambda: succeed(2))
+        self.assertEqual(2, flight.misses)
+
+    def testCache(self):
+        """
+        With a cache, a later call must be answered from it.
+        """
+        flight = SingleFlight(cacheSize=1)
+        flight.get('x', lambda: 1)
+        self.assertEqual(1, self.successResultOf(flight.get('x', None)))
+        self.assertEqual(1, flight.hits)
+
+    def testLeastRecentlyUsedIsEvicted(self):
+        """
+        When the cache is full, the least recently used result must be
+        discarded.
+        """
+        flight = SingleFlight(cacheSize=2)
+        flight.get('x', lambda: 1)
+        flight.get('y', lambda: 2)
+        flight.get('x', None)
+        flight.get('z', lambda: 3)
+        self.assertEqual(1, self.successResultOf(flight.get('x', None)))
+        self.assertEqual(4, self.successResultOf(flight.get('y', lambda: 4)))
+
+    def testTTL(self):
+        """
+        A cached result must not be used once its time to live has passed.
+        """
+        clock = Clock()
+        flight = SingleFlight(cacheSize=1, ttl=10, clock=clock)
+        flight.get('x', lambda: 1)
+        clock.advance(9)
+        self.assertEqual(1, self.successResultOf(flight.get('x', None)))
+        clock.advance(1)
+        self.assertEqual(2, self.successResultOf(flight.get('x', lambda: 2)))
+
+    def testForget(self):
+        """
+        A forgotten result must not be used.
+        """
+        flight = SingleFlight(cacheSize=1)
+        flight.get('x', lambda: 1)
+        flight.forget('x')
+        self.assertEqual(2, self.successResultOf(flight.get('x', lambda: 2)))
+
+    def testCancelOneCaller(self):
+        """
+        Cancelling one caller's deferred must not affect the others or
+        cancel the backend call.
+        """
+        backend = Backend()
+        flight = SingleFlight()
+        d1 = flight.get('x', backend)
+        d2 = flight.get('x', backend)
+        d1.cancel()
+        self.failureResultOf(d1, CancelledError)
+        self.assertNoResult(backend.deferreds[0])
+        backend.deferreds[0].callback(3)
+        self.assertEqual(3, self.successResultOf(d2))
+
+    def testCancelLastCaller(self):
+        """
+        Cancelling the last waiting caller must cancel the backend call.
+        """
+        backend = Backend()
+        flight = SingleFlight()
+        d = flight.get('x', backend)
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        self.assertIs(None, self.successResultOf(backend.deferreds[0]))
+        self.assertEqual(1, flight.dlo.failureCount)
+        flight.get('x', backend)
+        self.assertEqual(2, len(backend.deferreds))
@@ -0,0 +1,172 @@
+from twisted.internet.defer import Deferred, succeed
+from twisted.trial.unittest import TestCase
+
+from txdlo import DeferredListObserver
+from txdlo.stream import (
+    StreamClosedError, StreamOverflowError, DROP_OLDEST, ERROR)
+
+
+class TestDeferredEventStream(TestCase):
+
+    def testBadMaxSize(self):
+        """
+        A stream with a C{maxSize} less than one must not be allowed.
+        """
+        dlo = DeferredListObserver()
+        self.assertRaises(ValueError, dlo.stream, maxSize=0)
+
+    def testBadOverflow(self):
+        """
+        A stream with an unknown overflow policy must not be allowed.
+        """
+        dlo = DeferredListObserver()
+        self.assertRaises(ValueError, dlo.stream, overflow='xxx')
+
+    def testEventBeforeNext(self):
+        """
+        An event that occurs before C{next} is called must be held until it
+        is.
+        """
+        dlo = DeferredListObserver()
+        stream = dlo.stream()
+        dlo.append(succeed(42))
+        self.assertEqual(1, len(stream))
+        self.assertEqual((0, True, 42), self.successResultOf(stream.next()))
+
+    def testNextBeforeEvent(self):
+        """
+        A deferred returned by C{next} before an event occurs must fire when
+        it does.
+        """
+        dlo = DeferredListObserver()
+        stream = dlo.stream()
+        d = stream.next()
+        self.assertNoResult(d)
+        dlo.append(succeed(42))
+        self.assertEqual((0, True, 42), self.successResultOf(d))
+
+    def testCancelNext(self):
+        """
+        Cancelling a deferred returned by C{next} must mean it does not get
+        an event.
+        """
+        dlo = DeferredListObserver()
+        stream = dlo.stream()
+        d = stream.next()
+        d.cancel()
+        self.failureResultOf(d)
+        dlo.append(succeed(42))
+        self.assertEqual((0, True, 42), self.successResultOf(stream.next()))
+
+    def testBlock(self):
+        """
+        With the default (block) overflow policy, a deferred that fires when
+        the stream is full must be paused until there is room.
+        """
+        result = []
+        dlo = DeferredListObserver()
+        stream = dlo.stream(maxSize=1)
+        dlo.append(succeed(1))
+        blocked = Deferred()
+        dlo.append(blocked).addCallback(result.append)
+        blocked.callback(2)
+        self.assertEqual([], result)
+        self.assertEqual((0, True, 1), self.successResultOf(stream.next()))
+        self.assertEqual([2], result)
+        self.assertEqual((1, True, 2), self.successResultOf(stream.next()))
+
+    def testBlockedFailurePassesThrough(self):
+        """
+        A failure that was blocked on a full stream must continue down its
+        deferred's errback chain once unblocked.
+        """
+        dlo = DeferredListObserver()
+        stream = dlo.stream(maxSize=1)
+        dlo.append(succeed(1))
+        blocked = Deferred()
+        dlo.append(blocked)
+        blocked.errback(Exception('oops'))
+        self.assertNoResult(blocked)
+        stream.next()
+        self.failureResultOf(blocked, Exception)
+
+    def testDropOldest(self):
+        """
+        With the drop-oldest overflow policy, the oldest event must be
+        dropped when the stream is full.
+        """
+        dlo = DeferredListObserver()
+        stream = dlo.stream(maxSize=2, overflow=DROP_OLDEST)
+        for value in range(3):
+            dlo.append(succeed(value))
+        self.assertEqual(1, stream.droppedCount)
+        self.assertEqual((1, True, 1), self.successResultOf(stream.next()))
+        self.assertEqual((2, True, 2), self.successResultOf(stream.next()))
+
+    def testError(self):
+        """
+        With the error overflow policy, the stream must be closed when it
+        overflows, and C{next} must fail with C{StreamOverflowError} once the
+        events in it have been taken.
+        """
+        dlo = DeferredListObserver()
+        stream = dlo.stream(maxSize=1, overflow=ERROR)
+        dlo.append(succeed(1))
+        dlo.append(succeed(2))
+        self.assertTrue(stream.closed)
+        self.assertEqual((0, True, 1), self.successResultOf(stream.next()))
+        self.failureResultOf(stream.next(), StreamOverflowError)
+
+    def testClose(self):
+        """
+        Closing a stream must fail waiting C{next} deferreds and release
+        blocked producers.
+        """
+        dlo = DeferredListObserver()
+        stream = dlo.stream()
+        d = stream.next()
+        stream.close()
+        self.failureResultOf(d, StreamClosedError)
+        dlo.append(succeed(1))
+        self.failureResultOf(stream.next(), StreamClosedError)
+
+    def testCloseReleasesBlockedProducers(self):
+        """
+        Closing a full stream must release producers blocked on it.
+        """
+        dlo = DeferredListObserver()
+        stream = dlo.stream(maxSize=1)
+        dlo.append(succeed(1))
+        blocked = dlo.append(succeed(2))
+        self.assertNoResult(blocked)
+        stream.close()
+        self.assertEqual(2, self.successResultOf(blocked))
+        self.assertEqual(1, stream.droppedCount)
+
+    def testSealClosesStreams(self):
+        """
+        Sealing an observer must close its streams.
+        """
+        dlo = DeferredListObserver()
+        stream = dlo.stream()
+        dlo.seal()
+        self.assertTrue(stream.closed)
+
+    def testStreamOfSealedObserver(self):
+        """
+        A stream of a sealed observer must be closed.
+        """
+        dlo = DeferredListObserver()
+        dlo.seal()
+        stream = dlo.stream()
+        self.assertTrue(stream.closed)
+        self.failureResultOf(stream.next(), StreamClosedError)
+
+    def testClosingLastStreamAutoSeals(self):
+        """
+        Closing the last stream of an auto-sealing observer must seal it.
+        """
+        dlo = DeferredListObserver(autoSeal=True)
+        stream = dlo.stream()
+        stream.close()
+        self.assertTrue(dlo.sealed)
@@ -0,0 +1,136 @@
+import threading
+
+from twisted.trial.unittest import TestCase
+
+from txdlo import DeferredListObserver
+from txdlo.threads import ThreadedReporter
+
+
+class FakeCallFromThread(object):
+    """
+    Record functions to be called "in the reactor thread", so the test can
+    call them.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, function):
+        with self._lock:
+            self.calls.append(function)
+
+    def run(self):
+        with self._lock:
+            calls, self.calls = self.calls, []
+        for function in calls:
+            function()
+        return len(calls)
+
+
+class TestThreadedReporter(TestCase):
+
+    def testReserve(self):
+        """
+        Reserving indexes must add to the pending count.
+        """
+        dlo = DeferredListObserver()
+        reporter = ThreadedReporter(dlo, FakeCallFromThread())
+        self.assertEqual([0, 1, 2], reporter.reserve(3))
+        self.assertEqual(3, dlo.pendingCount)
+
+    def testUnexpectedReportsAreDropped(self):
+        """
+        Reports for indexes that were not reserved, or that have already
+        been reported, must be dropped.
+        """
+        callFromThread = FakeCallFromThread()
+        dlo = DeferredListObserver()
+        reporter = ThreadedReporter(dlo, callFromThread)
+        index, = reporter.reserve()
+        reporter.callback(index, 1)
+        reporter.callback(index, 2)
+        reporter.callback(99, 3)
+        callFromThread.run()
+        self.assertEqual((1, 0), (dlo.successCount, dlo.pendingCount))
+        self.assertEqual(2, reporter.droppedCount)
+
+    def testReserveWhenSealed(self):
+        """
+        Nothing must be reserved once the observer is sealed.
+        """
+        dlo = DeferredListObserver()
+        dlo.seal()
+        reporter = ThreadedReporter(dlo, FakeCallFromThread())
+        self.assertEqual([], reporter.reserve(2))
+        self.assertEqual(0, dlo.pendingCount)
+
+    def testReports(self):
+        """
+        Reports must be passed to the observer only when the scheduled
+        drain runs, and a single drain must be scheduled for many reports.
+        """
+        result = []
+        callFromThread = FakeCallFromThread()
+        dlo = DeferredListObserver()
+        dlo.observe(lambda *event: result.append(event[:2]))
+        reporter = ThreadedReporter(dlo, callFromThread)
+        reporter.reserve(2)
+        reporter.callback(1, 42)
+        reporter.errback(0, ValueError('oops'))
+        self.assertEqual([], result)
+        self.assertEqual(1, callFromThread.run())
+        self.assertEqual([(1, True), (0, False)], result)
+        self.assertEqual(1, dlo.successCount)
+        self.assertEqual(1, dlo.failureCount)
+        self.assertEqual(0, dlo.pendingCount)
+
+    def testManyThreads(self):
+        """
+        Reports from many threads must all be delivered, with each thread's
+        reports in the order it made them, and the counts must be correct.
+        """
+        threadCount = 16
+        perThread = 500
+        callFromThread = FakeCallFromThread()
+        dlo = DeferredListObserver(maintainHistory=True)
+        reporter = ThreadedReporter(dlo, callFromThread)
+        indexes = reporter.reserve(threadCount * perThread)
+        drains = []
+        stop = threading.Event()
+
+        def producer(n):
+            for index in indexes[n::threadCount]:
+                if index % 7:
+                    reporter.callback(index, n)
+                else:
+                    reporter.errback(index, ValueError(n))
+
+        def reactorThread():
+            while not stop.is_set():
+                drains.append(callFromThread.run())
+
+        threads = [threading.Thread(target=producer, args=(n,))
+                   for n in range(threadCount)]
+        drainer = threading.Thread(target=reactorThread)
+        drainer.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        drainer.join()
+        drains.append(callFromThread.run())
+
+        total = threadCount * perThread
+        failures = len([i for i in range(total) if i % 7 == 0])
+        self.assertEqual(0, dlo.pendingCount)
+        self.assertEqual(total - failures, dlo.successCount)
+        self.assertEqual(failures, dlo.failureCount)
+        self.assertEqual(total, len(dlo.history))
+        self.assertTrue(sum(drains) <= total)
+        # Each thread's reports arrived in order.
+        for n in range(threadCount):
+            mine = [index for index, _, _ in dlo.history
+                    if index % threadCount == n]
+            self.assertEqual(indexes[n::threadCount], mine)
@@ -1,3 +1,6 @@
+import gc
+from weakref import ref
+
 from twisted.internet.defer import Deferred, succeed, fail
 from twisted.trial.unittest import TestCase
 
@@ -268,3 +271,654 @@ class TestDeferredListObserver(TestCase):
         value = object()
         deferred.errback(value)
         self.assertIs(value, result[0].value)
+
+    def testNoResultsAttributeByDefault(self):
+        """
+        A deferred list observer must not have a C{results} attribute unless
+        asked to maintain results.
+        """
+        dlo = DeferredListObserver()
+        self.assertFalse(hasattr(dlo, 'results'))
+
+    def testResultsAreStoredByIndex(self):
+        """
+        A results-enabled deferred list observer must store results by the
+        index of the deferred, regardless of firing order.
+        """
+        dlo = DeferredListObserver(maintainResults=True, sizeHint=3)
+        first = Deferred()
+        dlo.append(first)
+        dlo.append(succeed(42))
+        second = Deferred()
+        dlo.append(second)
+        self.assertEqual([None, (True, 42), None], dlo.results.view())
+        second.errback(Exception('oops'))
+        first.callback(43)
+        self.assertEqual((True, 43), dlo.results.resultAt(0))
+        success, value = dlo.results.resultAt(2)
+        self.assertFalse(success)
+        self.assertEqual('oops', str(value.value))
+        # Catch the error so trial doesn't complain.
+        second.addErrback(lambda value: None)
+
+    def testUnobserve(self):
+        """
+        An observer that has been removed must not be called.
+        """
+        result = []
+
+        def observer(index, success, value):
+            result.append(index)
+
+        dlo = DeferredListObserver()
+        dlo.observe(observer)
+        dlo.append(succeed(None))
+        dlo.unobserve(observer)
+        dlo.append(succeed(None))
+        self.assertEqual([0], result)
+
+    def testUnobserveUnknownObserver(self):
+        """
+        Removing an observer that is not being called must raise
+        C{ValueError}.
+        """
+        dlo = DeferredListObserver()
+        self.assertRaises(ValueError, dlo.unobserve, lambda: None)
+
+    def testUnobserveDuringEvent(self):
+        """
+        An observer that removes itself while an event is being delivered
+        must not prevent later observers from receiving the event.
+        """
+        result = []
+        dlo = DeferredListObserver()
+
+        def observer1(index, success, value):
+            result.append(1)
+            dlo.unobserve(observer1)
+
+        def observer2(index, success, value):
+            result.append(2)
+
+        dlo.observe(observer1)
+        dlo.observe(observer2)
+        dlo.append(succeed(None))
+        dlo.append(succeed(None))
+        self.assertEqual([1, 2, 2], result)
+
+    def testNoAutoSealByDefault(self):
+        """
+        Removing the last observer must not seal the observer by default.
+        """
+        def observer(*args):
+            pass
+
+        dlo = DeferredListObserver()
+        dlo.observe(observer)
+        dlo.unobserve(observer)
+        self.assertFalse(dlo.sealed)
+        dlo.append(succeed(None))
+        self.assertEqual(1, dlo.successCount)
+
+    def testAutoSeal(self):
+        """
+        When C{autoSeal} is C{True}, removing the last observer must seal
+        the observer, after which its counts and history must not change.
+        """
+        def observer(*args):
+            pass
+
+        dlo = DeferredListObserver(maintainHistory=True, autoSeal=True)
+        deferred = Deferred()
+        dlo.append(deferred)
+        dlo.observe(observer)
+        dlo.unobserve(observer)
+        self.assertTrue(dlo.sealed)
+        deferred.callback(42)
+        dlo.append(succeed(43))
+        self.assertEqual(1, dlo.pendingCount)
+        self.assertEqual(0, dlo.successCount)
+        self.assertEqual([], dlo.history)
+
+    def testSealedObserverPassesValuesThrough(self):
+        """
+        A sealed observer must not alter the values of observed deferreds.
+        """
+        dlo = DeferredListObserver()
+        deferred = Deferred()
+        dlo.append(deferred)
+        dlo.seal()
+        deferred.callback(42)
+        self.assertEqual(42, self.successResultOf(deferred))
+
+    def testCancelPendingRequiresTracking(self):
+        """
+        Calling C{cancelPending} on an observer not created with
+        C{cancelPendingOnDecision=True} must raise C{RuntimeError}.
+        """
+        dlo = DeferredListObserver()
+        self.assertRaises(RuntimeError, dlo.cancelPending)
+
+    def testDecideWithoutTrackingDoesNothing(self):
+        """
+        Calling C{decide} on an observer not created with
+        C{cancelPendingOnDecision=True} must not cancel anything.
+        """
+        dlo = DeferredListObserver()
+        deferred = Deferred()
+        dlo.append(deferred)
+        dlo.decide()
+        self.assertNoResult(deferred)
+        self.assertEqual(1, dlo.pendingCount)
+
+    def testDecideCancelsPending(self):
+        """
+        Calling C{decide} on an observer created with
+        C{cancelPendingOnDecision=True} must cancel its pending deferreds,
+        swallow the resulting C{CancelledError}s and count them as
+        cancelled, without calling observers.
+        """
+        result = []
+        dlo = DeferredListObserver(maintainResults=True,
+                                   cancelPendingOnDecision=True)
+        dlo.observe(lambda *event: result.append(event))
+        pending = Deferred()
+        dlo.append(succeed(42))
+        dlo.append(pending)
+        dlo.decide()
+        self.assertIs(None, self.successResultOf(pending))
+        self.assertEqual(0, dlo.pendingCount)
+        self.assertEqual(1, dlo.cancelledCount)
+        self.assertEqual(0, dlo.failureCount)
+        self.assertEqual([(0, True, 42)], result)
+        self.assertIs(None, dlo.results.resultAt(1))
+
+    def testCancelledIndexesAreNotReused(self):
+        """
+        A deferred appended after a cancellation must get a new index.
+        """
+        result = []
+        dlo = DeferredListObserver(cancelPendingOnDecision=True)
+        dlo.observe(lambda *event: result.append(event))
+        dlo.append(Deferred())
+        dlo.decide()
+        dlo.append(succeed(42))
+        self.assertEqual([(1, True, 42)], result)
+
+    def testCancelWithCustomFailure(self):
+        """
+        If a cancelled deferred fails with something other than a
+        C{CancelledError}, it must be counted as an ordinary failure.
+        """
+        deferred = Deferred(lambda d: d.errback(Exception('no')))
+        dlo = DeferredListObserver(cancelPendingOnDecision=True)
+        dlo.append(deferred)
+        dlo.cancelPending()
+        self.assertEqual(1, dlo.failureCount)
+        self.assertEqual(0, dlo.cancelledCount)
+        deferred.addErrback(lambda value: None)
+
+    def testCancelAfterSealIsSwallowed(self):
+        """
+        A C{CancelledError} caused by C{cancelPending} must be swallowed
+        even if the observer has been sealed.
+        """
+        dlo = DeferredListObserver(cancelPendingOnDecision=True)
+        deferred = Deferred()
+        dlo.append(deferred)
+        dlo.seal()
+        dlo.cancelPending()
+        self.assertIs(None, self.successResultOf(deferred))
+
+    def testHistoryOptionsWithoutHistory(self):
+        """
+        Passing history options without C{maintainHistory=True} must raise
+        C{ValueError}.
+        """
+        self.assertRaises(ValueError, DeferredListObserver, historySize=3)
+        self.assertRaises(ValueError, DeferredListObserver,
+                          historyFailuresOnly=True)
+        self.assertRaises(ValueError, DeferredListObserver,
+                          historyValues=False)
+
+    def testNoEvictedCountWithoutHistory(self):
+        """
+        An observer with no history must not have an C{evictedCount}.
+        """
+        self.assertFalse(hasattr(DeferredListObserver(), 'evictedCount'))
+
+    def testBoundedHistory(self):
+        """
+        An observer with a C{historySize} must keep only the most recent
+        events, count the evicted ones, and replay only what it kept.
+        """
+        result = []
+        dlo = DeferredListObserver(maintainHistory=True, historySize=2)
+        for value in range(5):
+            dlo.append(succeed(value))
+        self.assertEqual([(3, True, 3), (4, True, 4)], list(dlo.history))
+        self.assertEqual(3, dlo.evictedCount)
+        dlo.observe(lambda *event: result.append(event), replayHistory=True)
+        self.assertEqual([(3, True, 3), (4, True, 4)], result)
+
+    def testFailuresOnlyHistory(self):
+        """
+        An observer with C{historyFailuresOnly} must keep only failures in
+        its history, and count successes as evicted.
+        """
+        dlo = DeferredListObserver(maintainHistory=True,
+                                   historyFailuresOnly=True)
+        dlo.append(succeed(None))
+        f = fail(Exception('oops'))
+        dlo.append(f)
+        self.assertEqual(1, len(dlo.history))
+        self.assertEqual(1, dlo.history[0][0])
+        self.assertEqual(1, dlo.evictedCount)
+        f.addErrback(lambda value: None)
+
+    def testHistoryWithoutValues(self):
+        """
+        An observer with C{historyValues=False} must keep C{None} in place
+        of values in its history.
+        """
+        dlo = DeferredListObserver(maintainHistory=True, historyValues=False)
+        dlo.append(succeed(42))
+        self.assertEqual([(0, True, None)], dlo.history)
+        self.assertEqual(0, dlo.evictedCount)
+
+    def testBatchObserver(self):
+        """
+        A batch observer must be passed all the events that occurred before
+        the scheduled delivery, in one call.
+        """
+        scheduled = []
+        batches = []
+        dlo = DeferredListObserver(batchScheduler=scheduled.append)
+        dlo.observeBatch(batches.append)
+        d = Deferred()
+        dlo.append(d)
+        dlo.append(succeed(42))
+        d.callback(43)
+        self.assertEqual([], batches)
+        self.assertEqual(1, len(scheduled))
+        scheduled.pop()()
+        self.assertEqual([[(1, True, 42), (0, True, 43)]], batches)
+        dlo.append(succeed(44))
+        self.assertEqual(1, len(scheduled))
+        scheduled.pop()()
+        self.assertEqual([(2, True, 44)], batches[1])
+
+    def testBatchObserverReplay(self):
+        """
+        A batch observer that asks for history replay must be passed the
+        history as a single batch.
+        """
+        batches = []
+        dlo = DeferredListObserver(maintainHistory=True)
+        dlo.append(succeed(42))
+        dlo.append(succeed(43))
+        dlo.observeBatch(batches.append, replayHistory=True)
+        self.assertEqual([[(0, True, 42), (1, True, 43)]], batches)
+
+    def testBatchObserverReplayWithNoHistoryAvailable(self):
+        """
+        When a batch observer asks for history replay but no history is
+        being maintained, a C{RuntimeError} must be raised.
+        """
+        dlo = DeferredListObserver()
+        self.assertRaises(RuntimeError, dlo.observeBatch, lambda batch: None,
+                          replayHistory=True)
+
+    def testUnobserveBatch(self):
+        """
+        Removing the only batch observer of an auto-sealing observer must
+        seal it, and a batch that has not been delivered must be dropped.
+        """
+        scheduled = []
+        batches = []
+        dlo = DeferredListObserver(autoSeal=True,
+                                   batchScheduler=scheduled.append)
+        dlo.observeBatch(batches.append)
+        dlo.append(succeed(42))
+        dlo.unobserve(batches.append)
+        self.assertTrue(dlo.sealed)
+        scheduled.pop()()
+        self.assertEqual([], batches)
+
+    def testExtendEmpty(self):
+        """
+        Extending with no deferreds must return an empty range.
+        """
+        dlo = DeferredListObserver()
+        self.assertEqual([], list(dlo.extend([])))
+        self.assertEqual(0, dlo.pendingCount)
+
+    def testExtend(self):
+        """
+        Extending with a mix of fired and unfired deferreds must give them
+        consecutive indexes, set the counts and results, and call observers
+        with the fired ones.
+        """
+        result = []
+        dlo = DeferredListObserver(maintainResults=True)
+        dlo.observe(lambda *event: result.append(event))
+        dlo.append(Deferred())
+        unfired = Deferred()
+        f = fail(Exception('oops'))
+        indexes = dlo.extend(iter([succeed(41), unfired, f]))
+        self.assertEqual([1, 2, 3], list(indexes))
+        self.assertEqual(2, dlo.pendingCount)
+        self.assertEqual(1, dlo.successCount)
+        self.assertEqual(1, dlo.failureCount)
+        self.assertEqual((1, True, 41), result[0])
+        self.assertEqual(3, result[1][0])
+        unfired.callback(42)
+        self.assertEqual((2, True, 42), result[2])
+        self.assertEqual((True, 42), dlo.results.resultAt(2))
+        self.assertEqual(4, len(dlo.results))
+        dlo.append(succeed(43))
+        self.assertEqual((4, True, 43), result[3])
+        f.addErrback(lambda value: None)
+
+    def testExtendWithPausedDeferred(self):
+        """
+        A deferred that has been called but is waiting on another deferred
+        must be observed when that deferred fires.
+        """
+        result = []
+        inner = Deferred()
+        outer = succeed(None)
+        outer.addCallback(lambda _: inner)
+        dlo = DeferredListObserver()
+        dlo.observe(lambda *event: result.append(event))
+        dlo.extend([outer])
+        self.assertEqual([], result)
+        inner.callback(42)
+        self.assertEqual([(0, True, 42)], result)
+
+    def testExtendFromCallback(self):
+        """
+        A deferred extended from within one of its own callbacks must be
+        observed with its final result, as with C{append}.
+        """
+        result = []
+        dlo = DeferredListObserver()
+        dlo.observe(lambda *event: result.append(event))
+        d = Deferred()
+
+        def extend(value):
+            dlo.extend([d])
+            return value
+
+        d.addCallback(extend)
+        d.addCallback(lambda value: value + 1)
+        d.callback(1)
+        self.assertEqual([(0, True, 2)], result)
+
+    def testExtendSealed(self):
+        """
+        Extending a sealed observer must do nothing.
+        """
+        dlo = DeferredListObserver()
+        dlo.seal()
+        self.assertEqual([], list(dlo.extend([Deferred()])))
+        self.assertEqual(0, dlo.pendingCount)
+
+    def testSnapshotWithoutHistoryOrResults(self):
+        """
+        A snapshot of an observer without history or results must have the
+        counts and no history or results.
+        """
+        dlo = DeferredListObserver()
+        dlo.append(Deferred())
+        dlo.append(succeed(None))
+        snapshot = dlo.snapshot()
+        self.assertEqual(1, snapshot.successCount)
+        self.assertEqual(0, snapshot.failureCount)
+        self.assertEqual(1, snapshot.pendingCount)
+        self.assertEqual(0, snapshot.cancelledCount)
+        self.assertIs(None, snapshot.history)
+        self.assertIs(None, snapshot.evictedCount)
+        self.assertIs(None, snapshot.results)
+
+    def testSnapshotHistoryDoesNotChange(self):
+        """
+        The history in a snapshot must not include later events.
+        """
+        dlo = DeferredListObserver(maintainHistory=True)
+        dlo.append(succeed(1))
+        snapshot = dlo.snapshot()
+        dlo.append(succeed(2))
+        self.assertEqual([(0, True, 1)], list(snapshot.history))
+        self.assertEqual(1, len(snapshot.history))
+        self.assertEqual((0, True, 1), snapshot.history[-1])
+        self.assertRaises(IndexError, lambda: snapshot.history[1])
+
+    def testSnapshotOfBoundedHistory(self):
+        """
+        The history in a snapshot of a bounded history must not change as
+        events are evicted.
+        """
+        dlo = DeferredListObserver(maintainHistory=True, historySize=1)
+        dlo.append(succeed(1))
+        dlo.append(succeed(2))
+        snapshot = dlo.snapshot()
+        dlo.append(succeed(3))
+        self.assertEqual(((1, True, 2),), snapshot.history)
+        self.assertEqual(1, snapshot.evictedCount)
+
+    def testObserveWithSnapshot(self):
+        """
+        An observer added with a snapshot function must have the snapshot
+        function called once with the current state and then receive only
+        later events.
+        """
+        snapshots = []
+        events = []
+        dlo = DeferredListObserver(maintainHistory=True, maintainResults=True)
+        dlo.append(succeed(1))
+        dlo.append(succeed(2))
+        dlo.observe(lambda *event: events.append(event),
+                    snapshot=snapshots.append)
+        dlo.append(succeed(3))
+        self.assertEqual(1, len(snapshots))
+        self.assertEqual(2, snapshots[0].successCount)
+        self.assertEqual(2, len(snapshots[0].history))
+        self.assertEqual([(2, True, 3)], events)
+
+    def testObserveWithSnapshotAndReplay(self):
+        """
+        Asking for both a snapshot and history replay must raise
+        C{ValueError}.
+        """
+        dlo = DeferredListObserver(maintainHistory=True)
+        self.assertRaises(ValueError, dlo.observe, lambda *event: None,
+                          replayHistory=True, snapshot=lambda s: None)
+
+    def testClearHistory(self):
+        """
+        Clearing the history must empty it, count the events as evicted, and
+        not affect earlier snapshots.
+        """
+        dlo = DeferredListObserver(maintainHistory=True)
+        dlo.append(succeed(1))
+        snapshot = dlo.snapshot()
+        dlo.clearHistory()
+        dlo.append(succeed(2))
+        self.assertEqual([(1, True, 2)], dlo.history)
+        self.assertEqual(1, dlo.evictedCount)
+        self.assertEqual([(0, True, 1)], list(snapshot.history))
+
+    def testClearHistoryWithNoHistory(self):
+        """
+        Clearing the history when none is maintained must raise
+        C{RuntimeError}.
+        """
+        self.assertRaises(RuntimeError, DeferredListObserver().clearHistory)
+
+
+class Recorder(object):
+    """
+    Record events passed to an observer method.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def observe(self, index, success, value):
+        self.events.append((index, success, value))
+
+
+class TestReferences(TestCase):
+    """
+    Check that observers are freed by reference counting alone. The cyclic
+    garbage collector is disabled in these tests, so an object that is part
+    of a reference cycle is not freed and the tests fail.
+    """
+
+    def setUp(self):
+        if gc.isenabled():
+            gc.disable()
+            self.addCleanup(gc.enable)
+
+    def testNoReferenceCycle(self):
+        """
+        An observer that has observed deferreds must not be part of a
+        reference cycle.
+        """
+        dlo = DeferredListObserver(maintainHistory=True, maintainResults=True,
+                                   cancelPendingOnDecision=True)
+        dlo.instrument()
+        dlo.observe(lambda index, success, value: None)
+        d = Deferred()
+        dlo.append(d)
+        dlo.extend([succeed(1), Deferred()])
+        d.callback(None)
+        dloRef = ref(dlo)
+        del dlo
+        self.assertIs(None, dloRef())
+
+    def testWeakObserver(self):
+        """
+        A weak observer must be called, and must be removed when it is
+        freed.
+        """
+        dlo = DeferredListObserver()
+        recorder = Recorder()
+        dlo.observe(recorder.observe, weak=True)
+        dlo.append(succeed(3))
+        self.assertEqual([(0, True, 3)], recorder.events)
+        del recorder
+        self.assertEqual([], dlo._observers)
+        dlo.append(succeed(4))
+
+    def testWeakObserverDoesNotKeepObserverAlive(self):
+        """
+        A weak observer function that refers to the observer (and to the
+        deferred it will fire, like the functions in examples.py) must not
+        keep them alive.
+        """
+        def observeWeakly():
+            dlo = DeferredListObserver()
+            result = Deferred()
+
+            def observer(index, success, value):
+                if dlo.successCount == 2:
+                    result.callback(None)
+
+            dlo.observe(observer, weak=True)
+            dlo.append(succeed(None))
+            return ref(dlo), ref(result)
+
+        dloRef, resultRef = observeWeakly()
+        self.assertIs(None, dloRef())
+        self.assertIs(None, resultRef())
+
+    def checkInstrumentedWeakObserver(self, instrumentFirst):
+        """
+        Check that a weak observer is timed when instrumentation is enabled,
+        and is still removed when it is freed.
+
+        @param instrumentFirst: if C{True}, enable instrumentation before
+            adding the observer, else after.
+        """
+        dlo = DeferredListObserver()
+        recorder = Recorder()
+        if instrumentFirst:
+            dlo.instrument()
+        dlo.observe(recorder.observe, weak=True)
+        if not instrumentFirst:
+            dlo.instrument()
+        self.assertIs(DeferredListObserver._timedCallback, dlo._cb)
+        dlo.append(succeed(3))
+        self.assertEqual([(0, True, 3)], recorder.events)
+        observerTimes = dlo.instrumentation.observerTimes
+        self.assertEqual(1, observerTimes[recorder.observe].count)
+        del recorder
+        self.assertEqual([], dlo._observers)
+        self.assertEqual(0, len(observerTimes))
+
+    def testInstrumentThenObserveWeak(self):
+        """
+        A weak observer added after instrumentation is enabled must be
+        timed.
+        """
+        self.checkInstrumentedWeakObserver(True)
+
+    def testObserveWeakThenInstrument(self):
+        """
+        A weak observer added before instrumentation is enabled must be
+        timed.
+        """
+        self.checkInstrumentedWeakObserver(False)
+
+    def testUnobserveWeakObserver(self):
+        """
+        A weak observer must be removable with unobserve, by passing the
+        original observer.
+        """
+        dlo = DeferredListObserver()
+        recorder = Recorder()
+        dlo.observe(recorder.observe, weak=True)
+        dlo.unobserve(recorder.observe)
+        self.assertEqual([], dlo._observers)
+
+    def testWeakBatchObserver(self):
+        """
+        A weak batch observer must be removed when it is freed.
+        """
+        dlo = DeferredListObserver(batchScheduler=lambda function: None)
+        recorder = Recorder()
+        dlo.observeBatch(recorder.observe, weak=True)
+        del recorder
+        self.assertEqual([], dlo._batchObservers)
+
+    def testDeadWeakObserverAutoSeals(self):
+        """
+        If an auto-sealing observer's last observer is a weak one that is
+        freed, it must be sealed.
+        """
+        dlo = DeferredListObserver(autoSeal=True)
+        recorder = Recorder()
+        dlo.observe(recorder.observe, weak=True)
+        del recorder
+        self.assertTrue(dlo.sealed)
+
+    def testClose(self):
+        """
+        Closing must seal the observer and release its history and results,
+        but keep its counts.
+        """
+        dlo = DeferredListObserver(maintainHistory=True, maintainResults=True)
+        value = Recorder()
+        valueRef = ref(value)
+        dlo.observe(lambda index, success, value: None)
+        dlo.append(succeed(value))
+        del value
+        dlo.close()
+        self.assertIs(None, valueRef())
+        self.assertTrue(dlo.sealed)
+        self.assertEqual([], dlo._observers)
+        self.assertEqual([], dlo.history)
+        self.assertEqual(0, len(dlo.results))
+        self.assertEqual(1, dlo.successCount)
@@ -0,0 +1,127 @@
+"""
+Report results to a L{txdlo.DeferredListObserver} from threads other than
+the reactor thread.
+"""
+
+from collections import deque
+from threading import Lock
+
+from twisted.python.failure import Failure
+
+
+class ThreadedReporter(object):
+    """
+    Accept results from any thread and pass them to a
+    L{txdlo.DeferredListObserver} in the reactor thread.
+
+    An index is reserved (in the reactor thread) for each expected result
+    with C{reserve}. This counts as a pending deferred. Any thread can then
+    report the result for that index with C{callback} or C{errback}.
+    Reports are put on a queue (a C{collections.deque}, whose appends and
+    pops are atomic, so producers never wait on each other), and the queue
+    is drained in the reactor thread. Only one C{callFromThread} is made per
+    batch of reports, however many reports arrive before it runs.
+
+    Results are passed to C{dlo} in the order they were reported, so all
+    updates to its counts, history and results, and all calls to its
+    observers, happen in the reactor thread, as usual.
+
+    @param dlo: the L{txdlo.DeferredListObserver} to report to.
+    Each reserved index can be reported once. A report for an index that
+    was not reserved here, or that has already been reported, is dropped
+    (and counted in C{droppedCount}), so the counts of C{dlo} stay
+    consistent.
+
+    @param callFromThread: a C{callable} that arranges for the function it
+        is passed to be called in the reactor thread. If C{None}, the
+        global reactor's C{callFromThread} is used.
+    @ivar droppedCount: the number of reports dropped because their index
+        was not reserved or had already been reported.
+    """
+
+    def __init__(self, dlo, callFromThread=None):
+        if callFromThread is None:
+            from twisted.internet import reactor
+            callFromThread = reactor.callFromThread
+        self._dlo = dlo
+        self._callFromThread = callFromThread
+        self._reports = deque()
+        self._lock = Lock()
+        self._scheduled = False
+        # Reserved indexes that have not yet been reported. This is only
+        # used in the reactor thread.
+        self._outstanding = set()
+        self.droppedCount = 0
+
+    def reserve(self, count=1):
+        """
+        Reserve indexes for results that will be reported later. This must
+        be called in the reactor thread.
+
+        @param count: the C{int} number of indexes to reserve.
+        @return: a C{list} of the C{int} indexes reserved. If the observer
+            is sealed, nothing is reserved and the C{list} is empty.
+        """
+        if self._dlo.sealed:
+            return []
+        reserve = self._dlo._reserve
+        indexes = [reserve(None) for _ in range(count)]
+        self._outstanding.update(indexes)
+        return indexes
+
+    def _report(self, report):
+        """
+        Queue a report and make sure the queue will be drained.
+
+        @param report: an (index, success, value) C{tuple}.
+        """
+        self._reports.append(report)
+        # The lock only protects the flag. If a drain is already scheduled
+        # but has not yet cleared the flag, it will see our report.
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._callFromThread(self._drain)
+
+    def callback(self, index, value):
+        """
+        Report a successful result. This may be called from any thread.
+
+        @param index: the C{int} index (from C{reserve}) of the result.
+        @param value: the result.
+        """
+        self._report((index, True, value))
+
+    def errback(self, index, failure):
+        """
+        Report a failure. This may be called from any thread.
+
+        @param index: the C{int} index (from C{reserve}) of the result.
+        @param failure: a L{twisted.python.failure.Failure} or an
+            exception.
+        """
+        if not isinstance(failure, Failure):
+            failure = Failure(failure)
+        self._report((index, False, failure))
+
+    def _drain(self):
+        """
+        Pass all queued reports to the observer (in the reactor thread).
+        """
+        with self._lock:
+            self._scheduled = False
+        reports = self._reports
+        outstanding = self._outstanding
+        dlo = self._dlo
+        callback, errback = dlo._cb, dlo._eb
+        while reports:
+            index, success, value = reports.popleft()
+            if index not in outstanding:
+                self.droppedCount += 1
+                continue
+            outstanding.discard(index)
+            if success:
+                callback(value, dlo, index)
+            else:
+                errback(value, dlo, index)